@@ -0,0 +1,151 @@
+"""
+Concurrent throughput of a blocking session versus the async session.
+
+Both apps expose the same handler shape as ``GET /rooms/{id}/availability``:
+a room lookup followed by an overlap query. The "blocking" app runs them
+through a synchronous ``Session`` inside an ``async def`` handler (the old
+behaviour); the "async" app awaits an ``AsyncSession``. A SQLite file is used
+as the MySQL stand-in and ``--latency-ms`` makes SQLite sleep inside every
+query, on the driver side, to emulate a network round trip.
+
+Usage:
+    python -m benchmarks.bench_async_db --requests 400 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, Reservations, Rooms, Users
+
+
+def _register_sleep(dbapi_connection, connection_record, latency_ms: float):
+    dbapi_connection.create_function(
+        "sleep_ms", 0, lambda: time.sleep(latency_ms / 1000) or 0
+    )
+
+
+def seed(path: str, rooms: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(Users(id=1, name="bench", email="bench@test.com", password="x"))
+        start = datetime(2030, 1, 1, 8, 0)
+        for room_id in range(1, rooms + 1):
+            db.add(Rooms(id=room_id, name=f"Room {room_id}", location="1", capacity=4))
+            db.add(
+                Reservations(
+                    room_id=room_id,
+                    user_id=1,
+                    start_time=start,
+                    end_time=start + timedelta(hours=1),
+                )
+            )
+        db.commit()
+    engine.dispose()
+
+
+def overlap_query(id: int, start: datetime, end: datetime):
+    return (
+        select(Reservations)
+        .where(
+            Reservations.room_id == id,
+            (Reservations.start_time < end) & (Reservations.end_time > start),
+        )
+        .limit(1)
+    )
+
+
+def blocking_app(path: str, latency_ms: float) -> FastAPI:
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(
+        engine,
+        "connect",
+        lambda conn, record: _register_sleep(conn, record, latency_ms),
+    )
+    SessionLocal = sessionmaker(bind=engine)
+    app = FastAPI()
+
+    @app.get("/rooms/{id}/availability")
+    async def availability(id: int, start: datetime, end: datetime):
+        with SessionLocal() as db:
+            db.execute(select(func.sleep_ms()))
+            room = db.scalar(select(Rooms).where(Rooms.id == id))
+            overlapping = db.scalar(overlap_query(id, start, end))
+            return {"room_id": room.id, "availability": overlapping is None}
+
+    return app
+
+
+def async_app(path: str, latency_ms: float) -> FastAPI:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    event.listen(
+        engine.sync_engine,
+        "connect",
+        lambda conn, record: _register_sleep(conn, record, latency_ms),
+    )
+    SessionLocal = async_sessionmaker(bind=engine)
+    app = FastAPI()
+
+    @app.get("/rooms/{id}/availability")
+    async def availability(id: int, start: datetime, end: datetime):
+        async with SessionLocal() as db:
+            await db.execute(select(func.sleep_ms()))
+            room = await db.scalar(select(Rooms).where(Rooms.id == id))
+            overlapping = await db.scalar(overlap_query(id, start, end))
+            return {"room_id": room.id, "availability": overlapping is None}
+
+    return app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int, rooms: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    params = {"start": "2030-01-01T08:30:00", "end": "2030-01-01T09:30:00"}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def one(i: int):
+            async with semaphore:
+                response = await c.get(
+                    f"/rooms/{i % rooms + 1}/availability", params=params
+                )
+                assert response.status_code == 200, response.text
+
+        await one(0)
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--rooms", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        seed(path, args.rooms)
+
+        for label, factory in (("blocking", blocking_app), ("async", async_app)):
+            app = factory(path, args.latency_ms)
+            throughput = asyncio.run(
+                run(app, args.requests, args.concurrency, args.rooms)
+            )
+            print(f"{label:>9}: {throughput:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
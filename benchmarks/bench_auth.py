@@ -0,0 +1,61 @@
+"""
+Authentication overhead per request with and without the verified-JWT cache.
+
+Calls ``get_current_user`` the way FastAPI does for every authenticated
+request, with a warm principal cache so no query is made, and reports the
+mean time per call when every call runs ``jwt.decode`` versus when the
+decoded claims come from ``token_cache``. ``--tokens`` distinct tokens are
+presented in turn, like that many logged in users.
+
+Usage:
+    python -m benchmarks.bench_auth --calls 20000 --tokens 100
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from util.auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    Principal,
+    create_access_token,
+    get_current_user,
+    principal_cache,
+    token_cache,
+)
+
+
+async def per_call(tokens: list[str], calls: int, cached: bool) -> float:
+    token_cache.clear()
+    started = time.perf_counter()
+    for i in range(calls):
+        if not cached:
+            token_cache.clear()
+        await get_current_user(None, tokens[i % len(tokens)])
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    tokens = []
+    for user_id in range(1, args.tokens + 1):
+        principal_cache.set(user_id, Principal(id=user_id, name=f"user{user_id}"))
+        tokens.append(
+            create_access_token(
+                {"sub": f"user{user_id}", "uid": user_id},
+                expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+            )
+        )
+
+    for label, cached in (("jwt.decode", False), ("cached", True)):
+        seconds = asyncio.run(per_call(tokens, args.calls, cached))
+        print(f"{label:>10}: {seconds * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
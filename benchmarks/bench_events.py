@@ -0,0 +1,93 @@
+"""
+Reservation event fan-out cost with thousands of idle subscribers.
+
+Opens ``--subscribers`` event streams spread over ``--rooms`` rooms, each
+consumed by its own task the way a request task consumes one under uvicorn,
+and reports the memory an idle stream costs. Then publishes ``--events``
+reservation events to random rooms through the local broker and reports how
+long each one takes to reach every subscriber of its room.
+
+Usage:
+    python -m benchmarks.bench_events --subscribers 10000 --rooms 1000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+from util.events import EventHub, LocalBroker, encode_event
+
+
+async def consume(stream, received: list):
+    async for chunk in stream:
+        received.append(chunk)
+
+
+async def run(subscribers: int, rooms: int, events: int):
+    hub = EventHub()
+    broker = LocalBroker(hub)
+    received: list[bytes] = []
+    rng = random.Random(42)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = [
+        asyncio.create_task(
+            consume(hub.stream([rng.randint(1, rooms)], heartbeat=60), received)
+        )
+        for _ in range(subscribers)
+    ]
+    await asyncio.sleep(0.1)
+    idle = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(
+        f"{subscribers} idle streams: {idle / 2**20:.1f} MiB, "
+        f"{idle / subscribers / 1024:.1f} KiB each"
+    )
+
+    latencies = []
+    for id in range(events):
+        room_id = rng.randint(1, rooms)
+        reservation = SimpleNamespace(
+            id=id,
+            room_id=room_id,
+            user_id=1,
+            start_time=datetime(2025, 3, 10, 10),
+            end_time=datetime(2025, 3, 10, 11),
+        )
+        expected = len(received) + len(hub.rooms.get(room_id, ()))
+
+        started = time.perf_counter()
+        await broker.publish(room_id, encode_event("created", reservation))
+        while len(received) < expected:
+            await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    print(
+        f"{events} events, {len(received) - subscribers} deliveries: "
+        f"median {latencies[len(latencies) // 2] * 1000:.3f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.3f} ms"
+    )
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.subscribers, args.rooms, args.events))
+
+
+if __name__ == "__main__":
+    main()
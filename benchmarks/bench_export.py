@@ -0,0 +1,102 @@
+"""
+Streaming reservation export throughput and memory over millions of rows.
+
+Seeds ``--rows`` reservations into SQLite (5M by default) and runs
+``GET /reservations/export`` through the ASGI app with a client that drops
+every chunk as it arrives, the way a socket would. Prints the resident
+memory every ``--every`` rows, which stays flat while the rows stream from
+the server-side cursor, and the overall rows per second.
+
+Usage:
+    python -m benchmarks.bench_export --rows 5000000 --format csv
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.bench_reservation_index import seed
+from database.database import get_read_sessions
+from database.migrations import apply_migrations
+from util.utils import create_app
+
+
+def rss_mib() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def export(path: str, format: str, every: int) -> int:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    app = create_app()
+    app.dependency_overrides[get_read_sessions] = lambda: async_sessionmaker(engine)
+
+    request = [{"type": "http.request", "body": b"", "more_body": False}]
+    lines = 0
+    reported = 0
+
+    async def receive() -> dict:
+        if request:
+            return request.pop()
+        await asyncio.Event().wait()
+
+    async def send(message: dict):
+        nonlocal lines, reported
+        if message["type"] == "http.response.body":
+            lines += message.get("body", b"").count(b"\n")
+            if lines - reported >= every:
+                reported = lines
+                print(f"{lines:>10} rows, RSS {rss_mib():6.1f} MiB")
+
+    await app(
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/reservations/export",
+            "raw_path": b"/reservations/export",
+            "root_path": "",
+            "query_string": f"format={format}".encode(),
+            "headers": [],
+            "client": ("bench", 1),
+            "server": ("bench", 80),
+        },
+        receive,
+        send,
+    )
+    await engine.dispose()
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--every", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        seed(engine, args.rows, args.rooms)
+        with engine.begin() as connection:
+            apply_migrations(connection)
+        engine.dispose()
+
+        print(f"before export, RSS {rss_mib():6.1f} MiB")
+        started = time.perf_counter()
+        lines = asyncio.run(export(path, args.format, args.every))
+        elapsed = time.perf_counter() - started
+        print(f"exported {lines} lines in {elapsed:.1f}s ({lines / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Per-layer overhead of the middleware chain in requests per second.
+
+Each stack wraps the same FastAPI app with a single ``GET /rooms`` route and
+is driven directly through the ASGI interface, without a server or HTTP
+client, so only routing and middleware cost is measured. The best of
+``--repeat`` runs is reported. The "old" layers
+are copies of the previous ``PaginationMiddleware`` and ``log_requests``;
+log records go to a ``NullHandler`` so their formatting is counted but no
+I/O is.
+
+Usage:
+    python -m benchmarks.bench_middlewares --requests 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, Request
+
+import util.middlewares
+from util.middlewares import (
+    MetricsMiddleware,
+    PaginationMiddleware,
+    RequestLoggingMiddleware,
+)
+
+logger = logging.getLogger("bench_middlewares")
+logger.addHandler(logging.NullHandler())
+logger.propagate = False
+logger.setLevel(logging.INFO)
+
+
+class OldPaginationMiddleware:
+    def __init__(self, app: FastAPI):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+
+        if request.method == "GET":
+            query_params = request.query_params
+            page = int(query_params.get("page", 1))
+            limit = int(query_params.get("limit", 10))
+            offset = (page - 1) * limit
+
+            scope["pagination"] = {"page": page, "limit": limit, "offset": offset}
+
+        await self.app(scope, receive, send)
+
+
+def old_log_requests(app: FastAPI):
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        logger.info(f"Receiving request: {request.method} {request.url}.")
+        if request_body := await request.body():
+            logger.info(f"Request body: {request_body}.")
+
+        response = await call_next(request)
+
+        logger.info(f"Response status code: {response.status_code}.")
+
+        return response
+
+
+def build(layers: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/rooms")
+    async def list_rooms(page: int = 1, limit: int = 10):
+        return {"page": page, "limit": limit, "rooms": []}
+
+    for layer in layers:
+        if layer == "old logging":
+            old_log_requests(app)
+        elif layer == "logging":
+            app.add_middleware(RequestLoggingMiddleware)
+        elif layer == "old pagination":
+            app.add_middleware(OldPaginationMiddleware)
+        elif layer == "pagination":
+            app.add_middleware(PaginationMiddleware)
+        elif layer == "metrics":
+            app.add_middleware(MetricsMiddleware)
+
+    return app
+
+
+STACKS = {
+    "no middleware": [],
+    "old pagination": ["old pagination"],
+    "pagination": ["pagination"],
+    "old logging": ["old logging"],
+    "logging": ["logging"],
+    "metrics": ["metrics"],
+    "old chain": ["old logging", "old pagination"],
+    "new chain": ["logging", "pagination", "metrics"],
+}
+
+
+async def run(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1234),
+        "root_path": "",
+        "path": "/rooms",
+        "raw_path": b"/rooms",
+        "query_string": b"page=2&limit=20",
+        "headers": [(b"host", b"bench")],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(100):
+        await app(dict(scope), receive, send)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    util.middlewares.logger = logger
+
+    for label, layers in STACKS.items():
+        app = build(layers)
+        throughput = max(
+            asyncio.run(run(app, args.requests)) for _ in range(args.repeat)
+        )
+        print(f"{label:>15}: {throughput:9.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Page 1 versus page 10,000 under offset and keyset pagination.
+
+Seeds ``--rows`` reservations into SQLite with the production indexes and
+fetches pages of ``--limit`` rows in the ``list_reservations`` sort order
+(start_time, id), once with ``OFFSET`` and once with a keyset cursor.
+
+Usage:
+    python -m benchmarks.bench_pagination --rows 1000000 --page 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from benchmarks.bench_reservation_index import seed
+from database.migrations import apply_migrations
+from database.models import Reservations
+from util.pagination import Keyset
+
+keyset = Keyset(Reservations.start_time, Reservations.id)
+
+
+def timed(session: Session, statement, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        session.scalars(statement).all()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        seed(engine, args.rows, args.rooms)
+        with engine.begin() as connection:
+            apply_migrations(connection)
+
+        query = keyset.order(select(Reservations))
+        with Session(engine) as session:
+            deep_offset = (args.page - 1) * args.limit
+            previous_row = session.scalars(query.offset(deep_offset - 1).limit(1)).one()
+            deep_cursor = keyset.decode(keyset.encode(previous_row))
+            session.expunge_all()
+
+            statements = {
+                "offset": (
+                    query.limit(args.limit),
+                    query.offset(deep_offset).limit(args.limit),
+                ),
+                "keyset": (
+                    query.limit(args.limit),
+                    query.where(keyset.after(deep_cursor)).limit(args.limit),
+                ),
+            }
+
+            print(f"{'':>8} {'page 1':>10} {f'page {args.page}':>12}")
+            for label, (first, deep) in statements.items():
+                first_ms = timed(session, first, args.repeat)
+                deep_ms = timed(session, deep, args.repeat)
+                print(f"{label:>8} {first_ms:>8.2f}ms {deep_ms:>10.2f}ms")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
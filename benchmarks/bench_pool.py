@@ -0,0 +1,108 @@
+"""
+Throughput and checkout waits under load for several pool settings.
+
+Every simulated request checks a connection out and runs one query that
+holds it for ``--latency-ms`` inside SQLite, the MySQL stand-in, like a
+slow query or a network round trip would. ``--concurrency`` requests run at
+once, so a pool smaller than the concurrency makes requests queue for a
+connection; that wait is invisible in query timings but shows up here as
+checkout wait and tail latency.
+
+Usage:
+    python -m benchmarks.bench_pool --requests 1000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.pool import db_pool_checkout_wait, pool_options, pool_settings
+
+CONFIGURATIONS = {
+    "default 5+10": {"POOL_SIZE": 5, "MAX_OVERFLOW": 10},
+    "tuned 20+10": {"POOL_SIZE": 20, "MAX_OVERFLOW": 10},
+    "tuned 50+0": {"POOL_SIZE": 50, "MAX_OVERFLOW": 0},
+}
+
+
+async def run(
+    path: str, section: dict, requests: int, concurrency: int, latency_ms: float
+) -> dict:
+    settings = pool_settings({"PRE_PING": "never", "POOL_TIMEOUT": 10, **section})
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        **pool_options(settings, "bench"),
+    )
+    event.listen(
+        engine.sync_engine,
+        "connect",
+        lambda dbapi_connection, record: dbapi_connection.create_function(
+            "sleep_ms", 0, lambda: time.sleep(latency_ms / 1000) or 0
+        ),
+    )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    timeouts = 0
+
+    async def one():
+        nonlocal timeouts
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with engine.connect() as connection:
+                    await connection.execute(select(func.sleep_ms()))
+            except TimeoutError:
+                timeouts += 1
+            latencies.append(time.perf_counter() - started)
+
+    checkouts = db_pool_checkout_wait.count("bench")
+    wait_seconds = db_pool_checkout_wait.total("bench")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    checkouts = db_pool_checkout_wait.count("bench") - checkouts
+    wait_seconds = db_pool_checkout_wait.total("bench") - wait_seconds
+    return {
+        "throughput": requests / elapsed,
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1] * 1000,
+        "wait_ms": wait_seconds / checkouts * 1000 if checkouts else 0.0,
+        "timeouts": timeouts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+
+        for label, section in CONFIGURATIONS.items():
+            result = asyncio.run(
+                run(path, section, args.requests, args.concurrency, args.latency_ms)
+            )
+            print(
+                f"{label:>13}: {result['throughput']:7.1f} req/s, "
+                f"p95 {result['p95_ms']:7.1f} ms, "
+                f"mean checkout wait {result['wait_ms']:7.1f} ms, "
+                f"timeouts {result['timeouts']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+List page cost with ORM entities versus projected rows.
+
+Seeds ``--rows`` reservations into SQLite and builds pages of ``--limit``
+rows the way ``list_reservations`` did before and after fieldsets: loading
+ORM entities and encoding them with ``jsonable_encoder``, against selecting
+the columns as plain rows and encoding dicts, for every field and for
+``fields=id,start_time``. Every page uses a fresh session like a request
+does. Reports the mean time and the peak memory allocated per page.
+
+Usage:
+    python -m benchmarks.bench_projection --rows 100000 --limit 100
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from benchmarks.bench_reservation_index import seed
+from database.migrations import apply_migrations
+from database.models import Reservations
+from routes.ReservationsWS import reservations_fields, reservations_keyset
+
+
+def entity_page(session: Session, offset: int, limit: int):
+    query = reservations_keyset.order(select(Reservations))
+    return jsonable_encoder(session.scalars(query.offset(offset).limit(limit)).all())
+
+
+def projected_page(fields):
+    names = reservations_fields.parse(fields)
+    query = reservations_keyset.order(
+        reservations_fields.select(names, reservations_keyset)
+    )
+
+    def page(session: Session, offset: int, limit: int):
+        rows = session.execute(query.offset(offset).limit(limit)).all()
+        return jsonable_encoder(reservations_fields.items(rows, names))
+
+    return page
+
+
+def measure(engine, page, pages: int, limit: int) -> tuple[float, float]:
+    started = time.perf_counter()
+    for number in range(pages):
+        with Session(engine) as session:
+            page(session, number % 10 * limit, limit)
+    elapsed = (time.perf_counter() - started) / pages * 1000
+
+    tracemalloc.start()
+    with Session(engine) as session:
+        page(session, 0, limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        seed(engine, args.rows, args.rooms)
+        with engine.begin() as connection:
+            apply_migrations(connection)
+
+        variants = {
+            "ORM entities": entity_page,
+            "rows, all fields": projected_page(None),
+            "rows, id,start_time": projected_page("id,start_time"),
+        }
+        for label, page in variants.items():
+            elapsed, peak_kib = measure(engine, page, args.pages, args.limit)
+            print(f"{label:>20}: {elapsed:6.2f} ms/page, peak {peak_kib:7.1f} KiB")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
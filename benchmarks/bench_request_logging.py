@@ -0,0 +1,103 @@
+"""
+Large POSTs through the old ``@app.middleware("http")`` logger and the ASGI one.
+
+Both apps expose a POST route that reads its body, like the batch endpoints.
+The "http" app logs with the previous ``log_requests`` middleware, which
+buffers every body and logs it whole; the "asgi" app uses
+``RequestLoggingMiddleware`` with its default byte cap. Records are written
+to a file so formatting and writes are measured, not a terminal. Reports
+requests per second and the peak memory traced while serving them.
+
+Usage:
+    python -m benchmarks.bench_request_logging --requests 200 --body-kb 1024
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+import httpx
+from fastapi import FastAPI, Request
+
+import util.middlewares
+from util.middlewares import RequestLoggingMiddleware
+
+
+def route(app: FastAPI):
+    @app.post("/reservations/batch")
+    async def batch(request: Request):
+        return {"length": len(await request.body())}
+
+
+def http_app(logger: logging.Logger) -> FastAPI:
+    app = FastAPI()
+    route(app)
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        logger.info(f"Receiving request: {request.method} {request.url}.")
+        if request_body := await request.body():
+            logger.info(f"Request body: {request_body}.")
+
+        response = await call_next(request)
+
+        logger.info(f"Response status code: {response.status_code}.")
+
+        return response
+
+    return app
+
+
+def asgi_app(logger: logging.Logger) -> FastAPI:
+    util.middlewares.logger = logger
+    app = FastAPI()
+    route(app)
+    app.add_middleware(RequestLoggingMiddleware)
+    return app
+
+
+async def run(app: FastAPI, requests: int, body: bytes) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await c.post("/reservations/batch", content=body)
+            assert response.json() == {"length": len(body)}
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--body-kb", type=int, default=1024)
+    args = parser.parse_args()
+
+    body = b"x" * (args.body_kb * 1024)
+
+    with tempfile.TemporaryDirectory() as directory:
+        handler = logging.FileHandler(os.path.join(directory, "bench.log"))
+        logger = logging.getLogger("bench_request_logging")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+
+        for label, factory in (("http", http_app), ("asgi", asgi_app)):
+            app = factory(logger)
+            tracemalloc.start()
+            throughput = asyncio.run(run(app, args.requests, body))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{label:>5}: {throughput:8.1f} req/s, "
+                f"peak traced memory {peak / 1024 / 1024:6.1f} MiB"
+            )
+
+        handler.close()
+
+
+if __name__ == "__main__":
+    main()
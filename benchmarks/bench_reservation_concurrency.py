@@ -0,0 +1,129 @@
+"""
+Throughput of concurrent overlapping reservation creates on one room.
+
+Fires ``--requests`` overlapping ``POST /reservations`` calls at once through
+the ASGI app, ``--rounds`` times on a fresh slot each round, against a SQLite
+file whose transactions take the write lock when they begin, the way the room
+row lock serializes writers on MySQL. Reports creates per second over all
+calls and checks that every round had exactly one winner.
+
+Usage:
+    python -m benchmarks.bench_reservation_concurrency --requests 300 --rounds 5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database.database import get_db
+from database.migrations import apply_migrations
+from database.models import Base, Reservations, Rooms, Users
+from util.auth import Principal, get_current_user
+from util.utils import create_app
+
+
+async def setup(path: str):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 60}
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_implicit_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.run_sync(apply_migrations)
+
+    factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    async with factory() as db:
+        db.add(Users(id=1, name="bench", email="bench@test.com", password="x"))
+        db.add(Rooms(id=1, name="Room A", location="1st Floor", capacity=10))
+        await db.commit()
+
+    return engine, factory
+
+
+async def run(path: str, requests: int, rounds: int):
+    engine, factory = await setup(path)
+
+    async def override_get_db():
+        async with factory() as db:
+            yield db
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=1, name="bench")
+
+    first_slot = (datetime.now() + timedelta(days=1)).replace(
+        hour=9, minute=0, second=0, microsecond=0
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def create(slot: datetime, offset: int) -> int:
+            start = slot + timedelta(minutes=offset % 30)
+            response = await c.post(
+                "/reservations",
+                json={
+                    "room_id": 1,
+                    "start_time": start.isoformat(),
+                    "end_time": (start + timedelta(hours=1)).isoformat(),
+                },
+            )
+            return response.status_code
+
+        elapsed = 0.0
+        for round in range(rounds):
+            slot = first_slot + timedelta(days=round)
+            started = time.perf_counter()
+            status_codes = await asyncio.gather(
+                *(create(slot, offset) for offset in range(requests))
+            )
+            elapsed += time.perf_counter() - started
+
+            winners = status_codes.count(201)
+            rejected = status_codes.count(400)
+            print(
+                f"round {round + 1}: {winners} created, {rejected} rejected, "
+                f"{requests - winners - rejected} failed"
+                + ("" if winners == 1 else "  <-- expected exactly one winner")
+            )
+
+    async with factory() as db:
+        created = await db.scalar(select(func.count(Reservations.id)))
+    await engine.dispose()
+
+    total = requests * rounds
+    print(
+        f"{total} overlapping creates in {elapsed:.2f}s: "
+        f"{total / elapsed:,.0f} creates/s, "
+        f"{created} reservations stored for {rounds} rounds"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(
+            run(os.path.join(directory, "bench.db"), args.requests, args.rounds)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Reservation lookups with and without the (room_id, start_time, end_time) index.
+
+Fills a SQLite file with ``--rows`` reservations spread over ``--rooms`` rooms
+(10M by default, generated in SQL so seeding takes about a minute) and times
+the conflict check and the per-room date filter, both before the index exists
+and after the migration adds it. The date filter is timed both as the old
+``CAST(start_time AS DATE) = :day`` and as the new half-open range.
+
+Usage:
+    python -m benchmarks.bench_reservation_index --rows 10000000 --rooms 1000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, cast, create_engine, select, text
+from sqlalchemy.schema import DropIndex
+
+from database.migrations import apply_migrations
+from database.models import Base, Reservations
+from database.queries import on_date, overlapping_reservations
+
+EPOCH = datetime(2025, 1, 1)
+
+
+def seed(engine, rows: int, rooms: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for index in Reservations.__table__.indexes:
+            connection.execute(DropIndex(index))
+
+        connection.execute(
+            text("""
+                INSERT INTO reservations
+                    (room_id, user_id, start_time, end_time, created_at)
+                WITH RECURSIVE seq(n) AS (
+                    SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows - 1
+                )
+                SELECT
+                    n % :rooms + 1,
+                    1,
+                    datetime(:epoch, '+' || (n / :rooms) || ' hours') || '.000000',
+                    datetime(:epoch, '+' || (n / :rooms) || ' hours', '+45 minutes')
+                        || '.000000',
+                    :epoch
+                FROM seq
+                """),
+            {"rows": rows, "rooms": rooms, "epoch": EPOCH.isoformat(" ")},
+        )
+
+
+def timed(engine, statements) -> float:
+    with engine.connect() as connection:
+        started = time.perf_counter()
+        for statement in statements:
+            connection.execute(statement).all()
+        return (time.perf_counter() - started) / len(statements) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--probes", type=int, default=20)
+    args = parser.parse_args()
+
+    hours = args.rows // args.rooms
+    rng = random.Random(42)
+
+    def random_window() -> tuple[int, datetime]:
+        return rng.randint(1, args.rooms), EPOCH + timedelta(hours=rng.randrange(hours))
+
+    conflict_checks = []
+    cast_filters = []
+    range_filters = []
+    for _ in range(args.probes):
+        room_id, start = random_window()
+        conflict_checks.append(
+            overlapping_reservations(
+                room_id, start + timedelta(minutes=30), start + timedelta(hours=1)
+            ).limit(1)
+        )
+        day: date = start.date()
+        room_reservations = select(Reservations).where(Reservations.room_id == room_id)
+        cast_filters.append(
+            room_reservations.where(cast(Reservations.start_time, Date) == day)
+        )
+        range_filters.append(
+            room_reservations.where(on_date(Reservations.start_time, day))
+        )
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+
+        started = time.perf_counter()
+        seed(engine, args.rows, args.rooms)
+        print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+        results = {}
+        for label in ("no index", "with index"):
+            if label == "with index":
+                with engine.begin() as connection:
+                    apply_migrations(connection)
+
+            results[label] = (
+                timed(engine, conflict_checks),
+                timed(engine, cast_filters),
+                timed(engine, range_filters),
+            )
+
+        print(f"{'':>12} {'conflict':>10} {'date cast':>10} {'date range':>11}")
+        for label, (conflict, cast_ms, range_ms) in results.items():
+            print(
+                f"{label:>12} {conflict:>8.2f}ms {cast_ms:>8.2f}ms {range_ms:>9.2f}ms"
+            )
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
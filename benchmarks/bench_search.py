@@ -0,0 +1,128 @@
+"""
+Room search with leading-wildcard ILIKE against the in-process trigram index.
+
+Fills a SQLite file with ``--rows`` rooms (1M by default) named from word
+lists, like "Blue Conference Room 4821", then replays what a room picker
+sends while someone types: every prefix of a name, a multi-word query and a
+typo. ILIKE is timed like ``list_rooms`` runs it, a page plus the count;
+the index is timed in prefix and fuzzy mode, after timing its load.
+
+Usage:
+    python -m benchmarks.bench_search --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, insert, or_, select
+
+from database.models import Base, Rooms
+from util.search import SearchIndex
+
+COLORS = ["Blue", "Green", "Red", "Amber", "Silver", "Violet", "Ocean", "Sunset"]
+KINDS = ["Conference", "Meeting", "Board", "Training", "Focus", "Huddle", "Studio"]
+PLACES = ["Room", "Hall", "Lab", "Suite", "Pod"]
+BUILDINGS = ["North", "South", "East", "West", "Central", "Annex"]
+
+QUERIES = [
+    "c",
+    "co",
+    "con",
+    "conf",
+    "conference",
+    "conference r",
+    "blue conference room 48",
+    "confrence",
+    "violet huddle pod 99",
+]
+
+
+def seed(engine, rows: int):
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    with engine.begin() as connection:
+        for start in range(0, rows, 50_000):
+            connection.execute(
+                insert(Rooms),
+                [
+                    {
+                        "id": id,
+                        "name": f"{rng.choice(COLORS)} {rng.choice(KINDS)} "
+                        f"{rng.choice(PLACES)} {id}",
+                        "location": f"Floor {rng.randint(1, 30)}, "
+                        f"{rng.choice(BUILDINGS)} Building",
+                        "capacity": rng.randint(3, 40),
+                    }
+                    for id in range(start + 1, min(start + 50_000, rows) + 1)
+                ],
+            )
+
+
+def time_ilike(engine, query: str, repeat: int) -> float:
+    pattern = f"%{query}%"
+    rooms = select(Rooms).where(
+        or_(Rooms.name.ilike(pattern), Rooms.location.ilike(pattern))
+    )
+    with engine.connect() as connection:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            connection.execute(select(func.count()).select_from(rooms.subquery()))
+            connection.execute(rooms.order_by(Rooms.id).limit(10)).all()
+        return (time.perf_counter() - started) / repeat * 1000
+
+
+def time_index(index: SearchIndex, query: str, fuzzy: bool, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        index.search(query, 10, fuzzy)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+
+        started = time.perf_counter()
+        seed(engine, args.rows)
+        print(f"seeded {args.rows} rooms in {time.perf_counter() - started:.1f}s")
+
+        index = SearchIndex((Rooms.id, Rooms.name, Rooms.location))
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        with engine.connect() as connection:
+            result = connection.execution_options(yield_per=10000).execute(
+                select(Rooms.id, Rooms.name, Rooms.location).order_by(Rooms.id)
+            )
+            for rows in result.partitions():
+                index.load(rows)
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(
+            f"indexed {len(index)} rooms in {time.perf_counter() - started:.1f}s, "
+            f"{len(index.postings)} trigrams, ~{(rss_after - rss_before) / 1024:.0f} MB"
+        )
+
+        print(f"{'query':>24} {'ILIKE':>10} {'prefix':>9} {'fuzzy':>9} {'hits':>5}")
+        for query in QUERIES:
+            hits = len(index.search(query, 10, fuzzy=query == "confrence"))
+            print(
+                f"{query!r:>24} "
+                f"{time_ilike(engine, query, args.repeat):>8.1f}ms "
+                f"{time_index(index, query, False, args.repeat):>7.2f}ms "
+                f"{time_index(index, query, True, args.repeat):>7.2f}ms "
+                f"{hits:>5}"
+            )
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+List response encoding with jsonable_encoder and json against response models and orjson.
+
+Builds the envelope ``list_reservations`` returns for a page of ``--limit``
+rows and runs it through FastAPI's own ``serialize_response`` and response
+classes: without a response model the content goes through
+``jsonable_encoder`` before ``JSONResponse`` or ``ORJSONResponse`` renders it;
+with the route's ``ReservationsPage`` model pydantic validates and dumps it
+in Rust and ``ORJSONResponse`` renders the result. Encoding the raw dict
+with orjson alone is the lower bound.
+
+Usage:
+    python -m benchmarks.bench_serialization --limit 100
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from util.utils import create_app
+
+EPOCH = datetime(2025, 1, 1, 8)
+
+
+def page(limit: int) -> dict:
+    return {
+        "page": 1,
+        "limit": limit,
+        "total_items": 10_000,
+        "total_pages": (10_000 + limit - 1) // limit,
+        "total_exact": True,
+        "reservations": [
+            {
+                "id": id,
+                "room_id": id % 100 + 1,
+                "user_id": id % 7 + 1,
+                "start_time": EPOCH + timedelta(hours=id),
+                "end_time": EPOCH + timedelta(hours=id, minutes=45),
+                "created_at": EPOCH,
+            }
+            for id in range(1, limit + 1)
+        ],
+    }
+
+
+def response_field():
+    for route in create_app().routes:
+        if isinstance(route, APIRoute) and route.path == "/reservations":
+            if "GET" in route.methods:
+                return route.response_field
+
+
+async def measure(encode, content: dict, repeat: int) -> tuple[float, int]:
+    body = await encode(content)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await encode(content)
+    return (time.perf_counter() - started) / repeat * 1_000_000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    content = page(args.limit)
+    field = response_field()
+
+    async def encoder_json(content):
+        return JSONResponse(await serialize_response(response_content=content)).body
+
+    async def encoder_orjson(content):
+        return ORJSONResponse(await serialize_response(response_content=content)).body
+
+    async def model_orjson(content):
+        return ORJSONResponse(
+            await serialize_response(
+                field=field, response_content=content, exclude_unset=True
+            )
+        ).body
+
+    async def orjson_only(content):
+        return ORJSONResponse(content).body
+
+    variants = {
+        "jsonable_encoder + json": encoder_json,
+        "jsonable_encoder + orjson": encoder_orjson,
+        "response model + orjson": model_orjson,
+        "orjson only": orjson_only,
+    }
+    for label, encode in variants.items():
+        elapsed, size = asyncio.run(measure(encode, content, args.repeat))
+        print(f"{label:>26}: {elapsed:8.1f} us/page, {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
 from fastapi import Depends
-from sqlalchemy import Engine, create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
-from typing import Annotated
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import declarative_base
+from functools import partial
+from typing import AsyncIterator, Annotated, Callable
 from configobj import ConfigObj
+from database.instrumentation import instrument_engine
+from database.pool import (
+    configure_pool,
+    pool_options,
+    pool_settings,
+    register_pool_gauges,
+)
+from database.replicas import PrimarySession, ReplicaSet, read_from_primary
 
 config = ConfigObj("config.cfg")
 
@@ -17,24 +29,98 @@ MYSQL_HOST = config[DATABASE_SECTION]["MYSQL_HOST"]
 MYSQL_PORT = config[DATABASE_SECTION]["MYSQL_PORT"]
 MYSQL_DATABASE = config[DATABASE_SECTION]["MYSQL_DATABASE"]
 
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
+SQLALCHEMY_DATABASE_URL = f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
+
+POOL_SETTINGS = pool_settings(config[DATABASE_SECTION])
+
+engine: AsyncEngine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL, **pool_options(POOL_SETTINGS, "primary")
+)
+configure_pool(engine, POOL_SETTINGS)
+instrument_engine(engine)
+register_pool_gauges(engine, POOL_SETTINGS)
+
+# Replicas share the credentials and database name of the primary.
+REPLICA_HOSTS = config[DATABASE_SECTION].get("REPLICA_HOSTS", [])
+if isinstance(REPLICA_HOSTS, str):
+    REPLICA_HOSTS = [REPLICA_HOSTS] if REPLICA_HOSTS else []
 
-engine: Engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
+replica_engines: list[AsyncEngine] = []
+for replica_host in REPLICA_HOSTS:
+    if ":" not in replica_host:
+        replica_host = f"{replica_host}:{MYSQL_PORT}"
+
+    replica_engine = create_async_engine(
+        f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{replica_host}/{MYSQL_DATABASE}",
+        **pool_options(POOL_SETTINGS, f"replica-{replica_host}"),
+    )
+    configure_pool(replica_engine, POOL_SETTINGS)
+    instrument_engine(replica_engine)
+    register_pool_gauges(replica_engine, POOL_SETTINGS)
+    replica_engines.append(replica_engine)
+
+READ_YOUR_WRITES_SECONDS = float(
+    config[DATABASE_SECTION].get("READ_YOUR_WRITES_SECONDS", 5)
+)
+
+replicas = ReplicaSet(
+    replica_engines,
+    check_interval=float(config[DATABASE_SECTION].get("REPLICA_CHECK_INTERVAL", 5)),
 )
 
 Base = declarative_base()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(
+    bind=engine,
+    autoflush=False,
+    expire_on_commit=False,
+    sync_session_class=PrimarySession,
+)
+ReplicaSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
 
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with SessionLocal() as db:
+        yield db
+
+
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
 
-def get_db():
-    db = SessionLocal()
-    try:
+
+async def get_read_db(db: db_dependency) -> AsyncIterator[AsyncSession]:
+    """
+    A session on a healthy replica for read-only handlers.
+
+    Falls back to the primary session when no replica is configured or
+    healthy, and for clients that wrote recently so they read their writes.
+    """
+    replica_engine = None if read_from_primary() else replicas.pick()
+    if replica_engine is None:
         yield db
-    finally:
-        db.close()
+        return
+
+    async with ReplicaSessionLocal(bind=replica_engine) as replica_db:
+        yield replica_db
+
+
+read_db_dependency = Annotated[AsyncSession, Depends(get_read_db)]
+
+
+def get_read_sessions() -> Callable[[], AsyncSession]:
+    """
+    A session factory on a healthy replica, chosen like ``get_read_db``.
+
+    For handlers that keep reading after they return, such as streamed
+    responses: FastAPI closes the sessions of dependencies before the
+    response body is sent, so these open their own session.
+    """
+    replica_engine = None if read_from_primary() else replicas.pick()
+    if replica_engine is None:
+        return SessionLocal
+
+    return partial(ReplicaSessionLocal, bind=replica_engine)
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+read_sessions_dependency = Annotated[
+    Callable[[], AsyncSession], Depends(get_read_sessions)
+]
@@ -0,0 +1,136 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from util.metrics import registry
+
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "Time spent executing SQL statements; _count is the query count.",
+    ("operation",),
+)
+db_query_errors = registry.counter(
+    "db_query_errors_total", "SQL statements that raised an error.", ("operation",)
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request",
+    "Statements run per request, when the query inspector is enabled.",
+    ("route",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250),
+)
+db_slow_queries = registry.counter(
+    "db_slow_queries_total",
+    "Statements slower than the query inspector threshold.",
+    ("route", "operation"),
+)
+db_repeated_statements = registry.counter(
+    "db_repeated_statements_total",
+    "Statements repeated within one request past the N+1 threshold.",
+    ("route",),
+)
+
+
+class QueryStats:
+    """
+    Statements run while handling one request.
+
+    Statements are compared by their SQL text, which holds placeholders
+    instead of values, so the same query issued for every row of a result
+    (an N+1 pattern such as a lazy load per serialized object) shows up as
+    one statement with a high count. Statements slower than
+    ``slow_query_seconds`` are kept with their parameters reduced to types.
+    """
+
+    __slots__ = ("slow_query_seconds", "count", "seconds", "statements", "slow")
+
+    def __init__(self, slow_query_seconds: float):
+        self.slow_query_seconds = slow_query_seconds
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+        self.slow: list[dict] = []
+
+    def record(self, statement: str, parameters: Any, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+        if seconds >= self.slow_query_seconds:
+            self.slow.append(
+                {
+                    "statement": statement,
+                    "parameters": redact_parameters(parameters),
+                    "ms": round(seconds * 1000, 2),
+                }
+            )
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run at least ``threshold`` times, most repeated first."""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Bound parameters with every value replaced by its type name."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [redact_parameters(row) for row in parameters]
+        return [type(value).__name__ for value in parameters]
+
+    return type(parameters).__name__
+
+
+def statement_operation(statement: str) -> str:
+    """The SQL verb of a statement, or OTHER, to keep label values bounded."""
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Record query counts, durations and errors of ``engine``.
+
+    The timer is kept on the execution context, so a statement that fails
+    between the two events leaves nothing behind. Statements are also added
+    to the ``QueryStats`` of the current request, when one is being tracked.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started_at = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def observe_query(conn, cursor, statement, parameters, context, executemany):
+        started_at = getattr(context, "_query_started_at", None)
+        if started_at is None:
+            return
+
+        seconds = time.perf_counter() - started_at
+        db_query_duration.observe(seconds, statement_operation(statement))
+
+        query_stats = current_query_stats.get()
+        if query_stats is not None:
+            query_stats.record(statement, parameters, seconds)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def count_query_error(exception_context):
+        if exception_context.statement is not None:
+            db_query_errors.inc(statement_operation(exception_context.statement))
@@ -0,0 +1,65 @@
+from typing import Callable
+
+from sqlalchemy import Connection, inspect, text
+
+from database.models import Reservations, Users
+
+
+def _create_index_if_missing(connection: Connection, table, index_name: str):
+    existing = {index["name"] for index in inspect(connection).get_indexes(table.name)}
+    if index_name in existing:
+        return
+
+    index = next(index for index in table.indexes if index.name == index_name)
+    index.create(bind=connection)
+
+
+def add_reservations_room_interval_index(connection: Connection):
+    _create_index_if_missing(
+        connection,
+        Reservations.__table__,
+        "ix_reservations_room_id_start_time_end_time",
+    )
+
+
+def add_reservations_start_time_index(connection: Connection):
+    _create_index_if_missing(
+        connection, Reservations.__table__, "ix_reservations_start_time"
+    )
+
+
+def add_rooms_reservations_version(connection: Connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("rooms")}
+    if "reservations_version" in columns:
+        return
+
+    connection.execute(
+        text(
+            "ALTER TABLE rooms "
+            "ADD COLUMN reservations_version INTEGER NOT NULL DEFAULT 0"
+        )
+    )
+
+
+def add_users_name_index(connection: Connection):
+    _create_index_if_missing(connection, Users.__table__, "ix_users_name")
+
+
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    add_reservations_room_interval_index,
+    add_reservations_start_time_index,
+    add_rooms_reservations_version,
+    add_users_name_index,
+]
+
+
+def apply_migrations(connection: Connection):
+    """
+    Bring an existing schema up to date with the models.
+
+    ``create_all`` only creates missing tables, so indexes and columns added
+    to tables that already exist are applied here. Every migration is
+    idempotent and safe to run on each startup.
+    """
+    for migration in MIGRATIONS:
+        migration(connection)
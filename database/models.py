@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Index, Integer, String, ForeignKey, DateTime
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
 from database.database import Base
@@ -10,7 +10,7 @@ class Users(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     password = Column(String(255), nullable=False)
-    name = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
 
     rooms = relationship("Rooms", back_populates="creator")
@@ -26,6 +26,9 @@ class Rooms(Base):
     capacity = Column(Integer, nullable=False)
     creator_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=func.now())
+    reservations_version = deferred(
+        Column(Integer, nullable=False, default=0, server_default="0")
+    )
 
     creator = relationship("Users", back_populates="rooms")
     reservations = relationship("Reservations", back_populates="room")
@@ -33,6 +36,15 @@ class Rooms(Base):
 
 class Reservations(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        Index(
+            "ix_reservations_room_id_start_time_end_time",
+            "room_id",
+            "start_time",
+            "end_time",
+        ),
+        Index("ix_reservations_start_time", "start_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
@@ -0,0 +1,186 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import DisconnectionError, TimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from util.metrics import registry
+
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection, including opening new ones.",
+    ("pool",),
+)
+db_pool_checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after waiting pool_timeout seconds.",
+    ("pool",),
+)
+
+
+def pool_name(pool) -> str:
+    """The ``pool`` label of the metrics of ``pool``, see ``pool_options``."""
+    return pool.logging_name or "default"
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """The default async pool, recording how long every checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            db_pool_checkout_timeouts.inc(pool_name(self))
+            raise
+        finally:
+            db_pool_checkout_wait.observe(
+                time.perf_counter() - started, pool_name(self)
+            )
+
+
+def pool_settings(section) -> dict:
+    """
+    Pool settings read from a DATABASE config section.
+
+    PRE_PING is "always" (a round trip on every checkout), "idle" (only for
+    connections idle longer than PRE_PING_IDLE seconds, see
+    ``ping_after_idle``) or "never".
+    """
+    pre_ping = section.get("PRE_PING", "always")
+    if pre_ping not in PRE_PING_STRATEGIES:
+        raise ValueError(
+            f"PRE_PING must be one of {', '.join(PRE_PING_STRATEGIES)}, not {pre_ping!r}."
+        )
+
+    return {
+        "pool_size": int(section.get("POOL_SIZE", 5)),
+        "max_overflow": int(section.get("MAX_OVERFLOW", 10)),
+        "pool_timeout": float(section.get("POOL_TIMEOUT", 30)),
+        "pool_recycle": int(section.get("POOL_RECYCLE", -1)),
+        "pre_ping": pre_ping,
+        "pre_ping_idle": float(section.get("PRE_PING_IDLE", 30)),
+    }
+
+
+def pool_options(settings: dict, name: str) -> dict:
+    """
+    ``create_async_engine`` arguments for ``pool_settings``. ``name`` labels
+    the checkout metrics of the pool and survives ``engine.dispose()``.
+    """
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": settings["pool_size"],
+        "max_overflow": settings["max_overflow"],
+        "pool_timeout": settings["pool_timeout"],
+        "pool_recycle": settings["pool_recycle"],
+        "pool_pre_ping": settings["pre_ping"] == "always",
+    }
+
+
+def ping_after_idle(engine: AsyncEngine, idle_seconds: float):
+    """
+    Ping connections on checkout only when they sat idle for ``idle_seconds``.
+
+    A connection returned a moment ago is almost certainly alive, so busy
+    pools skip the extra round trip ``pool_pre_ping`` makes on every
+    checkout. A failed ping raises ``DisconnectionError``, which makes the
+    pool replace the connection and retry the checkout.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "checkin")
+    def remember_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(sync_engine, "checkout")
+    def ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+
+        try:
+            alive = sync_engine.dialect.do_ping(dbapi_connection)
+        except Exception:
+            alive = False
+
+        if not alive:
+            raise DisconnectionError("Connection failed the idle pre-ping.")
+
+
+def configure_pool(engine: AsyncEngine, settings: dict):
+    """Apply the ``pool_settings`` that are not engine arguments."""
+    if settings["pre_ping"] == "idle":
+        ping_after_idle(engine, settings["pre_ping_idle"])
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    """Usage and checkout waits of the pool of ``engine``."""
+    pool = engine.pool
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {"pool": type(pool).__name__}
+
+    name = pool_name(pool)
+    checkouts = db_pool_checkout_wait.count(name)
+    wait_seconds = db_pool_checkout_wait.total(name)
+    return {
+        "pool": type(pool).__name__,
+        "name": name,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": checkouts,
+        "checkout_wait_seconds_total": wait_seconds,
+        "checkout_wait_seconds_mean": wait_seconds / checkouts if checkouts else 0.0,
+        "checkout_timeouts": db_pool_checkout_timeouts.value(name),
+    }
+
+
+# Engines whose pools the gauges below report, by pool name.
+gauged_pools: dict[str, tuple[AsyncEngine, dict]] = {}
+
+
+def register_pool_gauges(engine: AsyncEngine, settings: dict):
+    """Expose the connections and limits of the pool of ``engine``."""
+    gauged_pools[pool_name(engine.pool)] = (engine, settings)
+
+
+def pool_connections() -> list:
+    readings = []
+    for name, (engine, _) in list(gauged_pools.items()):
+        status = pool_status(engine)
+        readings += [
+            ((name, state), status[state])
+            for state in ("checked_out", "idle", "overflow")
+            if state in status
+        ]
+    return readings
+
+
+def pool_limits() -> list:
+    readings = []
+    for name, (_, settings) in list(gauged_pools.items()):
+        readings += [
+            ((name, "size"), settings["pool_size"]),
+            ((name, "max_overflow"), settings["max_overflow"]),
+        ]
+    return readings
+
+
+registry.gauge(
+    "db_pool_connections",
+    "Connections of each pool by state.",
+    pool_connections,
+    ("pool", "state"),
+)
+registry.gauge(
+    "db_pool_limit",
+    "Configured size and overflow of each pool.",
+    pool_limits,
+    ("pool", "limit"),
+)
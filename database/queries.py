@@ -0,0 +1,28 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import ColumnElement, Select, and_, select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from database.models import Reservations
+
+
+def on_date(column: InstrumentedAttribute, day: date) -> ColumnElement[bool]:
+    """
+    Match a DateTime column against a calendar day as a half-open range.
+
+    Unlike ``cast(column, Date) == day`` this keeps the column bare, so the
+    database can use an index on it.
+    """
+    day_start = datetime.combine(day, time.min)
+    return and_(column >= day_start, column < day_start + timedelta(days=1))
+
+
+def overlapping_reservations(
+    room_id: int, start: datetime, end: datetime
+) -> Select[tuple[Reservations]]:
+    """Reservations of a room that overlap the ``[start, end)`` window."""
+    return select(Reservations).where(
+        Reservations.room_id == room_id,
+        Reservations.start_time < end,
+        Reservations.end_time > start,
+    )
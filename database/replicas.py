@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from itertools import cycle
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from util.logger import setup_logger
+
+logger: logging.Logger = setup_logger(__name__)
+
+
+class Consistency:
+    """
+    Read-your-writes state of one request.
+
+    ``pinned`` means the client wrote recently, so its reads go to the
+    primary until replicas have caught up. ``wrote`` is set when this request
+    commits a write on the primary.
+    """
+
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+current_consistency: ContextVar[Optional[Consistency]] = ContextVar(
+    "current_consistency", default=None
+)
+
+
+def read_from_primary() -> bool:
+    consistency = current_consistency.get()
+    return consistency is not None and consistency.pinned
+
+
+class PrimarySession(Session):
+    """Session of the primary engine, noting committed writes for the request."""
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def note_flushed_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def note_executed_write(orm_execute_state):
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def mark_request_wrote(session):
+    if not session.info.pop("wrote", False):
+        return
+
+    consistency = current_consistency.get()
+    if consistency is not None:
+        consistency.wrote = True
+
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin, skipping the ones failing health checks.
+
+    Args:
+        engines (list[AsyncEngine]): One engine per replica.
+        check_interval (float): Seconds between health checks.
+        check_timeout (float): Seconds a replica has to answer ``SELECT 1``.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        check_interval: float = 5.0,
+        check_timeout: float = 2.0,
+    ):
+        self.engines = engines
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.healthy: list[AsyncEngine] = list(engines)
+        self._next = cycle(self.healthy)
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def pick(self) -> Optional[AsyncEngine]:
+        """The next healthy replica, or None to read from the primary."""
+        if not self.healthy:
+            return None
+
+        return next(self._next)
+
+    async def is_healthy(self, engine: AsyncEngine) -> bool:
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+        except Exception as error:
+            logger.warning(
+                f"Replica {engine.url.host} failed its health check: {error}"
+            )
+            return False
+
+        return True
+
+    async def check(self):
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self.is_healthy(engine) for engine in self.engines)
+        )
+        healthy = [engine for engine, ok in zip(self.engines, results) if ok]
+
+        if healthy != self.healthy:
+            logger.info(
+                f"{len(healthy)} of {len(self.engines)} replicas healthy "
+                f"after {time.perf_counter() - started:.3f}s."
+            )
+            self.healthy = healthy
+            self._next = cycle(healthy)
+
+    async def run_health_checks(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    async def dispose(self):
+        for engine in self.engines:
+            await engine.dispose()
@@ -0,0 +1,50 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, TypeVar
+
+from configobj import ConfigObj
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+config = ConfigObj("config.cfg")
+transactions_config = config.get("TRANSACTIONS", {})
+
+LOCK_RETRY_ATTEMPTS = int(transactions_config.get("LOCK_RETRY_ATTEMPTS", 3))
+LOCK_RETRY_DELAY = float(transactions_config.get("LOCK_RETRY_DELAY", 0.05))
+
+# ER_LOCK_WAIT_TIMEOUT and ER_LOCK_DEADLOCK.
+RETRYABLE_MYSQL_ERRORS = {1205, 1213}
+
+T = TypeVar("T")
+
+
+def is_lock_conflict(error: OperationalError) -> bool:
+    """Whether the error is a lock timeout or deadlock worth retrying."""
+    args = getattr(error.orig, "args", ())
+    if args and args[0] in RETRYABLE_MYSQL_ERRORS:
+        return True
+    return "database is locked" in str(error.orig)
+
+
+async def run_with_retry(
+    db: AsyncSession,
+    operation: Callable[[], Awaitable[T]],
+    attempts: int = LOCK_RETRY_ATTEMPTS,
+    delay: float = LOCK_RETRY_DELAY,
+) -> T:
+    """
+    Run a transactional ``operation``, retrying it on lock conflicts.
+
+    The session is rolled back before every retry, so the operation must
+    start its transaction from scratch. Waits grow exponentially from
+    ``delay`` with full jitter, so competing writers do not retry in lockstep.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await operation()
+        except OperationalError as error:
+            await db.rollback()
+            if attempt == attempts or not is_lock_conflict(error):
+                raise
+
+            await asyncio.sleep(random.uniform(0, delay * 2 ** (attempt - 1)))
@@ -1,14 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from logging import Logger
 from configobj import ConfigObj
+from fastapi import FastAPI
 import uvicorn
 import database.models as models
-from database.database import engine
+from database.database import engine, replicas
+from database.migrations import apply_migrations
+from util.events import event_broker
 from util.logger import setup_logger
+from util.password_pool import password_pool
 from util.utils import create_app
 
-app = create_app()
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with engine.begin() as connection:
+        await connection.run_sync(models.Base.metadata.create_all)
+        await connection.run_sync(apply_migrations)
+
+    health_checks = None
+    if len(replicas):
+        health_checks = asyncio.create_task(replicas.run_health_checks())
+    event_listener = asyncio.create_task(event_broker.listen())
+
+    yield
+
+    for task in (health_checks, event_listener):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    await replicas.dispose()
+    await engine.dispose()
+    password_pool.shutdown()
+
+
+app = create_app(lifespan=lifespan)
 
 logger: Logger = setup_logger(__name__)
 if __name__ == "__main__":
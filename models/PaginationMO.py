@@ -0,0 +1,24 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class Page(BaseModel):
+    """
+    Envelope of list responses.
+
+    Offset pages fill ``page`` and the totals, keyset pages fill
+    ``next_cursor``; the routes leave the other keys out of the response.
+    """
+
+    page: Optional[int] = Field(None, description="Page number")
+    limit: int = Field(..., description="Number of items per page")
+    total_items: Optional[int] = Field(
+        None, description="Number of matching items, null when not counted"
+    )
+    total_pages: Optional[int] = Field(None, description="Number of pages")
+    total_exact: Optional[bool] = Field(
+        None, description="Whether total_items is an exact count"
+    )
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor of the next page, null on the last page"
+    )
@@ -1,5 +1,11 @@
-from datetime import datetime
-from pydantic import BaseModel, Field
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, field_validator
+
+from models.PaginationMO import Page
+from util.availability import naive
+
+MAX_OCCURRENCES = 366
 
 
 class ReservationRequest(BaseModel):
@@ -9,3 +15,105 @@ class ReservationRequest(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class Recurrence(BaseModel):
+    frequency: Literal["daily", "weekly"] = Field(
+        ..., description="Repeat the reservation every day or every week"
+    )
+    interval: int = Field(
+        1, ge=1, le=52, description="Number of days or weeks between occurrences"
+    )
+    count: Optional[int] = Field(
+        None, ge=1, le=MAX_OCCURRENCES, description="Number of occurrences"
+    )
+    until: Optional[datetime] = Field(
+        None, description="Last datetime an occurrence may start at"
+    )
+
+    @field_validator("until")
+    @classmethod
+    def drop_timezone(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return naive(value) if value is not None else value
+
+    @property
+    def step(self) -> timedelta:
+        days = 7 if self.frequency == "weekly" else 1
+        return timedelta(days=days * self.interval)
+
+
+class ReservationBatchRequest(BaseModel):
+    room_id: int = Field(..., gt=0, description="ID da sala a ser reservada")
+    start_time: datetime = Field(
+        ..., description="Hora de início da primeira ocorrência"
+    )
+    end_time: datetime = Field(
+        ..., description="Hora de conclusão da primeira ocorrência"
+    )
+    recurrence: Recurrence = Field(..., description="Regra de recorrência")
+    mode: Literal["all_or_nothing", "best_effort"] = Field(
+        "all_or_nothing",
+        description="Reject the whole batch on any conflict, or skip conflicting occurrences",
+    )
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def drop_timezone(cls, value: datetime) -> datetime:
+        return naive(value)
+
+    def occurrences(self) -> list[tuple[datetime, datetime]]:
+        """
+        Start and end of every occurrence.
+
+        Stops at ``count`` or ``until``, whichever comes first. Without a count
+        it stops one past MAX_OCCURRENCES so callers can reject long series.
+        """
+        step = self.recurrence.step
+        count = self.recurrence.count or MAX_OCCURRENCES + 1
+        until = self.recurrence.until
+
+        occurrences = []
+        for index in range(count):
+            start_time = self.start_time + step * index
+            if until is not None and start_time > until:
+                break
+            occurrences.append((start_time, self.end_time + step * index))
+
+        return occurrences
+
+
+class ReservationResponse(BaseModel):
+    """A reservation; lists return only the ``fields`` asked for."""
+
+    id: Optional[int] = None
+    room_id: Optional[int] = None
+    user_id: Optional[int] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ReservationsPage(Page):
+    reservations: list[ReservationResponse]
+
+
+class ConflictingReservation(BaseModel):
+    id: int
+    room_id: int
+    start_time: str
+    end_time: str
+
+
+class ReservationConflict(BaseModel):
+    start_time: str = Field(..., description="Start of the rejected occurrence")
+    end_time: str = Field(..., description="End of the rejected occurrence")
+    conflicting_reservation: ConflictingReservation
+
+
+class ReservationBatchResponse(BaseModel):
+    mode: Literal["all_or_nothing", "best_effort"]
+    created: list[ReservationResponse]
+    conflicts: list[ReservationConflict]
@@ -1,5 +1,9 @@
+from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel, Field
 
+from models.PaginationMO import Page
+
 
 class RoomsPostRequest(BaseModel):
     name: str = Field(..., min_length=3, max_length=255, description="Nome da sala")
@@ -12,3 +16,86 @@ class RoomsPostRequest(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TimeWindow(BaseModel):
+    start: datetime = Field(..., description="Start datetime of the window")
+    end: datetime = Field(..., description="End datetime of the window")
+
+
+class RoomsAvailabilityBatchRequest(BaseModel):
+    room_ids: Optional[list[int]] = Field(
+        None, max_length=500, description="Rooms to check"
+    )
+    location: Optional[str] = Field(
+        None, description="Check rooms whose location contains this text"
+    )
+    min_capacity: Optional[int] = Field(
+        None, gt=0, description="Check rooms with at least this capacity"
+    )
+    windows: list[TimeWindow] = Field(
+        ..., min_length=1, max_length=50, description="Time windows to check"
+    )
+
+
+class RoomResponse(BaseModel):
+    """A room; lists return only the ``fields`` asked for."""
+
+    id: Optional[int] = None
+    name: Optional[str] = None
+    location: Optional[str] = None
+    capacity: Optional[int] = None
+    creator_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RoomsPage(Page):
+    rooms: list[RoomResponse]
+
+
+class RoomSearchResult(BaseModel):
+    score: float = Field(..., description="Share of the query trigrams found")
+    room: RoomResponse
+
+
+class RoomsSearchResponse(BaseModel):
+    query: str
+    fuzzy: bool
+    results: list[RoomSearchResult]
+
+
+class RoomAvailabilityResponse(BaseModel):
+    room_id: int
+    availability: bool
+
+
+class RoomWindowsAvailability(BaseModel):
+    room_id: int
+    availability: list[bool] = Field(
+        ..., description="Availability of the room in each requested window"
+    )
+
+
+class RoomsAvailabilityBatchResponse(BaseModel):
+    rooms: list[RoomWindowsAvailability]
+    available_room_ids: list[int] = Field(
+        ..., description="Rooms free in every requested window"
+    )
+    not_found: list[int] = Field(..., description="Requested rooms that do not exist")
+
+
+class FreeSlot(BaseModel):
+    room_id: int
+    start: datetime
+    end: datetime
+    free_until: datetime = Field(
+        ..., description="End of the free gap holding the slot"
+    )
+
+
+class FreeSlotsResponse(BaseModel):
+    duration: int
+    slots: list[FreeSlot]
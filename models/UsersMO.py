@@ -1,6 +1,9 @@
+from typing import Optional
 from pydantic import BaseModel, EmailStr, Field
 from passlib.context import CryptContext
 
+from models.PaginationMO import Page
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
@@ -23,3 +26,26 @@ class UserRequest(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class UserResponse(BaseModel):
+    """A user; lists return only the ``fields`` asked for."""
+
+    id: Optional[int] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+
+
+class UsersPage(Page):
+    users: list[UserResponse]
+
+
+class UserSearchResult(BaseModel):
+    score: float = Field(..., description="Share of the query trigrams found")
+    user: UserResponse
+
+
+class UsersSearchResponse(BaseModel):
+    query: str
+    fuzzy: bool
+    results: list[UserSearchResult]
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from database.database import POOL_SETTINGS, engine
+from database.pool import pool_status
+from util.metrics import registry
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@metrics_router.get("/metrics/pool")
+async def connection_pool():
+    return {"settings": POOL_SETTINGS, **pool_status(engine)}
@@ -1,23 +1,57 @@
 from datetime import date, datetime, timedelta
 import logging
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Query
-from sqlalchemy import Date, cast
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import ColumnElement, delete, insert, select
 from starlette import status
-from database.database import db_dependency
-from database.models import Reservations, Rooms, Users
-from models.ReservationsMO import ReservationRequest
+from database.database import (
+    db_dependency,
+    read_db_dependency,
+    read_sessions_dependency,
+)
+from database.models import Reservations
+from database.queries import on_date
+from database.transactions import run_with_retry
+from models.ReservationsMO import (
+    MAX_OCCURRENCES,
+    ReservationBatchRequest,
+    ReservationBatchResponse,
+    ReservationRequest,
+    ReservationResponse,
+    ReservationsPage,
+)
 from util.constants import ws_responses
 from util.logger import setup_logger
-from util.auth import current_user_dependency
+from util.auth import Principal, current_user_dependency
+from util.availability import bump_room_version, lock_room, room_index, room_intervals
+from util.events import publish_reservations
+from util.export import ExportFormat, media_types, stream_rows
+from util.response_cache import response_cache
+from util.pagination import (
+    Fieldset,
+    Keyset,
+    TotalMode,
+    count_items,
+    keyset_page,
+    total_pages,
+)
 
 reservations_router = APIRouter(prefix="/reservations")
 logger: logging.Logger = setup_logger(__name__)
 
+reservations_keyset = Keyset(Reservations.start_time, Reservations.id)
+reservations_fields = Fieldset(
+    Reservations.id,
+    Reservations.room_id,
+    Reservations.user_id,
+    Reservations.start_time,
+    Reservations.end_time,
+    Reservations.created_at,
+)
 
-@reservations_router.get("", responses=ws_responses["reservations_get"])
-async def list_reservations(
-    db: db_dependency,
+
+def reservation_filters(
     id: Optional[int] = Query(None, description="Filter by reservation ID"),
     room_id: Optional[int] = Query(None, description="Filter by room ID"),
     user_id: Optional[int] = Query(None, description="Filter by user id"),
@@ -27,44 +61,128 @@ async def list_reservations(
     created_at: Optional[date] = Query(
         None, description="Filter by reservations created on a specific date"
     ),
-    page: int = Query(1, ge=1, description="Page number for pagination"),
-    limit: int = Query(10, ge=1, le=100, description="Number of items per page"),
-):
-    query = db.query(Reservations)
-
+) -> list[ColumnElement[bool]]:
+    """The filters shared by the reservation list and the export."""
+    filters = []
     if id:
-        query = query.filter(Reservations.id == id)
+        filters.append(Reservations.id == id)
     if room_id:
-        query = query.filter(Reservations.room_id == room_id)
+        filters.append(Reservations.room_id == room_id)
     if user_id:
-        query = query.filter(Reservations.user_id == user_id)
+        filters.append(Reservations.user_id == user_id)
     if date:
-        query = query.filter(cast(Reservations.start_time, Date) == date)
+        filters.append(on_date(Reservations.start_time, date))
     if created_at:
-        query = query.filter(cast(Reservations.created_at, Date) == created_at)
+        filters.append(on_date(Reservations.created_at, created_at))
+
+    return filters
+
 
-    total_items = query.count()
-    reservations = query.offset((page - 1) * limit).limit(limit).all()
+filters_dependency = Annotated[list[ColumnElement[bool]], Depends(reservation_filters)]
+
+
+@reservations_router.get(
+    "",
+    response_model=ReservationsPage,
+    response_model_exclude_unset=True,
+    responses=ws_responses["reservations_get"],
+)
+async def list_reservations(
+    db: read_db_dependency,
+    filters: filters_dependency,
+    page: int = Query(1, ge=1, description="Page number for pagination"),
+    limit: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from a previous next_cursor. Send it empty to start keyset pagination, which replaces page.",
+    ),
+    include_total: bool = Query(
+        True, description="Set to false to skip counting total_items"
+    ),
+    total_mode: TotalMode = Query(
+        "exact",
+        description="How total_items is computed: exact, cached for a few seconds or estimated from table statistics",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, such as id,name. Defaults to all of them",
+    ),
+):
+    names = reservations_fields.parse(fields)
+    query = reservations_fields.select(names, reservations_keyset)
+
+    query = query.where(*filters)
+
+    if cursor is not None:
+        rows, next_cursor = await keyset_page(
+            db, query, reservations_keyset, cursor, limit
+        )
+        return {
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "reservations": reservations_fields.items(rows, names),
+        }
+
+    total_items, total_exact = await count_items(db, query, include_total, total_mode)
+    rows = (
+        await db.execute(
+            reservations_keyset.order(query).offset((page - 1) * limit).limit(limit)
+        )
+    ).all()
 
     return {
         "page": page,
         "limit": limit,
         "total_items": total_items,
-        "total_pages": (total_items + limit - 1) // limit,
-        "reservations": reservations,
+        "total_pages": total_pages(total_items, limit),
+        "total_exact": total_exact,
+        "reservations": reservations_fields.items(rows, names),
     }
 
 
+@reservations_router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses=ws_responses["reservations_get_export"],
+)
+async def export_reservations(
+    sessions: read_sessions_dependency,
+    filters: filters_dependency,
+    format: ExportFormat = Query(
+        "ndjson", description="ndjson for one JSON object per line, or csv"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to export, such as id,start_time. Defaults to all of them",
+    ),
+):
+    names = reservations_fields.parse(fields)
+    query = reservations_keyset.order(
+        select(*(reservations_fields.columns[name] for name in names)).where(*filters)
+    )
+
+    logger.info(f"Exporting reservations as {format} with fields {', '.join(names)}.")
+
+    return StreamingResponse(
+        stream_rows(sessions, query, names, format),
+        media_type=media_types[format],
+        headers={
+            "content-disposition": f'attachment; filename="reservations.{format}"'
+        },
+    )
+
+
 @reservations_router.post(
-    "", status_code=status.HTTP_201_CREATED, responses=ws_responses["reservations_post"]
+    "",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ReservationResponse,
+    responses=ws_responses["reservations_post"],
 )
 async def create_reservations(
     db: db_dependency,
     reservation_request: ReservationRequest,
-    current_user: Users = current_user_dependency,
+    current_user: Principal = current_user_dependency,
 ):
-    authenticated_user = db.query(Users).filter(Users.name == current_user).first()
-
     if reservation_request.start_time < datetime.now():
         logger.info("Start time is before current time. Bad request exception raised.")
         raise HTTPException(
@@ -90,55 +208,68 @@ async def create_reservations(
             detail="The start time must be earlier than the end time.",
         )
 
-    room_exists = (
-        db.query(Rooms).filter(Rooms.id == reservation_request.room_id).first()
-    )
-    if room_exists is None:
-        logger.info(
-            f"Room with id {reservation_request.room_id} does not exist. Not found exception raised."
+    async def reserve() -> tuple[Reservations, int]:
+        room_version: Optional[int] = await lock_room(db, reservation_request.room_id)
+        if room_version is None:
+            logger.info(
+                f"Room with id {reservation_request.room_id} does not exist. Not found exception raised."
+            )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Room with ID {reservation_request.room_id} does not exist.",
+            )
+
+        intervals = await room_intervals(
+            db, reservation_request.room_id, room_version, lock=True
         )
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Room with ID {reservation_request.room_id} does not exist.",
+        conflicting_reservation = intervals.first_overlap(
+            reservation_request.start_time, reservation_request.end_time
         )
 
-    conflicting_reservation: Optional[Reservations] = (
-        db.query(Reservations)
-        .filter(
-            Reservations.room_id == reservation_request.room_id,
-            (Reservations.start_time < reservation_request.end_time)
-            & (Reservations.end_time > reservation_request.start_time),
-        )
-        .first()
-    )
+        if conflicting_reservation:
+            conflicting_id, conflicting_start, conflicting_end = conflicting_reservation
+            conflicting_reservation_data = {
+                "id": conflicting_id,
+                "room_id": reservation_request.room_id,
+                "start_time": conflicting_start.strftime("%Y-%m-%d %H:%M:%S"),
+                "end_time": conflicting_end.strftime("%Y-%m-%d %H:%M:%S"),
+            }
 
-    if conflicting_reservation:
-        conflicting_reservation_data = {
-            "id": conflicting_reservation.id,
-            "room_id": conflicting_reservation.room_id,
-            "start_time": conflicting_reservation.start_time.strftime(
-                "%Y-%m-%d %H:%M:%S"
-            ),
-            "end_time": conflicting_reservation.end_time.strftime("%Y-%m-%d %H:%M:%S"),
-        }
+            logger.info(
+                f"Reservation conflicts between {reservation_request.start_time} and {reservation_request.end_time} with reservation id {conflicting_id}."
+            )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "The requested reservation conflicts with an existing reservation.",
+                    "conflicting_reservation": conflicting_reservation_data,
+                },
+            )
 
-        logger.info(
-            f"Reservation conflicts between {reservation_request.start_time} and {reservation_request.end_time} with reservation id {conflicting_reservation.id}."
-        )
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={
-                "message": "The requested reservation conflicts with an existing reservation.",
-                "conflicting_reservation": conflicting_reservation_data,
-            },
+        reservation_dict = reservation_request.model_dump()
+
+        reservation_model = Reservations(**reservation_dict, user_id=current_user.id)
+        db.add(reservation_model)
+        await db.flush()
+        room_version = await bump_room_version(
+            db, reservation_model.room_id, room_version
         )
+        await db.commit()
+        await db.refresh(reservation_model)
 
-    reservation_dict = reservation_request.model_dump()
+        return reservation_model, room_version
 
-    reservation_model = Reservations(**reservation_dict, user_id=authenticated_user.id)
-    db.add(reservation_model)
-    db.commit()
-    db.refresh(reservation_model)
+    reservation_model, room_version = await run_with_retry(db, reserve)
+    await response_cache.bump("reservations")
+    await publish_reservations("created", [reservation_model])
+
+    room_index.add(
+        reservation_model.room_id,
+        room_version,
+        reservation_model.id,
+        reservation_model.start_time,
+        reservation_model.end_time,
+    )
 
     logger.info(f"Reservation {reservation_model.id} created successfully.")
 
@@ -152,29 +283,214 @@ async def create_reservations(
     }
 
 
+@reservations_router.post(
+    "/batch",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ReservationBatchResponse,
+    responses=ws_responses["reservations_post_batch"],
+)
+async def create_reservations_batch(
+    db: db_dependency,
+    batch_request: ReservationBatchRequest,
+    current_user: Principal = current_user_dependency,
+):
+    recurrence = batch_request.recurrence
+    duration = batch_request.end_time - batch_request.start_time
+
+    if batch_request.start_time < datetime.now() + timedelta(minutes=30):
+        logger.info(
+            "Start time is earlier than 30 minutes from now. Bad request exception raised."
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Reservations cannot be made in the past or within the next 30 minutes.",
+        )
+
+    if batch_request.start_time >= batch_request.end_time:
+        logger.info(
+            f"The start time {batch_request.start_time} is after the end time {batch_request.end_time}. Bad request exception raised."
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The start time must be earlier than the end time.",
+        )
+
+    if duration > recurrence.step:
+        logger.info(f"Occurrences of {duration} repeat every {recurrence.step}.")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Occurrences cannot be longer than the recurrence interval.",
+        )
+
+    if recurrence.count is None and recurrence.until is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The recurrence needs a count or an until date.",
+        )
+
+    occurrences = batch_request.occurrences()
+    if not occurrences:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The recurrence has no occurrences before its until date.",
+        )
+    if len(occurrences) > MAX_OCCURRENCES:
+        logger.info(f"Recurrence until {recurrence.until} is too long.")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A recurrence cannot have more than {MAX_OCCURRENCES} occurrences.",
+        )
+
+    room_id = batch_request.room_id
+
+    async def reserve() -> tuple[list[Reservations], list[dict], int]:
+        room_version: Optional[int] = await lock_room(db, room_id)
+        if room_version is None:
+            logger.info(
+                f"Room with id {room_id} does not exist. Not found exception raised."
+            )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Room with ID {room_id} does not exist.",
+            )
+
+        intervals = await room_intervals(db, room_id, room_version, lock=True)
+
+        accepted = []
+        conflicts = []
+        for start_time, end_time in occurrences:
+            conflicting_reservation = intervals.first_overlap(start_time, end_time)
+            if conflicting_reservation is None:
+                accepted.append((start_time, end_time))
+                continue
+
+            conflicting_id, conflicting_start, conflicting_end = conflicting_reservation
+            conflicts.append(
+                {
+                    "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "end_time": end_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "conflicting_reservation": {
+                        "id": conflicting_id,
+                        "room_id": room_id,
+                        "start_time": conflicting_start.strftime("%Y-%m-%d %H:%M:%S"),
+                        "end_time": conflicting_end.strftime("%Y-%m-%d %H:%M:%S"),
+                    },
+                }
+            )
+
+        if not accepted or (conflicts and batch_request.mode == "all_or_nothing"):
+            logger.info(
+                f"{len(conflicts)} of {len(occurrences)} occurrences conflict with existing reservations of room {room_id}."
+            )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "The requested reservations conflict with existing reservations.",
+                    "conflicts": conflicts,
+                },
+            )
+
+        await db.execute(
+            insert(Reservations).values(
+                [
+                    {
+                        "room_id": room_id,
+                        "user_id": current_user.id,
+                        "start_time": start_time,
+                        "end_time": end_time,
+                    }
+                    for start_time, end_time in accepted
+                ]
+            )
+        )
+        # The room lock is still held, so these starts match only the new rows.
+        reservations = (
+            await db.scalars(
+                select(Reservations)
+                .where(
+                    Reservations.room_id == room_id,
+                    Reservations.start_time.in_(
+                        [start_time for start_time, _ in accepted]
+                    ),
+                )
+                .order_by(Reservations.start_time)
+            )
+        ).all()
+        room_version = await bump_room_version(db, room_id, room_version)
+        await db.commit()
+
+        return reservations, conflicts, room_version
+
+    reservations, conflicts, room_version = await run_with_retry(db, reserve)
+    await response_cache.bump("reservations")
+    await publish_reservations("created", reservations)
+
+    room_index.add_many(
+        room_id,
+        room_version,
+        [
+            (reservation.id, reservation.start_time, reservation.end_time)
+            for reservation in reservations
+        ],
+    )
+
+    logger.info(
+        f"{len(reservations)} reservations of room {room_id} created successfully."
+    )
+
+    return {
+        "mode": batch_request.mode,
+        "created": [
+            {
+                "id": reservation.id,
+                "room_id": reservation.room_id,
+                "user_id": reservation.user_id,
+                "start_time": reservation.start_time,
+                "end_time": reservation.end_time,
+                "created_at": reservation.created_at,
+            }
+            for reservation in reservations
+        ],
+        "conflicts": conflicts,
+    }
+
+
 @reservations_router.delete(
     "/{id}",
     status_code=status.HTTP_204_NO_CONTENT,
     responses=ws_responses["reservations_delete"],
 )
 async def delete_reservation(
-    db: db_dependency, id: int, current_user: Users = current_user_dependency
+    db: db_dependency, id: int, current_user: Principal = current_user_dependency
 ):
-    authenticated_user = db.query(Users).filter(Users.name == current_user).first()
-    reservation_to_delete = db.query(Reservations).filter(Reservations.id == id).first()
+    reservation_to_delete = await db.scalar(
+        select(Reservations).where(Reservations.id == id)
+    )
 
     if reservation_to_delete:
-        if reservation_to_delete.user_id != authenticated_user.id:
+        if reservation_to_delete.user_id != current_user.id:
             logger.info(
-                f"User {authenticated_user.id} is not authorized to delete reservation {id}. Forbidden exception raised."
+                f"User {current_user.id} is not authorized to delete reservation {id}. Forbidden exception raised."
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to delete this reservation.",
             )
 
-        db.delete(reservation_to_delete)
-        db.commit()
+        room_id = reservation_to_delete.room_id
+
+        async def cancel() -> int:
+            room_version = await lock_room(db, room_id)
+            await db.execute(delete(Reservations).where(Reservations.id == id))
+            room_version = await bump_room_version(db, room_id, room_version)
+            await db.commit()
+
+            return room_version
+
+        room_version = await run_with_retry(db, cancel)
+        await response_cache.bump("reservations")
+        await publish_reservations("deleted", [reservation_to_delete])
+        room_index.remove(room_id, room_version, id)
 
         logger.info(f"Reservation {id} deleted.")
     else:
@@ -1,24 +1,102 @@
 from typing import Optional
 from fastapi import HTTPException, APIRouter, Query
-from sqlalchemy import Date, cast
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
-from database.database import db_dependency
-from database.models import Rooms, Reservations, Users
+from database.database import db_dependency, read_db_dependency
+from database.models import Rooms, Reservations
+from database.queries import on_date
 from starlette import status
-from datetime import date, datetime
-from util.auth import current_user_dependency
+from datetime import date, datetime, timedelta
+from util.auth import Principal, current_user_dependency
+from util.availability import earliest_free_slots, room_intervals, rooms_intervals
 from util.constants import ws_responses
+from util.events import EVENTS_HEARTBEAT, EVENTS_MAX_ROOMS, event_hub
+from util.pagination import (
+    Fieldset,
+    Keyset,
+    TotalMode,
+    count_items,
+    keyset_page,
+    total_pages,
+)
 
-from models.RoomsMO import RoomsPostRequest
+from models.ReservationsMO import ReservationsPage
+from models.RoomsMO import (
+    FreeSlotsResponse,
+    RoomAvailabilityResponse,
+    RoomResponse,
+    RoomsAvailabilityBatchRequest,
+    RoomsAvailabilityBatchResponse,
+    RoomsPage,
+    RoomsPostRequest,
+    RoomsSearchResponse,
+)
 from util.logger import setup_logger
+from util.response_cache import response_cache
+from util.search import room_search
 
 rooms_router = APIRouter(prefix="/rooms")
 logger: logging.Logger = setup_logger(__name__)
 
+MAX_BATCH_ROOMS = 500
+MAX_SEARCH_HORIZON = timedelta(days=90)
+
+rooms_keyset = Keyset(Rooms.id)
+room_reservations_keyset = Keyset(Reservations.start_time, Reservations.id)
+rooms_fields = Fieldset(
+    Rooms.id,
+    Rooms.name,
+    Rooms.location,
+    Rooms.capacity,
+    Rooms.creator_id,
+    Rooms.created_at,
+)
+room_reservations_fields = Fieldset(
+    Reservations.id,
+    Reservations.room_id,
+    Reservations.user_id,
+    Reservations.start_time,
+    Reservations.end_time,
+    Reservations.created_at,
+)
+
+# Tables each cached GET route reads, see ResponseCacheMiddleware.
+rooms_cached_routes = {
+    "/rooms": ("rooms",),
+    "/rooms/{id}/reservations": ("rooms", "reservations"),
+}
+
+
+async def matching_rooms_versions(db: AsyncSession, query: Select) -> dict[int, int]:
+    """
+    The reservations version of each room ``query`` selects, refusing more
+    than ``MAX_BATCH_ROOMS`` rooms instead of checking an arbitrary subset.
+    """
+    rows = await db.execute(query.order_by(Rooms.id).limit(MAX_BATCH_ROOMS + 1))
+    versions: dict[int, int] = dict(rows.tuples().all())
+
+    if len(versions) > MAX_BATCH_ROOMS:
+        logger.info(
+            f"The filters match more than {MAX_BATCH_ROOMS} rooms. Unprocessable entity exception raised."
+        )
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"The filters match more than {MAX_BATCH_ROOMS} rooms. Narrow them with location or min_capacity.",
+        )
+
+    return versions
 
-@rooms_router.get("", responses=ws_responses["rooms_get"])
+
+@rooms_router.get(
+    "",
+    response_model=RoomsPage,
+    response_model_exclude_unset=True,
+    responses=ws_responses["rooms_get"],
+)
 async def list_rooms(
-    db: db_dependency,
+    db: read_db_dependency,
     id: Optional[int] = Query(None, description="Filter by room ID"),
     name: Optional[str] = Query(None, description="Filter by room name"),
     location: Optional[str] = Query(None, description="Filter by room location"),
@@ -31,36 +109,130 @@ async def list_rooms(
     ),
     page: int = Query(1, ge=1, description="Page number for pagination"),
     limit: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from a previous next_cursor. Send it empty to start keyset pagination, which replaces page.",
+    ),
+    include_total: bool = Query(
+        True, description="Set to false to skip counting total_items"
+    ),
+    total_mode: TotalMode = Query(
+        "exact",
+        description="How total_items is computed: exact, cached for a few seconds or estimated from table statistics",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, such as id,name. Defaults to all of them",
+    ),
 ):
-    query = db.query(Rooms)
+    names = rooms_fields.parse(fields)
+    query = rooms_fields.select(names, rooms_keyset)
 
     if id:
-        query = query.filter(Rooms.id == id)
+        query = query.where(Rooms.id == id)
     if name:
-        query = query.filter(Rooms.name.ilike(f"%{name}%"))
+        query = query.where(Rooms.name.ilike(f"%{name}%"))
     if location:
-        query = query.filter(Rooms.location.ilike(f"%{location}%"))
+        query = query.where(Rooms.location.ilike(f"%{location}%"))
     if capacity:
-        query = query.filter(Rooms.capacity == capacity)
+        query = query.where(Rooms.capacity == capacity)
     if creator_id:
-        query = query.filter(Rooms.creator_id == creator_id)
+        query = query.where(Rooms.creator_id == creator_id)
     if created_at:
-        query = query.filter(cast(Rooms.created_at, Date) == created_at)
+        query = query.where(on_date(Rooms.created_at, created_at))
+
+    if cursor is not None:
+        rows, next_cursor = await keyset_page(db, query, rooms_keyset, cursor, limit)
+        return {
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "rooms": rooms_fields.items(rows, names),
+        }
 
-    total_items = query.count()
-    rooms = query.offset((page - 1) * limit).limit(limit).all()
+    total_items, total_exact = await count_items(db, query, include_total, total_mode)
+    rows = (
+        await db.execute(
+            rooms_keyset.order(query).offset((page - 1) * limit).limit(limit)
+        )
+    ).all()
 
     return {
         "page": page,
         "limit": limit,
         "total_items": total_items,
-        "total_pages": (total_items + limit - 1) // limit,
-        "rooms": rooms,
+        "total_pages": total_pages(total_items, limit),
+        "total_exact": total_exact,
+        "rooms": rooms_fields.items(rows, names),
     }
 
 
 @rooms_router.get(
-    "/{id}/availability", responses=ws_responses["rooms_get_availability"]
+    "/search",
+    response_model=RoomsSearchResponse,
+    responses=ws_responses["rooms_get_search"],
+)
+async def search_rooms(
+    db: read_db_dependency,
+    q: str = Query(
+        ..., min_length=1, max_length=100, description="Words of the name or location"
+    ),
+    fuzzy: bool = Query(False, description="Tolerate typos instead of prefixes"),
+    limit: int = Query(10, ge=1, le=50, description="Number of rooms to return"),
+):
+    await room_search.sync(db)
+    matches = room_search.search(q, limit, fuzzy)
+
+    rooms = {}
+    if matches:
+        rooms = {
+            room.id: room
+            for room in await db.scalars(
+                select(Rooms).where(Rooms.id.in_([id for id, _ in matches]))
+            )
+        }
+
+    return {
+        "query": q,
+        "fuzzy": fuzzy,
+        "results": [
+            {"score": score, "room": rooms[id]} for id, score in matches if id in rooms
+        ],
+    }
+
+
+@rooms_router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses=ws_responses["rooms_get_events"],
+)
+async def stream_room_events(
+    room_id: list[int] = Query(
+        ..., description="Rooms to follow. Repeat the parameter for each room"
+    ),
+):
+    room_ids = set(room_id)
+    if len(room_ids) > EVENTS_MAX_ROOMS:
+        logger.info(
+            f"Subscription to {len(room_ids)} rooms refused. Bad request exception raised."
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Follow at most {EVENTS_MAX_ROOMS} rooms per stream.",
+        )
+
+    logger.info(f"Streaming reservation events of rooms {sorted(room_ids)}.")
+
+    return StreamingResponse(
+        event_hub.stream(room_ids, EVENTS_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
+    )
+
+
+@rooms_router.get(
+    "/{id}/availability",
+    response_model=RoomAvailabilityResponse,
+    responses=ws_responses["rooms_get_availability"],
 )
 async def check_room_availability(
     db: db_dependency,
@@ -77,78 +249,225 @@ async def check_room_availability(
             detail="The start time must be earlier than the end time.",
         )
 
-    room = db.query(Rooms).filter(Rooms.id == id).first()
-    if not room:
+    intervals = await room_intervals(db, id)
+    if intervals is None:
         logger.info(f"No room with id {id} founded. Not found exception raised")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Room with id {id} not found"
         )
 
-    overlapping_reservation: Optional[Reservations] = (
-        db.query(Reservations)
-        .filter(
-            Reservations.room_id == id,
-            (Reservations.start_time < end) & (Reservations.end_time > start),
+    is_available: bool = intervals.first_overlap(start, end) is None
+
+    return {"room_id": id, "availability": is_available}
+
+
+@rooms_router.post(
+    "/availability:batch",
+    response_model=RoomsAvailabilityBatchResponse,
+    responses=ws_responses["rooms_post_availability_batch"],
+)
+async def check_rooms_availability_batch(
+    db: db_dependency, batch_request: RoomsAvailabilityBatchRequest
+):
+    for window in batch_request.windows:
+        if window.start >= window.end:
+            logger.info(
+                f"The start time {window.start} is after the end time {window.end}. Bad request exception raised."
+            )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The start time must be earlier than the end time.",
+            )
+
+    query = select(Rooms.id, Rooms.reservations_version)
+
+    if batch_request.room_ids is not None:
+        query = query.where(Rooms.id.in_(batch_request.room_ids))
+    if batch_request.location:
+        query = query.where(Rooms.location.ilike(f"%{batch_request.location}%"))
+    if batch_request.min_capacity:
+        query = query.where(Rooms.capacity >= batch_request.min_capacity)
+
+    versions = await matching_rooms_versions(db, query)
+    intervals_by_room = await rooms_intervals(db, versions)
+
+    rooms = []
+    available_room_ids = []
+    for room_id, intervals in sorted(intervals_by_room.items()):
+        availability = [
+            intervals.first_overlap(window.start, window.end) is None
+            for window in batch_request.windows
+        ]
+        rooms.append({"room_id": room_id, "availability": availability})
+        if all(availability):
+            available_room_ids.append(room_id)
+
+    # Requested rooms the filters left out exist, so only report the rest.
+    missing = set(batch_request.room_ids or []) - versions.keys()
+    if missing and (batch_request.location or batch_request.min_capacity):
+        existing = await db.scalars(select(Rooms.id).where(Rooms.id.in_(missing)))
+        missing -= set(existing)
+    not_found = sorted(missing)
+
+    return {
+        "rooms": rooms,
+        "available_room_ids": available_room_ids,
+        "not_found": not_found,
+    }
+
+
+@rooms_router.get(
+    "/free-slots",
+    response_model=FreeSlotsResponse,
+    responses=ws_responses["rooms_get_free_slots"],
+)
+async def find_free_slots(
+    db: db_dependency,
+    duration: int = Query(
+        ..., gt=0, le=1440, description="Length of the wanted slot in minutes"
+    ),
+    start: Optional[datetime] = Query(
+        None, description="Search from this datetime. Defaults to now"
+    ),
+    end: Optional[datetime] = Query(
+        None, description="Search until this datetime. Defaults to 7 days after start"
+    ),
+    location: Optional[str] = Query(None, description="Filter by room location"),
+    min_capacity: Optional[int] = Query(
+        None, gt=0, description="Filter by rooms with at least this capacity"
+    ),
+    limit: int = Query(10, ge=1, le=100, description="Number of slots to return"),
+):
+    start = start or datetime.now()
+    end = end or start + timedelta(days=7)
+
+    if start >= end:
+        logger.info(
+            f"The start time {start} is after the end time {end}. Bad request exception raised."
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The start time must be earlier than the end time.",
         )
-        .first()
-    )
 
-    is_available: bool = overlapping_reservation is None
+    if end - start > MAX_SEARCH_HORIZON:
+        logger.info(f"Search horizon from {start} to {end} is too long.")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The search horizon cannot exceed {MAX_SEARCH_HORIZON.days} days.",
+        )
 
-    return {"room_id": id, "availability": is_available}
+    query = select(Rooms.id, Rooms.reservations_version)
+
+    if location:
+        query = query.where(Rooms.location.ilike(f"%{location}%"))
+    if min_capacity:
+        query = query.where(Rooms.capacity >= min_capacity)
+
+    versions = await matching_rooms_versions(db, query)
+    intervals_by_room = await rooms_intervals(db, versions)
+
+    slots = earliest_free_slots(
+        intervals_by_room, start, end, timedelta(minutes=duration), limit
+    )
+
+    return {"duration": duration, "slots": slots}
 
 
 @rooms_router.get(
-    "/{id}/reservations", responses=ws_responses["rooms_get_reservations"]
+    "/{id}/reservations",
+    response_model=ReservationsPage,
+    response_model_exclude_unset=True,
+    responses=ws_responses["rooms_get_reservations"],
 )
 async def check_room_reservations(
-    db: db_dependency,
+    db: read_db_dependency,
     id: int,
     date: Optional[date] = None,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from a previous next_cursor. Send it empty to start keyset pagination, which replaces page.",
+    ),
+    include_total: bool = Query(
+        True, description="Set to false to skip counting total_items"
+    ),
+    total_mode: TotalMode = Query(
+        "exact",
+        description="How total_items is computed: exact, cached for a few seconds or estimated from table statistics",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, such as id,name. Defaults to all of them",
+    ),
 ):
-    room = db.query(Rooms).filter(Rooms.id == id).first()
-    if not room:
+    room_id = await db.scalar(select(Rooms.id).where(Rooms.id == id))
+    if room_id is None:
         logger.info(f"No room with id {id} founded. Not found exception raised")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Room with id '{id}' not found.",
         )
 
-    room_reservations_query = db.query(Reservations).filter(Reservations.room_id == id)
+    names = room_reservations_fields.parse(fields)
+    room_reservations_query = room_reservations_fields.select(
+        names, room_reservations_keyset
+    ).where(Reservations.room_id == id)
 
     if date is not None:
-        room_reservations_query = room_reservations_query.filter(
-            cast(Reservations.start_time, Date) == date
+        room_reservations_query = room_reservations_query.where(
+            on_date(Reservations.start_time, date)
+        )
+
+    if cursor is not None:
+        rows, next_cursor = await keyset_page(
+            db, room_reservations_query, room_reservations_keyset, cursor, limit
         )
+        return {
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "reservations": room_reservations_fields.items(rows, names),
+        }
 
-    total_items = room_reservations_query.count()
-    reservations = room_reservations_query.offset((page - 1) * limit).limit(limit).all()
+    total_items, total_exact = await count_items(
+        db, room_reservations_query, include_total, total_mode
+    )
+    rows = (
+        await db.execute(
+            room_reservations_keyset.order(room_reservations_query)
+            .offset((page - 1) * limit)
+            .limit(limit)
+        )
+    ).all()
 
     return {
         "page": page,
         "limit": limit,
         "total_items": total_items,
-        "total_pages": (total_items + limit - 1) // limit,
-        "reservations": reservations,
+        "total_pages": total_pages(total_items, limit),
+        "total_exact": total_exact,
+        "reservations": room_reservations_fields.items(rows, names),
     }
 
 
 @rooms_router.post(
-    "", status_code=status.HTTP_201_CREATED, responses=ws_responses["rooms_post"]
+    "",
+    status_code=status.HTTP_201_CREATED,
+    response_model=RoomResponse,
+    responses=ws_responses["rooms_post"],
 )
 async def create_room(
     db: db_dependency,
     room_request: RoomsPostRequest,
-    current_user: Users = current_user_dependency,
+    current_user: Principal = current_user_dependency,
 ):
-    authenticated_user = db.query(Users).filter(Users.name == current_user).first()
-
-    room_model = Rooms(**room_request.model_dump(), creator_id=authenticated_user.id)
+    room_model = Rooms(**room_request.model_dump(), creator_id=current_user.id)
     db.add(room_model)
-    db.commit()
-    db.refresh(room_model)
+    await db.commit()
+    await db.refresh(room_model)
+    await response_cache.bump("rooms")
+    room_search.add(room_model.id, room_model.name, room_model.location)
 
     logger.info(f"Room {room_model.id} was created successfully.")
 
@@ -1,53 +1,148 @@
 import logging
 from typing import Optional
 from fastapi import HTTPException, APIRouter, Query
+from sqlalchemy import select
 from starlette import status
 
 from database.models import Users
-from database.database import db_dependency
-from models.UsersMO import UserRequest, hash_password
+from database.database import db_dependency, read_db_dependency
+from models.UsersMO import (
+    UserRequest,
+    UserResponse,
+    UsersPage,
+    UsersSearchResponse,
+    hash_password,
+)
 from util.constants import ws_responses
 from util.logger import setup_logger
+from util.pagination import (
+    Fieldset,
+    Keyset,
+    TotalMode,
+    count_items,
+    keyset_page,
+    total_pages,
+)
+from util.password_pool import password_pool
+from util.search import user_search
 
 users_router = APIRouter(prefix="/users")
 
 logger: logging.Logger = setup_logger(__name__)
 
+users_keyset = Keyset(Users.id)
+users_fields = Fieldset(Users.id, Users.name, Users.email)
 
-@users_router.get("", responses=ws_responses["users_get"])
+
+@users_router.get(
+    "",
+    response_model=UsersPage,
+    response_model_exclude_unset=True,
+    responses=ws_responses["users_get"],
+)
 async def list_users(
-    db: db_dependency,
+    db: read_db_dependency,
     id: Optional[int] = Query(None, description="Filter by user ID"),
     name: Optional[str] = Query(None, description="Filter by user name"),
     email: Optional[str] = Query(None, description="Filter by user email"),
     page: int = Query(1, ge=1, description="Page number, starting from 1"),
-    limit: int = Query(10, le=100, description="Number of items per page, max 100"),
+    limit: int = Query(
+        10, ge=1, le=100, description="Number of items per page, max 100"
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from a previous next_cursor. Send it empty to start keyset pagination, which replaces page.",
+    ),
+    include_total: bool = Query(
+        True, description="Set to false to skip counting total_items"
+    ),
+    total_mode: TotalMode = Query(
+        "exact",
+        description="How total_items is computed: exact, cached for a few seconds or estimated from table statistics",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, such as id,name. Defaults to all of them",
+    ),
 ):
-    query = db.query(Users)
+    names = users_fields.parse(fields)
+    query = users_fields.select(names, users_keyset)
 
     if id:
-        query = query.filter(Users.id == id)
+        query = query.where(Users.id == id)
     if name:
-        query = query.filter(Users.name.ilike(f"%{name}%"))
+        query = query.where(Users.name.ilike(f"%{name}%"))
     if email:
-        query = query.filter(Users.email.ilike(f"%{email}%"))
-
-    total_items = query.count()
-    users = query.offset((page - 1) * limit).limit(limit).all()
+        query = query.where(Users.email.ilike(f"%{email}%"))
+
+    if cursor is not None:
+        rows, next_cursor = await keyset_page(db, query, users_keyset, cursor, limit)
+        return {
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "users": users_fields.items(rows, names),
+        }
+
+    total_items, total_exact = await count_items(db, query, include_total, total_mode)
+    rows = (
+        await db.execute(
+            users_keyset.order(query).offset((page - 1) * limit).limit(limit)
+        )
+    ).all()
 
     return {
         "page": page,
         "limit": limit,
         "total_items": total_items,
-        "total_pages": (total_items + limit - 1) // limit,
-        "users": users,
+        "total_pages": total_pages(total_items, limit),
+        "total_exact": total_exact,
+        "users": users_fields.items(rows, names),
+    }
+
+
+@users_router.get(
+    "/search",
+    response_model=UsersSearchResponse,
+    responses=ws_responses["users_get_search"],
+)
+async def search_users(
+    db: read_db_dependency,
+    q: str = Query(
+        ..., min_length=1, max_length=100, description="Words of the name or email"
+    ),
+    fuzzy: bool = Query(False, description="Tolerate typos instead of prefixes"),
+    limit: int = Query(10, ge=1, le=50, description="Number of users to return"),
+):
+    await user_search.sync(db)
+    matches = user_search.search(q, limit, fuzzy)
+
+    users = {}
+    if matches:
+        rows = await db.execute(
+            select(Users.id, Users.name, Users.email).where(
+                Users.id.in_([id for id, _ in matches])
+            )
+        )
+        users = {row.id: row._asdict() for row in rows}
+
+    return {
+        "query": q,
+        "fuzzy": fuzzy,
+        "results": [
+            {"score": score, "user": users[id]} for id, score in matches if id in users
+        ],
     }
 
 
-@users_router.post("", status_code=status.HTTP_201_CREATED, responses={})
+@users_router.post(
+    "",
+    status_code=status.HTTP_201_CREATED,
+    response_model=UserResponse,
+    responses={},
+)
 async def create_user(db: db_dependency, user_request: UserRequest):
-    user_exists: Optional[Users] = (
-        db.query(Users).filter(Users.name == user_request.name).first()
+    user_exists: Optional[Users] = await db.scalar(
+        select(Users).where(Users.name == user_request.name)
     )
 
     if user_exists:
@@ -59,8 +154,8 @@ async def create_user(db: db_dependency, user_request: UserRequest):
             detail=f"User with name '{user_request.name}' already exists.",
         )
 
-    email_exists: Optional[Users] = (
-        db.query(Users).filter(Users.email == user_request.email).first()
+    email_exists: Optional[Users] = await db.scalar(
+        select(Users).where(Users.email == user_request.email)
     )
 
     if email_exists:
@@ -72,14 +167,15 @@ async def create_user(db: db_dependency, user_request: UserRequest):
             detail=f"Email '{user_request.email}' is already registered for another user.",
         )
 
-    hashed_password = hash_password(user_request.password)
+    hashed_password = await password_pool.run(hash_password, user_request.password)
 
     user_model = Users(
         name=user_request.name, email=user_request.email, password=hashed_password
     )
     db.add(user_model)
-    db.commit()
-    db.refresh(user_model)
+    await db.commit()
+    await db.refresh(user_model)
+    user_search.add(user_model.id, user_model.name, user_model.email)
 
     logger.info(f"User {user_model.id} was created successfully.")
 
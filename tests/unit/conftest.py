@@ -0,0 +1,93 @@
+from collections import namedtuple
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database.database import get_db
+from database.migrations import apply_migrations
+from database.models import Base, Rooms, Users
+from util.auth import Principal, get_current_user
+from util.availability import room_index
+from util.pagination import Fieldset
+from util.response_cache import response_cache
+from util.utils import create_app
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+@pytest.fixture
+def as_rows():
+    """Turn model instances into the rows a list query selects for ``fieldset``."""
+
+    def as_rows(fieldset: Fieldset, items: list) -> list:
+        Row = namedtuple("Row", fieldset.columns)
+        return [
+            Row(*(getattr(item, name) for name in fieldset.columns)) for item in items
+        ]
+
+    return as_rows
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'reservations.db'}",
+        connect_args={"timeout": 30},
+    )
+
+    # SQLite ignores FOR UPDATE and pysqlite runs SELECTs outside a transaction.
+    # Taking the write lock when each transaction begins serializes writers
+    # like the room row lock does on MySQL. It does not model REPEATABLE READ
+    # snapshots, which room_intervals(lock=True) guards against.
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_implicit_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.run_sync(apply_migrations)
+
+    factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    async with factory() as db:
+        db.add(Users(id=1, name="tester", email="tester@test.com", password="x"))
+        db.add(Rooms(id=1, name="Room A", location="1st Floor", capacity=10))
+        await db.commit()
+
+    room_index.clear()
+    yield factory
+    room_index.clear()
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def app(session_factory):
+    """The app on ``session_factory``, authenticated as user 1 "tester"."""
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=1, name="tester")
+    yield app
+
+
+@pytest_asyncio.fixture
+async def api_client(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
@@ -0,0 +1,120 @@
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from util.auth import (
+    Principal,
+    create_access_token,
+    decode_token,
+    get_current_user,
+    principal_cache,
+    token_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    principal_cache.clear()
+    token_cache.clear()
+    yield
+    principal_cache.clear()
+    token_cache.clear()
+
+
+def mock_db(row=None) -> MagicMock:
+    db = MagicMock(spec=AsyncSession)
+    db.execute.return_value = MagicMock()
+    db.execute.return_value.first.return_value = row
+    return db
+
+
+def token(**claims) -> str:
+    return create_access_token(claims, expires_delta=timedelta(minutes=5))
+
+
+@pytest.mark.asyncio
+async def test_principal_is_cached_by_user_id():
+    db = mock_db(Principal(id=1, name="tester"))
+
+    first = await get_current_user(db, token(sub="tester", uid=1))
+    second = await get_current_user(db, token(sub="tester", uid=1))
+
+    assert first == second == Principal(id=1, name="tester")
+    assert db.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_token_without_user_id_is_resolved_by_name():
+    db = mock_db(Principal(id=1, name="tester"))
+
+    principal = await get_current_user(db, token(sub="tester"))
+
+    assert principal == Principal(id=1, name="tester")
+    assert "users.name" in str(db.execute.await_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_unknown_user_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        await get_current_user(mock_db(), token(sub="ghost", uid=7))
+
+    assert error.value.status_code == 401
+    assert len(principal_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        await get_current_user(mock_db(), "not-a-token")
+
+    assert error.value.status_code == 401
+
+
+def test_verified_token_is_decoded_once():
+    access_token = token(sub="tester", uid=1)
+
+    with patch("util.auth.jwt.decode", wraps=jwt.decode) as decode:
+        assert decode_token(access_token) == decode_token(access_token)
+
+    assert decode.call_count == 1
+
+
+@pytest.fixture
+def local_timezone(request, monkeypatch):
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize(
+    "local_timezone", ["UTC", "America/Sao_Paulo", "Asia/Tokyo"], indirect=True
+)
+def test_exp_is_independent_of_the_local_timezone(local_timezone):
+    claims = jwt.get_unverified_claims(token(sub="tester", uid=1))
+
+    assert abs(claims["exp"] - (time.time() + 300)) < 5
+
+
+def test_token_cache_entry_does_not_outlive_exp():
+    access_token = create_access_token(
+        {"sub": "tester", "uid": 1}, expires_delta=timedelta(seconds=60)
+    )
+    payload = decode_token(access_token)
+
+    expires_at, _ = next(iter(token_cache._entries.values()))
+    assert token_cache.ttl > 60
+    assert expires_at - time.monotonic() <= payload["exp"] - time.time() + 1
+
+
+def test_invalid_token_is_not_cached():
+    with pytest.raises(JWTError):
+        decode_token("not-a-token")
+
+    assert len(token_cache) == 0
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from util.availability import (
+    RoomIntervalIndex,
+    RoomIntervals,
+    earliest_free_slots,
+    room_index,
+    room_intervals,
+)
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return datetime(2025, 2, 10, hour, minute)
+
+
+@pytest.fixture
+def intervals() -> RoomIntervals:
+    return RoomIntervals(
+        version=3,
+        reservations=[(2, at(13), at(14)), (1, at(9), at(10)), (3, at(15), at(17))],
+    )
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        (at(8), at(9), None),
+        (at(10), at(13), None),
+        (at(17), at(18), None),
+        (at(9, 30), at(9, 45), 1),
+        (at(8), at(9, 1), 1),
+        (at(13, 59), at(14, 30), 2),
+        (at(16), at(20), 3),
+        (at(8), at(20), 3),
+    ],
+)
+def test_first_overlap(intervals: RoomIntervals, start, end, expected):
+    overlap = intervals.first_overlap(start, end)
+
+    assert (overlap[0] if overlap else None) == expected
+
+
+def test_first_overlap_with_nested_intervals():
+    intervals = RoomIntervals(0, [(1, at(8), at(18)), (2, at(9), at(10))])
+
+    assert intervals.first_overlap(at(12), at(13))[0] == 1
+
+
+def test_first_overlap_ignores_timezone(intervals: RoomIntervals):
+    start = at(9, 30).replace(tzinfo=timezone.utc)
+    end = at(9, 45).replace(tzinfo=timezone.utc)
+
+    assert intervals.first_overlap(start, end)[0] == 1
+
+
+def test_add_and_remove_keep_order(intervals: RoomIntervals):
+    intervals.add(4, at(11), at(12))
+    intervals.remove(2)
+
+    assert list(intervals.intervals()) == [
+        (1, at(9), at(10)),
+        (4, at(11), at(12)),
+        (3, at(15), at(17)),
+    ]
+    assert intervals.first_overlap(at(11, 30), at(13, 30))[0] == 4
+    assert intervals.first_overlap(at(13), at(14)) is None
+
+
+def test_index_rejects_stale_version():
+    index = RoomIntervalIndex()
+    index.load(1, 5, [])
+
+    assert index.get(1, 5) is not None
+    assert index.get(1, 6) is None
+    assert len(index) == 0
+
+
+def test_index_applies_local_changes_in_version_order():
+    index = RoomIntervalIndex()
+    index.load(1, 5, [])
+
+    index.add(1, 6, 10, at(9), at(10))
+    assert index.get(1, 6).first_overlap(at(9), at(10))[0] == 10
+
+    index.remove(1, 8, 10)
+    assert index.get(1, 8) is None
+
+
+def test_index_trusts_entries_for_version_ttl():
+    index = RoomIntervalIndex(version_ttl=1.0)
+
+    with patch("util.availability.time.monotonic", return_value=100.0):
+        index.load(1, 5, [])
+
+    with patch("util.availability.time.monotonic", return_value=100.5):
+        assert index.get(1) is not None
+
+    with patch("util.availability.time.monotonic", return_value=101.0):
+        assert index.get(1) is None
+
+
+def test_index_evicts_least_recently_used_room():
+    index = RoomIntervalIndex(max_rooms=2)
+    index.load(1, 0, [])
+    index.load(2, 0, [])
+    index.get(1, 0)
+
+    index.load(3, 0, [])
+
+    assert index.get(1, 0) is not None
+    assert index.get(2, 0) is None
+
+
+def test_free_gaps_sweeps_between_reservations(intervals: RoomIntervals):
+    gaps = list(intervals.free_gaps(at(9, 30), at(18), timedelta(hours=1)))
+
+    assert gaps == [(at(10), at(13)), (at(14), at(15)), (at(17), at(18))]
+
+
+def test_free_gaps_skips_gaps_shorter_than_duration(intervals: RoomIntervals):
+    gaps = list(intervals.free_gaps(at(8), at(20), timedelta(hours=2, minutes=30)))
+
+    assert gaps == [(at(10), at(13)), (at(17), at(20))]
+
+
+def test_free_gaps_with_nested_intervals():
+    intervals = RoomIntervals(0, [(1, at(8), at(18)), (2, at(9), at(10))])
+
+    gaps = list(intervals.free_gaps(at(7), at(19), timedelta(minutes=30)))
+
+    assert gaps == [(at(7), at(8)), (at(18), at(19))]
+
+
+def test_earliest_free_slots_merges_rooms_in_start_order(intervals: RoomIntervals):
+    busy_morning = RoomIntervals(0, [(9, at(8), at(12))])
+
+    slots = earliest_free_slots(
+        {1: intervals, 2: busy_morning}, at(8), at(20), timedelta(hours=1), limit=3
+    )
+
+    assert slots == [
+        {"room_id": 1, "start": at(8), "end": at(9), "free_until": at(9)},
+        {"room_id": 1, "start": at(10), "end": at(11), "free_until": at(13)},
+        {"room_id": 2, "start": at(12), "end": at(13), "free_until": at(20)},
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("lock", [False, True])
+async def test_reload_under_the_room_lock_is_a_locking_read(lock: bool):
+    db = MagicMock(spec=AsyncSession)
+    db.execute = AsyncMock(return_value=MagicMock())
+    room_index.clear()
+
+    await room_intervals(db, 1, version=3, lock=lock)
+
+    statement = str(db.execute.call_args.args[0].compile(dialect=mysql.dialect()))
+    assert statement.endswith("LOCK IN SHARE MODE") is lock
+    room_index.clear()
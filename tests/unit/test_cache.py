@@ -0,0 +1,37 @@
+from unittest.mock import patch
+
+from util.cache import TTLCache
+
+
+def test_get_returns_default_for_missing_key():
+    cache = TTLCache()
+
+    assert cache.get("missing") is None
+    assert cache.get("missing", 0) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(ttl=10)
+
+    with patch("util.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=60)
+
+    with patch("util.cache.time.monotonic", return_value=110.0):
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+    assert len(cache) == 1
@@ -0,0 +1,199 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from util import events
+from util.events import (
+    HEARTBEAT_EVENT,
+    OVERFLOW_EVENT,
+    EventHub,
+    LocalBroker,
+    broker,
+    event_hub,
+    publish_reservations,
+)
+from util.metrics import http_request_duration
+
+START = (datetime.now() + timedelta(days=1)).replace(
+    hour=9, minute=0, second=0, microsecond=0
+)
+
+
+class FailingBroker:
+    async def publish(self, room_id: int, event: bytes):
+        raise ConnectionError("broker is down")
+
+    async def listen(self):
+        return
+
+
+class EventStream:
+    """
+    An SSE client driving the ASGI app directly, since httpx's ASGI
+    transport only returns a response once its body has ended.
+    """
+
+    def __init__(self, app, room_ids: list[int]):
+        self.app = app
+        self.query_string = "&".join(f"room_id={id}" for id in room_ids).encode()
+        self.chunks: asyncio.Queue[bytes] = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.task = None
+
+    async def __aenter__(self) -> "EventStream":
+        request = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive() -> dict:
+            if request:
+                return request.pop()
+            await self.disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict):
+            if message["type"] == "http.response.body" and message.get("body"):
+                await self.chunks.put(message["body"])
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/rooms/events",
+            "raw_path": b"/rooms/events",
+            "root_path": "",
+            "query_string": self.query_string,
+            "headers": [],
+            "client": ("test", 1),
+            "server": ("test", 80),
+        }
+        self.task = asyncio.create_task(self.app(scope, receive, send))
+        assert await self.next() == HEARTBEAT_EVENT
+        return self
+
+    async def next(self) -> bytes:
+        return await asyncio.wait_for(self.chunks.get(), 5)
+
+    async def event(self) -> tuple[str, dict]:
+        lines = (await self.next()).decode().splitlines()
+        return lines[0].removeprefix("event: "), json.loads(lines[1][len("data: ") :])
+
+    async def __aexit__(self, *exc_info):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+def test_events_go_only_to_subscribers_of_the_room():
+    hub = EventHub()
+    first = hub.subscribe([1, 2])
+    second = hub.subscribe([2])
+
+    hub.dispatch(1, b"one")
+    hub.dispatch(2, b"two")
+    hub.dispatch(3, b"three")
+
+    assert [first.queue.get_nowait() for _ in range(2)] == [b"one", b"two"]
+    assert second.queue.get_nowait() == b"two"
+    assert second.queue.empty()
+
+    hub.unsubscribe(first)
+    hub.unsubscribe(second)
+    assert hub.rooms == {}
+    assert hub.subscriptions == 0
+
+
+@pytest.mark.asyncio
+async def test_a_full_queue_ends_only_that_stream():
+    hub = EventHub(queue_size=2)
+    slow = hub.stream([1], heartbeat=60)
+    assert await anext(slow) == HEARTBEAT_EVENT
+    other = hub.subscribe([1])
+
+    for number in range(3):
+        hub.dispatch(1, b"%d" % number)
+        other.queue.get_nowait()
+
+    assert [chunk async for chunk in slow] == [OVERFLOW_EVENT]
+    assert hub.overflowed == 1
+    assert hub.rooms == {1: {other}}
+
+
+@pytest.mark.asyncio
+async def test_idle_streams_send_heartbeats():
+    hub = EventHub()
+    stream = hub.stream([1], heartbeat=0.01)
+
+    assert [await anext(stream) for _ in range(3)] == [HEARTBEAT_EVENT] * 3
+    await stream.aclose()
+    assert hub.subscriptions == 0
+
+
+def test_broker_is_chosen_from_config():
+    hub = EventHub()
+    assert isinstance(broker({}, hub), LocalBroker)
+
+    with pytest.raises(ValueError):
+        broker({"BROKER": "kafka"}, hub)
+
+
+@pytest.mark.asyncio
+async def test_broker_errors_do_not_fail_the_change(monkeypatch):
+    monkeypatch.setattr(events, "event_broker", FailingBroker())
+    reservation = type(
+        "Reservation",
+        (),
+        {"id": 1, "room_id": 1, "user_id": 1, "start_time": START, "end_time": START},
+    )
+
+    await publish_reservations("created", [reservation])
+
+
+@pytest.mark.asyncio
+async def test_stream_receives_created_and_deleted_reservations(app, api_client):
+    async with EventStream(app, [1]) as stream:
+        response = await api_client.post(
+            "/reservations",
+            json={
+                "room_id": 1,
+                "start_time": START.isoformat(),
+                "end_time": (START + timedelta(hours=1)).isoformat(),
+            },
+        )
+        assert response.status_code == 201
+        id = response.json()["id"]
+
+        expected = {
+            "id": id,
+            "room_id": 1,
+            "user_id": 1,
+            "start_time": START.isoformat(),
+            "end_time": (START + timedelta(hours=1)).isoformat(),
+        }
+        assert await stream.event() == ("reservation.created", expected)
+
+        assert (await api_client.delete(f"/reservations/{id}")).status_code == 204
+        assert await stream.event() == ("reservation.deleted", expected)
+
+    assert event_hub.subscriptions == 0
+
+
+@pytest.mark.asyncio
+async def test_streams_stay_out_of_the_request_latency_histogram(app):
+    before = http_request_duration.count("GET", "/rooms/events", "200")
+
+    async with EventStream(app, [1]):
+        pass
+
+    assert http_request_duration.count("GET", "/rooms/events", "200") == before
+
+
+@pytest.mark.asyncio
+async def test_stream_refuses_too_many_rooms(api_client):
+    response = await api_client.get(
+        "/rooms/events",
+        params={"room_id": list(range(events.EVENTS_MAX_ROOMS + 1))},
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import tracemalloc
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+from database.database import get_read_sessions
+from database.models import Reservations, Rooms
+
+# Enough rows that buffering them would take tens of MB instead of one batch.
+EXPORT_ROWS = 100_000
+
+
+@pytest_asyncio.fixture
+async def app(app, session_factory):
+    async with session_factory() as db:
+        db.add(Rooms(id=2, name="Room B", location="2nd Floor", capacity=4))
+        db.add_all(
+            Reservations(
+                id=id,
+                room_id=room_id,
+                user_id=1,
+                start_time=datetime(2025, 3, day, 10),
+                end_time=datetime(2025, 3, day, 11),
+                created_at=datetime(2025, 2, 1, 9),
+            )
+            for id, room_id, day in [(1, 1, 12), (2, 2, 11), (3, 1, 10)]
+        )
+        await db.commit()
+
+    app.dependency_overrides[get_read_sessions] = lambda: session_factory
+    yield app
+
+
+async def stream_export(app, query_string: bytes) -> tuple[int, int]:
+    """
+    Run the export through the ASGI app with a client that drops each chunk,
+    since httpx's ASGI transport buffers the whole body. Returns the number
+    of lines and the peak traced memory of the request.
+    """
+    request = [{"type": "http.request", "body": b"", "more_body": False}]
+    lines = 0
+
+    async def receive() -> dict:
+        if request:
+            return request.pop()
+        await asyncio.Event().wait()
+
+    async def send(message: dict):
+        nonlocal lines
+        if message["type"] == "http.response.body":
+            lines += message.get("body", b"").count(b"\n")
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/reservations/export",
+        "raw_path": b"/reservations/export",
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+
+    tracemalloc.start()
+    try:
+        await app(scope, receive, send)
+        return lines, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_streams_filtered_rows_in_start_order(api_client):
+    response = await api_client.get("/reservations/export", params={"room_id": 1})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {
+            "id": id,
+            "room_id": 1,
+            "user_id": 1,
+            "start_time": f"2025-03-{day}T10:00:00",
+            "end_time": f"2025-03-{day}T11:00:00",
+            "created_at": "2025-02-01T09:00:00",
+        }
+        for id, day in [(3, 10), (1, 12)]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_csv_export_writes_a_header_and_the_requested_fields(api_client):
+    response = await api_client.get(
+        "/reservations/export", params={"format": "csv", "fields": "id,start_time"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text == (
+        "id,start_time\n"
+        "3,2025-03-10T10:00:00\n"
+        "2,2025-03-11T10:00:00\n"
+        "1,2025-03-12T10:00:00\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_rejects_unknown_fields(api_client):
+    response = await api_client.get(
+        "/reservations/export", params={"fields": "password"}
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+async def test_export_memory_stays_flat(app, session_factory, format):
+    async with session_factory() as db:
+        await db.execute(
+            text("""
+                INSERT INTO reservations
+                    (room_id, user_id, start_time, end_time, created_at)
+                WITH RECURSIVE seq(n) AS (
+                    SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows - 1
+                )
+                SELECT
+                    n % 2 + 1,
+                    1,
+                    datetime('2025-04-01', '+' || n || ' minutes'),
+                    datetime('2025-04-01', '+' || (n + 1) || ' minutes'),
+                    '2025-02-01 09:00:00'
+                FROM seq
+                """),
+            {"rows": EXPORT_ROWS},
+        )
+        await db.commit()
+
+    lines, peak = await stream_export(app, f"format={format}".encode())
+
+    assert lines == EXPORT_ROWS + 3 + (format == "csv")
+    assert peak < 8 * 1024 * 1024
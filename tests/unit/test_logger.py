@@ -0,0 +1,59 @@
+import logging
+import queue
+
+from util.logger import DroppingQueueHandler, LogPipeline, setup_logger
+
+
+def record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+
+def test_full_queue_drops_new_records_without_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+
+    for i in range(5):
+        handler.handle(record(f"message {i}"))
+
+    assert handler.dropped == 3
+    assert [handler.queue.get_nowait().msg for _ in range(2)] == [
+        "message 0",
+        "message 1",
+    ]
+
+
+def test_drop_oldest_keeps_the_latest_records():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2), drop_policy="drop_oldest")
+
+    for i in range(5):
+        handler.handle(record(f"message {i}"))
+
+    assert handler.dropped == 3
+    assert [handler.queue.get_nowait().msg for _ in range(2)] == [
+        "message 3",
+        "message 4",
+    ]
+
+
+def test_pipeline_writes_from_the_listener_thread(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pipeline = LogPipeline("test.log", 1024 * 1024, 1, 100, "drop_new")
+    logger = logging.getLogger("test_pipeline")
+    logger.propagate = False
+    logger.addHandler(pipeline.handler)
+
+    try:
+        logger.warning("written by the listener")
+    finally:
+        logger.removeHandler(pipeline.handler)
+        pipeline.stop()
+
+    assert "written by the listener" in (tmp_path / "logs" / "test.log").read_text()
+    assert pipeline.stats() == {"queue_depth": 0, "queue_size": 100, "dropped": 0}
+
+
+def test_setup_logger_attaches_the_shared_handler_once():
+    logger = setup_logger("test_setup_logger")
+    setup_logger("test_setup_logger")
+
+    assert len(logger.handlers) == 1
+    assert isinstance(logger.handlers[0], DroppingQueueHandler)
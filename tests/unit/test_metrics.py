@@ -0,0 +1,239 @@
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database import pool
+from database.instrumentation import (
+    db_query_duration,
+    db_repeated_statements,
+    instrument_engine,
+    redact_parameters,
+    statement_operation,
+)
+from database.pool import (
+    TimedAsyncAdaptedQueuePool,
+    db_pool_checkout_wait,
+    ping_after_idle,
+    pool_options,
+    pool_settings,
+    pool_status,
+    register_pool_gauges,
+)
+from util.metrics import Histogram, Registry, http_request_duration, registry
+from util.middlewares import MetricsMiddleware, QueryInspectorMiddleware
+from util.utils import create_app
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(
+        Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    )
+
+    for value in (0.05, 0.5, 0.7, 5):
+        histogram.observe(value, "/rooms")
+
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/rooms",le="0.1"} 1',
+        'latency_seconds_bucket{route="/rooms",le="1.0"} 3',
+        'latency_seconds_bucket{route="/rooms",le="+Inf"} 4',
+        'latency_seconds_sum{route="/rooms"} 6.25',
+        'latency_seconds_count{route="/rooms"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("hits_total", "Hits.", ("path",)).inc('a"b\\c')
+
+    assert 'hits_total{path="a\\"b\\\\c"} 1' in registry.render()
+
+
+def test_middleware_labels_requests_with_the_route_template():
+    app = FastAPI()
+
+    @app.get("/things/{id}")
+    async def thing(id: int):
+        return {"id": id}
+
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+    before = http_request_duration.count("GET", "/things/{id}", "200")
+
+    client.get("/things/1")
+    client.get("/things/2")
+    client.get("/missing")
+
+    assert http_request_duration.count("GET", "/things/{id}", "200") == before + 2
+    assert http_request_duration.count("GET", "unmatched", "404") >= 1
+
+
+def test_metrics_endpoint_uses_the_prometheus_text_format():
+    response = TestClient(create_app()).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert "password_pool_jobs" in response.text
+
+
+def test_statement_operation_is_bounded():
+    assert statement_operation("  select 1") == "SELECT"
+    assert statement_operation("PRAGMA table_info(rooms)") == "OTHER"
+
+
+@pytest.mark.asyncio
+async def test_instrumented_engine_counts_queries():
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine)
+    before = db_query_duration.count("SELECT")
+
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+        await connection.execute(text("SELECT 2"))
+
+    await engine.dispose()
+
+    assert db_query_duration.count("SELECT") == before + 2
+
+
+@pytest.mark.asyncio
+async def test_timed_pool_records_checkout_wait_per_pool(tmp_path):
+    pytest.importorskip("aiosqlite")
+    engines = {
+        name: create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            **pool_options(pool_settings({"PRE_PING": "never"}), name),
+        )
+        for name in ("test-primary", "test-replica")
+    }
+    before = {name: db_pool_checkout_wait.count(name) for name in engines}
+
+    for checkouts, engine in zip((3, 1), engines.values()):
+        for _ in range(checkouts):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+
+    assert (
+        pool_status(engines["test-primary"])["checkouts"] == before["test-primary"] + 3
+    )
+    assert db_pool_checkout_wait.count("test-replica") == before["test-replica"] + 1
+
+    for engine in engines.values():
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_gauges_report_every_registered_pool(tmp_path, monkeypatch):
+    pytest.importorskip("aiosqlite")
+    monkeypatch.setattr(pool, "gauged_pools", {})
+    settings = pool_settings({"POOL_SIZE": 3, "PRE_PING": "never"})
+    engines = [
+        create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            **pool_options(settings, name),
+        )
+        for name in ("test-primary", "test-replica")
+    ]
+    for engine in engines:
+        register_pool_gauges(engine, settings)
+
+    async with engines[1].connect() as connection:
+        await connection.execute(text("SELECT 1"))
+        metrics = registry.render().splitlines()
+
+    assert 'db_pool_connections{pool="test-primary",state="checked_out"} 0' in metrics
+    assert 'db_pool_connections{pool="test-replica",state="checked_out"} 1' in metrics
+    assert 'db_pool_limit{pool="test-replica",limit="size"} 3' in metrics
+
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_query_inspector_flags_repeated_and_slow_statements():
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine)
+    app = FastAPI()
+
+    @app.get("/rooms/{id}/creators")
+    async def creators(id: int):
+        async with engine.connect() as connection:
+            for user_id in range(6):
+                await connection.execute(text("SELECT :id"), {"id": user_id})
+        return {}
+
+    app.add_middleware(
+        QueryInspectorMiddleware, slow_query_ms=0, repeat_threshold=5, header=True
+    )
+    before = db_repeated_statements._values.get(("/rooms/{id}/creators",), 0)
+
+    transport = httpx.ASGITransport(app=app)
+    with patch("util.middlewares.logger") as logger:
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            response = await c.get("/rooms/1/creators")
+
+    await engine.dispose()
+
+    stats = response.headers["x-query-stats"]
+    assert stats.startswith("count=6; ")
+    assert stats.endswith("; slow=6; repeated=1")
+    assert db_repeated_statements._values[("/rooms/{id}/creators",)] == before + 1
+
+    messages = [call.args[0] for call in logger.warning.call_args_list]
+    assert "Statement ran 6 times in GET /rooms/{id}/creators: SELECT ?." in messages
+    assert all(m.endswith("with ['int'].") for m in messages if m.startswith("Slow"))
+
+
+def test_redact_parameters_keeps_only_types():
+    assert redact_parameters((1, "secret")) == ["int", "str"]
+    assert redact_parameters([{"name": "secret"}]) == [{"name": "str"}]
+
+
+def test_pool_endpoint_reports_settings_and_usage():
+    response = TestClient(create_app()).get("/metrics/pool")
+
+    body = response.json()
+    assert body["settings"]["pre_ping"] in ("always", "idle", "never")
+    assert body["name"] == "primary"
+    assert body["size"] == body["settings"]["pool_size"]
+    assert body["checked_out"] == 0
+
+
+def test_pool_settings_reject_unknown_pre_ping():
+    with pytest.raises(ValueError):
+        pool_settings({"PRE_PING": "sometimes"})
+
+
+@pytest.mark.asyncio
+async def test_idle_pre_ping_only_pings_idle_connections(tmp_path):
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'ping.db'}",
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=1,
+    )
+    ping_after_idle(engine, idle_seconds=60)
+
+    with patch.object(engine.sync_engine.dialect, "do_ping") as do_ping:
+        for _ in range(3):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        assert do_ping.call_count == 0
+
+        with patch("database.pool.time.monotonic", return_value=time.monotonic() + 61):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        assert do_ping.call_count == 1
+
+    await engine.dispose()
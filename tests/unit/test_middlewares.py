@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from util.middlewares import (
+    LazyPagination,
+    PaginationMiddleware,
+    RequestLoggingMiddleware,
+)
+
+
+def echo_app(**options) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"length": len(await request.body())}
+
+    app.add_middleware(RequestLoggingMiddleware, **options)
+    return TestClient(app)
+
+
+@pytest.fixture
+def logged():
+    with patch("util.middlewares.logger") as logger:
+        yield lambda: [call.args[0] for call in logger.info.call_args_list]
+
+
+def test_body_is_truncated_but_passed_through_whole(logged):
+    client = echo_app(max_body_bytes=16)
+
+    response = client.post("/echo", content=b"x" * 10_000)
+
+    assert response.json() == {"length": 10_000}
+    assert logged() == [
+        "Receiving request: POST http://testserver/echo.",
+        f"Request body (first 16 bytes): {b'x' * 16}.",
+        "Response status code: 200.",
+    ]
+
+
+def test_small_body_is_logged_whole(logged):
+    echo_app().post("/echo", content=b'{"a": 1}')
+
+    assert "Request body: b'{\"a\": 1}'." in logged()
+
+
+def test_bodies_are_skipped_by_content_type_and_path(logged):
+    client = echo_app(skip_paths=["/echo"])
+    client.post("/echo", content=b"secret")
+
+    client = echo_app(skip_content_types=["application/x-www-form-urlencoded"])
+    client.post("/echo", data={"password": "secret"})
+
+    assert not any("secret" in message for message in logged())
+
+
+def test_bodies_are_sampled(logged):
+    client = echo_app(sample_rate=0)
+
+    client.post("/echo", content=b"payload")
+
+    assert not any("payload" in message for message in logged())
+
+
+def test_pagination_is_parsed_on_first_access():
+    pagination = LazyPagination(b"page=3&limit=20&name=a")
+
+    assert pagination._values is None
+    assert dict(pagination) == {"page": 3, "limit": 20, "offset": 40}
+
+
+def test_invalid_pagination_falls_back_to_defaults():
+    assert dict(LazyPagination(b"page=abc")) == {"page": 1, "limit": 10, "offset": 0}
+
+
+def test_pagination_middleware_sets_scope_for_get():
+    app = FastAPI()
+
+    @app.get("/items")
+    async def items(request: Request):
+        return dict(request.scope["pagination"])
+
+    app.add_middleware(PaginationMiddleware)
+
+    response = TestClient(app).get("/items", params={"page": 2})
+
+    assert response.json() == {"page": 2, "limit": 10, "offset": 10}
@@ -0,0 +1,145 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from database.models import Reservations, Rooms
+from util.pagination import Fieldset, Keyset, keyset_page
+from util.utils import create_app
+
+keyset = Keyset(Reservations.start_time, Reservations.id)
+fieldset = Fieldset(Reservations.id, Reservations.room_id, Reservations.start_time)
+
+
+@pytest_asyncio.fixture
+async def app(app, session_factory):
+    async with session_factory() as db:
+        db.add_all(
+            Rooms(id=id, name=f"Room {id}", location="2nd Floor", capacity=4)
+            for id in range(2, 6)
+        )
+        await db.commit()
+
+    yield app
+
+
+def test_cursor_round_trip():
+    reservation = Reservations(id=7, start_time=datetime(2025, 2, 10, 10, 0))
+
+    cursor = keyset.encode(reservation)
+
+    assert keyset.decode(cursor) == [datetime(2025, 2, 10, 10, 0), 7]
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "W10", "WyJ4IiwgMV0", "WzEsMiwzXQ"])
+def test_invalid_cursor_is_rejected(cursor: str):
+    with pytest.raises(HTTPException) as exc_info:
+        keyset.decode(cursor)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid pagination cursor."
+
+
+def test_after_expands_to_index_friendly_predicate():
+    query = select(Reservations).where(keyset.after([datetime(2025, 2, 10, 10, 0), 7]))
+
+    compiled = str(query.compile(compile_kwargs={"literal_binds": True}))
+
+    assert (
+        "reservations.start_time >= '2025-02-10 10:00:00' AND "
+        "(reservations.start_time > '2025-02-10 10:00:00' OR "
+        "reservations.start_time = '2025-02-10 10:00:00' AND reservations.id > 7)"
+    ) in compiled
+
+
+def test_fieldset_defaults_to_every_field():
+    assert fieldset.parse(None) == ["id", "room_id", "start_time"]
+
+
+def test_fieldset_keeps_requested_order_without_duplicates():
+    assert fieldset.parse("start_time, id,start_time,") == ["start_time", "id"]
+
+
+@pytest.mark.parametrize("fields", ["password", "id,password", ","])
+def test_unknown_fields_are_rejected(fields: str):
+    with pytest.raises(HTTPException) as exc_info:
+        fieldset.parse(fields)
+
+    assert exc_info.value.status_code == 400
+
+
+def test_fieldset_selects_missing_keyset_columns_last():
+    query = fieldset.select(["room_id"], keyset)
+
+    assert [column.key for column in query.selected_columns] == [
+        "room_id",
+        "start_time",
+        "id",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_list_returns_only_requested_fields(api_client):
+    response = await api_client.get("/rooms", params={"fields": "name,id", "limit": 2})
+
+    assert response.status_code == 200
+    assert response.json()["rooms"] == [
+        {"name": "Room A", "id": 1},
+        {"name": "Room 2", "id": 2},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_without_the_keyset_fields(api_client):
+    names = []
+    params = {"fields": "name", "cursor": "", "limit": 2}
+    while params["cursor"] is not None:
+        page = (await api_client.get("/rooms", params=params)).json()
+        names += [room["name"] for room in page["rooms"]]
+        params["cursor"] = page["next_cursor"]
+
+    assert names == ["Room A", "Room 2", "Room 3", "Room 4", "Room 5"]
+
+
+@pytest.mark.asyncio
+async def test_users_list_never_returns_passwords(api_client):
+    response = await api_client.get("/users")
+
+    assert response.json()["users"] == [
+        {"id": 1, "name": "tester", "email": "tester@test.com"}
+    ]
+
+    response = await api_client.get("/users", params={"fields": "password"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_empty_page_has_no_next_cursor(session_factory):
+    async with session_factory() as db:
+        query = select(Rooms.id, Rooms.name)
+        rows_keyset = Keyset(Rooms.id)
+
+        assert await keyset_page(db, query, rows_keyset, "", 0) == ([], None)
+
+
+@pytest.mark.asyncio
+async def test_users_list_rejects_an_empty_page(api_client):
+    response = await api_client.get("/users", params={"cursor": "", "limit": 0})
+
+    assert response.status_code == 422
+
+
+def test_list_routes_document_their_page_models():
+    paths = create_app().openapi()["paths"]
+
+    for path, model in [
+        ("/rooms", "RoomsPage"),
+        ("/rooms/{id}/reservations", "ReservationsPage"),
+        ("/reservations", "ReservationsPage"),
+        ("/users", "UsersPage"),
+    ]:
+        content = paths[path]["get"]["responses"]["200"]["content"]
+        schema = content["application/json"]["schema"]
+        assert schema == {"$ref": f"#/components/schemas/{model}"}
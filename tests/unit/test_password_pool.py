@@ -0,0 +1,43 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException, status
+
+from util.password_pool import PasswordPool
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result_and_records_wait():
+    pool = PasswordPool(max_workers=1, max_queue=1)
+
+    result = await pool.run(pow, 2, 10)
+
+    assert result == 1024
+    assert pool.stats()["completed"] == 1
+    assert pool.stats()["wait_seconds_total"] >= 0
+    assert pool.in_flight == 0
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_rejects_with_retry_after_when_queue_is_full():
+    pool = PasswordPool(max_workers=1, max_queue=1, retry_after=7)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(pool.run(release.wait))
+    queued = asyncio.ensure_future(pool.run(release.wait))
+    await asyncio.sleep(0)
+
+    assert pool.queue_depth == 1
+
+    with pytest.raises(HTTPException) as exc_info:
+        await pool.run(release.wait)
+
+    assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert exc_info.value.headers == {"Retry-After": "7"}
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert pool.stats()["completed"] == 2
+    pool.shutdown()
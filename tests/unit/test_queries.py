@@ -0,0 +1,82 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.schema import DropIndex
+
+from database.migrations import apply_migrations
+from database.models import Base, Reservations, Users
+from database.queries import on_date, overlapping_reservations
+
+INDEX_NAME = "ix_reservations_room_id_start_time_end_time"
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def explain(connection, statement) -> str:
+    compiled = statement.compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return " ".join(row[-1] for row in rows)
+
+
+def test_conflict_check_uses_room_interval_index(engine):
+    statement = overlapping_reservations(
+        1, datetime(2025, 2, 10, 10, 0), datetime(2025, 2, 10, 11, 0)
+    ).limit(1)
+
+    with engine.connect() as connection:
+        plan = explain(connection, statement)
+
+    assert f"USING INDEX {INDEX_NAME}" in plan
+    assert "start_time<" in plan.replace(" ", "")
+
+
+def test_room_date_filter_uses_room_interval_index(engine):
+    statement = Reservations.__table__.select().where(
+        Reservations.room_id == 1, on_date(Reservations.start_time, date(2025, 2, 10))
+    )
+
+    with engine.connect() as connection:
+        plan = explain(connection, statement)
+
+    assert f"USING INDEX {INDEX_NAME}" in plan
+    assert "start_time>" in plan.replace(" ", "")
+
+
+def test_on_date_is_half_open_range():
+    clause = on_date(Reservations.start_time, date(2025, 2, 10))
+    compiled = clause.compile(compile_kwargs={"literal_binds": True})
+
+    assert "CAST" not in str(compiled)
+    assert "reservations.start_time >= '2025-02-10 00:00:00'" in str(compiled)
+    assert "reservations.start_time < '2025-02-11 00:00:00'" in str(compiled)
+
+
+def test_apply_migrations_adds_missing_index(engine):
+    with engine.begin() as connection:
+        connection.execute(
+            DropIndex(
+                next(i for i in Reservations.__table__.indexes if i.name == INDEX_NAME)
+            )
+        )
+        apply_migrations(connection)
+        apply_migrations(connection)
+
+        indexes = inspect(connection).get_indexes("reservations")
+
+    assert INDEX_NAME in {index["name"] for index in indexes}
+
+
+def test_user_lookup_by_name_uses_index(engine):
+    with engine.connect() as connection:
+        plan = explain(connection, select(Users.id).where(Users.name == "tester"))
+
+    assert "ix_users_name" in plan
@@ -0,0 +1,96 @@
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import database.database
+import util.utils
+from database.models import Base, Users
+from database.replicas import PrimarySession, ReplicaSet
+
+pytest.importorskip("aiosqlite")
+
+
+async def sqlite_engine(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    return engine
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path, monkeypatch):
+    """
+    Sessions on a primary whose replica never receives its writes, replacing
+    the conftest factory so that the app reads from that replica.
+    """
+    primary = await sqlite_engine(tmp_path / "primary.db")
+    replica = await sqlite_engine(tmp_path / "replica.db")
+    replica_set = ReplicaSet([replica])
+    monkeypatch.setattr(database.database, "replicas", replica_set)
+    monkeypatch.setattr(util.utils, "replicas", replica_set)
+
+    factory = async_sessionmaker(
+        bind=primary,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=PrimarySession,
+    )
+    async with factory() as db:
+        db.add(Users(id=1, name="tester", email="tester@test.com", password="x"))
+        await db.commit()
+
+    yield factory
+
+    await primary.dispose()
+    await replica.dispose()
+
+
+def client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://t"
+    )
+
+
+@pytest.mark.asyncio
+async def test_reads_follow_own_writes_to_the_primary(app):
+    async with client(app) as writer, client(app) as reader:
+        assert (await writer.get("/rooms")).json()["total_items"] == 0
+
+        response = await writer.post(
+            "/rooms", json={"name": "Room A", "location": "1st Floor", "capacity": 4}
+        )
+        assert response.status_code == 201
+        assert "primary_until=" in response.headers["set-cookie"]
+
+        assert (await writer.get("/rooms")).json()["total_items"] == 1
+        # A query the writer has not cached, so it is served by the replica.
+        response = await reader.get("/rooms", params={"limit": 20})
+        assert response.json()["total_items"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_do_not_pin_to_the_primary(api_client):
+    response = await api_client.post("/rooms", json={"name": "Room A"})
+
+    assert response.status_code == 422
+    assert "set-cookie" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_replicas_are_skipped(tmp_path):
+    healthy = await sqlite_engine(tmp_path / "healthy.db")
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}")
+    replica_set = ReplicaSet([healthy, broken])
+
+    assert {replica_set.pick(), replica_set.pick()} == {healthy, broken}
+
+    await replica_set.check()
+
+    assert [replica_set.pick() for _ in range(3)] == [healthy] * 3
+
+    await replica_set.dispose()
+
+
+def test_no_healthy_replica_reads_from_the_primary():
+    assert ReplicaSet([]).pick() is None
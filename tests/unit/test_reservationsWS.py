@@ -3,9 +3,11 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock
 from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.database import get_db
 from util.utils import create_app
 from database.models import Reservations, Users
+from routes.ReservationsWS import reservations_fields
 
 app = create_app()
 client = TestClient(app)
@@ -13,8 +15,10 @@ client = TestClient(app)
 
 @pytest.fixture
 def mock_db():
-    mock = MagicMock()
-    mock.query.return_value.filter.return_value.first.return_value = None
+    mock = MagicMock(spec=AsyncSession)
+    mock.scalar.return_value = None
+    mock.scalars.return_value = MagicMock()
+    mock.execute.return_value = MagicMock()
     return mock
 
 
@@ -25,7 +29,7 @@ def override_dependency(mock_db: MagicMock):
     client = TestClient(app)
 
 
-def test_list_reservations_no_filters(mock_db: MagicMock):
+def test_list_reservations_no_filters(mock_db: MagicMock, as_rows):
     mock_reservations = [
         Reservations(
             id=1,
@@ -42,10 +46,9 @@ def test_list_reservations_no_filters(mock_db: MagicMock):
             end_time=datetime(2025, 2, 11, 11, 0),
         ),
     ]
-    mock_query = mock_db.query.return_value
-    mock_query.count.return_value = len(mock_reservations)
-    mock_query.offset.return_value.limit.return_value.all.return_value = (
-        mock_reservations
+    mock_db.scalar.return_value = len(mock_reservations)
+    mock_db.execute.return_value.all.return_value = as_rows(
+        reservations_fields, mock_reservations
     )
 
     response = client.get("/reservations")
@@ -56,6 +59,7 @@ def test_list_reservations_no_filters(mock_db: MagicMock):
         "limit": 10,
         "total_items": 2,
         "total_pages": 1,
+        "total_exact": True,
         "reservations": [
             {
                 "id": 1,
@@ -63,6 +67,7 @@ def test_list_reservations_no_filters(mock_db: MagicMock):
                 "user_id": 1,
                 "start_time": "2025-02-10T10:00:00",
                 "end_time": "2025-02-10T12:00:00",
+                "created_at": None,
             },
             {
                 "id": 2,
@@ -70,12 +75,13 @@ def test_list_reservations_no_filters(mock_db: MagicMock):
                 "user_id": 2,
                 "start_time": "2025-02-11T09:00:00",
                 "end_time": "2025-02-11T11:00:00",
+                "created_at": None,
             },
         ],
     }
 
 
-def test_list_reservations_with_pagination(mock_db: MagicMock):
+def test_list_reservations_with_pagination(mock_db: MagicMock, as_rows):
     mock_reservations = [
         Reservations(
             id=1,
@@ -99,10 +105,9 @@ def test_list_reservations_with_pagination(mock_db: MagicMock):
             end_time=datetime(2025, 2, 12, 16, 0),
         ),
     ]
-    mock_query = mock_db.query.return_value
-    mock_query.count.return_value = len(mock_reservations)
-    mock_query.offset.return_value.limit.return_value.all.return_value = (
-        mock_reservations[:2]
+    mock_db.scalar.return_value = len(mock_reservations)
+    mock_db.execute.return_value.all.return_value = as_rows(
+        reservations_fields, mock_reservations[:2]
     )
 
     response = client.get("/reservations", params={"page": 1, "limit": 2})
@@ -113,6 +118,7 @@ def test_list_reservations_with_pagination(mock_db: MagicMock):
         "limit": 2,
         "total_items": 3,
         "total_pages": 2,
+        "total_exact": True,
         "reservations": [
             {
                 "id": 1,
@@ -120,6 +126,7 @@ def test_list_reservations_with_pagination(mock_db: MagicMock):
                 "user_id": 1,
                 "start_time": "2025-02-10T10:00:00",
                 "end_time": "2025-02-10T12:00:00",
+                "created_at": None,
             },
             {
                 "id": 2,
@@ -127,12 +134,13 @@ def test_list_reservations_with_pagination(mock_db: MagicMock):
                 "user_id": 2,
                 "start_time": "2025-02-11T09:00:00",
                 "end_time": "2025-02-11T11:00:00",
+                "created_at": None,
             },
         ],
     }
 
 
-def test_list_reservations_with_date_filter(mock_db: MagicMock):
+def test_list_reservations_with_date_filter(mock_db: MagicMock, as_rows):
     mock_reservations = [
         Reservations(
             id=1,
@@ -142,9 +150,10 @@ def test_list_reservations_with_date_filter(mock_db: MagicMock):
             end_time=datetime(2025, 2, 10, 12, 0),
         ),
     ]
-    mock_query = mock_db.query.return_value
-    mock_query.filter.return_value.count.return_value = len(mock_reservations)
-    mock_query.filter.return_value.offset.return_value.limit.return_value.all.return_value = mock_reservations
+    mock_db.scalar.return_value = len(mock_reservations)
+    mock_db.execute.return_value.all.return_value = as_rows(
+        reservations_fields, mock_reservations
+    )
 
     response = client.get("/reservations", params={"date": "2025-02-10"})
 
@@ -154,6 +163,7 @@ def test_list_reservations_with_date_filter(mock_db: MagicMock):
         "limit": 10,
         "total_items": 1,
         "total_pages": 1,
+        "total_exact": True,
         "reservations": [
             {
                 "id": 1,
@@ -161,6 +171,7 @@ def test_list_reservations_with_date_filter(mock_db: MagicMock):
                 "user_id": 1,
                 "start_time": "2025-02-10T10:00:00",
                 "end_time": "2025-02-10T12:00:00",
+                "created_at": None,
             },
         ],
     }
@@ -168,8 +179,8 @@ def test_list_reservations_with_date_filter(mock_db: MagicMock):
 
 @pytest.mark.skip(reason="Until fix API authentication mock.")
 def test_create_reservation_start_time_in_past(mock_db: MagicMock):
-    mock_db.query.return_value.filter.return_value.first.return_value = None
-    mock_db.query.return_value.filter.return_value.first.return_value = Users(
+    mock_db.scalar.return_value = None
+    mock_db.scalar.return_value = Users(
         id=1, name="Test User", email="user@test.com"
     )
 
@@ -188,15 +199,15 @@ def test_create_reservation_start_time_in_past(mock_db: MagicMock):
 
 @pytest.mark.skip(reason="Until fix API authentication mock.")
 def test_create_reservation_conflict(mock_db: MagicMock):
-    mock_db.query.return_value.filter.return_value.first.return_value = None
-    mock_db.query.return_value.filter.return_value.first.return_value = Users(
+    mock_db.scalar.return_value = None
+    mock_db.scalar.return_value = Users(
         id=1, name="Test User", email="user@test.com"
     )
 
     start_time = datetime.now() + timedelta(hours=1)
     end_time = datetime.now() + timedelta(hours=1, minutes=30)
 
-    mock_db.query.return_value.filter.return_value.first.return_value = Reservations(
+    mock_db.scalar.return_value = Reservations(
         id=1,
         room_id=101,
         user_id=1,
@@ -231,7 +242,7 @@ def test_create_reservation_conflict(mock_db: MagicMock):
 
 @pytest.mark.skip(reason="Until fix API authentication mock.")
 def test_delete_reservation_success(mock_db: MagicMock):
-    mock_db.query.return_value.filter.return_value.first.return_value = Reservations(
+    mock_db.scalar.return_value = Reservations(
         id=1,
         room_id=101,
         user_id=1,
@@ -242,3 +253,46 @@ def test_delete_reservation_success(mock_db: MagicMock):
     response = client.delete("/reservations/1")
 
     assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_list_reservations_with_cursor(mock_db: MagicMock, as_rows):
+    mock_reservations = [
+        Reservations(
+            id=index,
+            room_id=101,
+            user_id=1,
+            start_time=datetime(2025, 2, 10, 8 + index, 0),
+            end_time=datetime(2025, 2, 10, 9 + index, 0),
+        )
+        for index in range(1, 4)
+    ]
+    mock_db.execute.return_value.all.return_value = as_rows(
+        reservations_fields, mock_reservations
+    )
+
+    response = client.get("/reservations", params={"cursor": "", "limit": 2})
+
+    assert response.status_code == status.HTTP_200_OK
+    response_data = response.json()
+    assert [item["id"] for item in response_data["reservations"]] == [1, 2]
+    assert response_data["limit"] == 2
+    assert "total_items" not in response_data
+    mock_db.scalar.assert_not_called()
+
+    next_cursor = response_data["next_cursor"]
+    mock_db.execute.return_value.all.return_value = as_rows(
+        reservations_fields, mock_reservations[2:]
+    )
+
+    response = client.get("/reservations", params={"cursor": next_cursor, "limit": 2})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.json()["reservations"]] == [3]
+    assert response.json()["next_cursor"] is None
+
+
+def test_list_reservations_with_invalid_cursor():
+    response = client.get("/reservations", params={"cursor": "invalid"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid pagination cursor."}
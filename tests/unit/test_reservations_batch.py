@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from database.models import Reservations, Rooms
+from models.ReservationsMO import MAX_OCCURRENCES, ReservationBatchRequest
+from util.availability import room_index
+
+START = (datetime.now() + timedelta(days=1)).replace(
+    hour=9, minute=0, second=0, microsecond=0
+)
+
+
+def weekly_batch(count: int = 13, mode: str = "all_or_nothing") -> dict:
+    return {
+        "room_id": 1,
+        "start_time": START.isoformat(),
+        "end_time": (START + timedelta(minutes=15)).isoformat(),
+        "recurrence": {"frequency": "weekly", "count": count},
+        "mode": mode,
+    }
+
+
+async def book(c: httpx.AsyncClient, start: datetime) -> int:
+    response = await c.post(
+        "/reservations",
+        json={
+            "room_id": 1,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_occurrences_stop_at_count_or_until():
+    batch = ReservationBatchRequest(**weekly_batch(count=4))
+    assert [start for start, _ in batch.occurrences()] == [
+        START + timedelta(weeks=week) for week in range(4)
+    ]
+
+    batch.recurrence.until = START + timedelta(weeks=2)
+    assert len(batch.occurrences()) == 3
+
+    batch.recurrence.count = None
+    batch.recurrence.until = START + timedelta(days=3 * MAX_OCCURRENCES)
+    batch.recurrence.frequency = "daily"
+    assert len(batch.occurrences()) == MAX_OCCURRENCES + 1
+
+
+@pytest.mark.asyncio
+async def test_batch_creates_every_occurrence(api_client, session_factory):
+    response = await api_client.post("/reservations/batch", json=weekly_batch())
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["conflicts"] == []
+    assert [item["start_time"] for item in body["created"]] == [
+        (START + timedelta(weeks=week)).isoformat() for week in range(13)
+    ]
+
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count(Reservations.id))) == 13
+        assert await db.scalar(select(Rooms.reservations_version)) == 1
+
+    intervals = room_index.get(1, 1)
+    assert intervals is not None
+    assert sorted(intervals.ids) == sorted(item["id"] for item in body["created"])
+
+
+@pytest.mark.asyncio
+async def test_batch_all_or_nothing_rejects_conflicts(api_client, session_factory):
+    conflicting_id = await book(api_client, START + timedelta(weeks=2, minutes=-30))
+
+    response = await api_client.post("/reservations/batch", json=weekly_batch())
+
+    assert response.status_code == 400
+    conflicts = response.json()["detail"]["conflicts"]
+    assert len(conflicts) == 1
+    assert conflicts[0]["start_time"] == (START + timedelta(weeks=2)).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+    assert conflicts[0]["conflicting_reservation"]["id"] == conflicting_id
+
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count(Reservations.id))) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_best_effort_skips_conflicts(api_client, session_factory):
+    await book(api_client, START + timedelta(weeks=2, minutes=-30))
+
+    response = await api_client.post(
+        "/reservations/batch", json=weekly_batch(mode="best_effort")
+    )
+
+    assert response.status_code == 201
+    body = response.json()
+    assert len(body["created"]) == 12
+    assert len(body["conflicts"]) == 1
+
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count(Reservations.id))) == 13
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_occurrences_longer_than_interval(api_client):
+    batch = weekly_batch()
+    batch["recurrence"] = {"frequency": "daily", "count": 3}
+    batch["end_time"] = (START + timedelta(days=2)).isoformat()
+
+    response = await api_client.post("/reservations/batch", json=batch)
+
+    assert response.status_code == 400
+    assert (
+        response.json()["detail"]
+        == "Occurrences cannot be longer than the recurrence interval."
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_count_or_until(api_client):
+    batch = weekly_batch()
+    batch["recurrence"] = {"frequency": "weekly"}
+
+    response = await api_client.post("/reservations/batch", json=batch)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_batch_accepts_an_aware_until(api_client):
+    batch = weekly_batch()
+    batch["recurrence"] = {
+        "frequency": "weekly",
+        "until": f"{(START + timedelta(weeks=2)).isoformat()}Z",
+    }
+
+    response = await api_client.post("/reservations/batch", json=batch)
+
+    assert response.status_code == 201
+    assert len(response.json()["created"]) == 3
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from database.models import Reservations, Rooms
+from database.transactions import run_with_retry
+
+CONCURRENT_REQUESTS = 300
+
+
+@pytest.mark.asyncio
+async def test_overlapping_creates_have_exactly_one_winner(api_client, session_factory):
+    start = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+
+    async def create(offset: int) -> int:
+        slot_start = start + timedelta(minutes=offset % 30)
+        response = await api_client.post(
+            "/reservations",
+            json={
+                "room_id": 1,
+                "start_time": slot_start.isoformat(),
+                "end_time": (slot_start + timedelta(hours=1)).isoformat(),
+            },
+        )
+        return response.status_code
+
+    status_codes = await asyncio.gather(
+        *(create(offset) for offset in range(CONCURRENT_REQUESTS))
+    )
+
+    assert status_codes.count(201) == 1
+    assert status_codes.count(400) == CONCURRENT_REQUESTS - 1
+
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count(Reservations.id))) == 1
+        assert await db.scalar(select(Rooms.reservations_version)) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_with_retry_retries_lock_conflicts():
+    class FakeSession:
+        rollbacks = 0
+
+        async def rollback(self):
+            self.rollbacks += 1
+
+    db = FakeSession()
+    calls = []
+
+    async def operation():
+        calls.append(None)
+        if len(calls) < 3:
+            raise OperationalError("INSERT", {}, Exception(1213, "Deadlock found"))
+        return "done"
+
+    assert await run_with_retry(db, operation, attempts=3, delay=0) == "done"
+    assert len(calls) == 3
+    assert db.rollbacks == 2
+
+
+@pytest.mark.asyncio
+async def test_run_with_retry_does_not_retry_other_errors():
+    class FakeSession:
+        async def rollback(self):
+            pass
+
+    calls = []
+
+    async def operation():
+        calls.append(None)
+        raise OperationalError("INSERT", {}, Exception(2006, "MySQL server gone"))
+
+    with pytest.raises(OperationalError):
+        await run_with_retry(FakeSession(), operation, attempts=3, delay=0)
+
+    assert len(calls) == 1
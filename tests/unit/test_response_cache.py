@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytest
+
+from util import middlewares, utils
+from util.metrics import http_request_duration
+from util.response_cache import CachedResponse, ResponseCache, response_cache
+
+START = (datetime.now() + timedelta(days=1)).replace(
+    hour=9, minute=0, second=0, microsecond=0
+)
+
+
+@pytest.fixture(autouse=True)
+def enable_response_cache(monkeypatch):
+    monkeypatch.setitem(utils.config["RESPONSE_CACHE"], "ENABLED", "true")
+
+
+class FakeSharedBackend:
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self.values[key] = value
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return [self.values.get(key) for key in keys]
+
+    async def incr(self, key: str) -> int:
+        value = int(self.values.get(key, 0)) + 1
+        self.values[key] = str(value).encode()
+        return value
+
+
+class BrokenSharedBackend(FakeSharedBackend):
+    async def get(self, key: str) -> Optional[bytes]:
+        raise ConnectionError("down")
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        raise ConnectionError("down")
+
+
+@pytest.mark.asyncio
+async def test_repeated_get_is_served_from_cache(api_client):
+    first = await api_client.get("/rooms", params={"page": 1, "limit": 5})
+    second = await api_client.get("/rooms", params={"limit": 5, "page": 1})
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.json() == first.json()
+
+
+@pytest.mark.asyncio
+async def test_hits_are_counted_under_their_route(api_client):
+    before = http_request_duration.count("GET", "/rooms", "200")
+
+    for _ in range(3):
+        await api_client.get("/rooms")
+
+    assert http_request_duration.count("GET", "/rooms", "200") == before + 3
+
+
+@pytest.mark.asyncio
+async def test_matching_if_none_match_returns_304(api_client):
+    etag = (await api_client.get("/rooms")).headers["etag"]
+
+    response = await api_client.get("/rooms", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_creating_a_room_invalidates_room_lists(api_client):
+    etag = (await api_client.get("/rooms")).headers["etag"]
+
+    await api_client.post(
+        "/rooms", json={"name": "Room B", "location": "2nd Floor", "capacity": 4}
+    )
+    response = await api_client.get("/rooms", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "MISS"
+    assert response.headers["etag"] != etag
+    assert response.json()["total_items"] == 2
+
+
+@pytest.mark.asyncio
+async def test_reservation_changes_invalidate_room_reservations(api_client):
+    assert (await api_client.get("/rooms/1/reservations")).json()["total_items"] == 0
+
+    created = await api_client.post(
+        "/reservations",
+        json={
+            "room_id": 1,
+            "start_time": START.isoformat(),
+            "end_time": (START + timedelta(hours=1)).isoformat(),
+        },
+    )
+    assert (await api_client.get("/rooms/1/reservations")).json()["total_items"] == 1
+
+    await api_client.delete(f"/reservations/{created.json()['id']}")
+    assert (await api_client.get("/rooms/1/reservations")).json()["total_items"] == 0
+
+
+@pytest.mark.asyncio
+async def test_error_responses_are_not_cached(api_client):
+    response = await api_client.get("/rooms/999/reservations")
+
+    assert response.status_code == 404
+    assert "etag" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_etag_revalidates_the_body_after_a_restart(api_client, monkeypatch):
+    response = await api_client.get("/rooms")
+    assert response.headers["etag"] == ResponseCache.etag(response.content)
+
+    response_cache.clear()
+    monkeypatch.setattr(response_cache, "epoch", "restarted")
+    revalidated = await api_client.get(
+        "/rooms", headers={"If-None-Match": response.headers["etag"]}
+    )
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers["x-cache"] == "MISS"
+
+
+@pytest.mark.asyncio
+async def test_clients_pinned_to_the_primary_bypass_the_cache(api_client, monkeypatch):
+    monkeypatch.setattr(middlewares, "read_from_primary", lambda: True)
+
+    response = await api_client.get("/rooms")
+
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert len(response_cache.entries) == 0
+
+
+@pytest.mark.asyncio
+async def test_responses_are_not_stored_while_replicas_may_lag(api_client, monkeypatch):
+    monkeypatch.setattr(response_cache, "settle_seconds", 60)
+    await api_client.post(
+        "/rooms", json={"name": "Room B", "location": "2nd Floor", "capacity": 4}
+    )
+
+    first = await api_client.get("/rooms")
+    second = await api_client.get("/rooms")
+
+    assert first.headers["x-cache"] == second.headers["x-cache"] == "MISS"
+
+
+@pytest.mark.asyncio
+async def test_local_entry_keys_differ_between_processes():
+    worker_a, worker_b = ResponseCache(), ResponseCache()
+
+    assert await worker_a.entry_key("/rooms?", ["rooms"]) != await worker_b.entry_key(
+        "/rooms?", ["rooms"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_shared_backend_shares_entries_and_versions_between_workers():
+    shared = FakeSharedBackend()
+    worker_a = ResponseCache(shared=shared, settle_seconds=5)
+    worker_b = ResponseCache(shared=shared, settle_seconds=5)
+
+    entry_key = await worker_a.entry_key("/rooms?", ["rooms"])
+    await worker_a.set(entry_key, CachedResponse('"a"', b"application/json", b"[]"))
+
+    assert await worker_b.entry_key("/rooms?", ["rooms"]) == entry_key
+    assert (await worker_b.get(entry_key)).body == b"[]"
+
+    await worker_a.bump("rooms")
+
+    assert await worker_b.versions(["rooms"]) == (1,)
+    assert not await worker_b.settled(["rooms"])
+
+
+@pytest.mark.asyncio
+async def test_unavailable_shared_backend_falls_back_to_local_cache():
+    cache = ResponseCache(shared=BrokenSharedBackend())
+    await cache.bump("rooms")
+    await cache.set("a", CachedResponse('"a"', b"application/json", b"[]"))
+
+    assert await cache.versions(["rooms"]) == (cache.epoch, 1)
+    assert (await cache.get("a")).body == b"[]"
+    assert await cache.get("b") is None
@@ -1,11 +1,14 @@
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock
-from datetime import datetime, date
+from datetime import datetime
 
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.database import get_db
 from database.models import Rooms, Reservations
+from util.availability import room_index
 from util.utils import create_app
+from routes.RoomsWS import MAX_BATCH_ROOMS, room_reservations_fields, rooms_fields
 
 app = create_app()
 client = TestClient(app)
@@ -13,7 +16,9 @@ client = TestClient(app)
 
 @pytest.fixture
 def mock_db():
-    mock_db = MagicMock()
+    mock_db = MagicMock(spec=AsyncSession)
+    mock_db.scalars.return_value = MagicMock()
+    mock_db.execute.return_value = MagicMock()
     return mock_db
 
 
@@ -25,8 +30,8 @@ def override_dependency(mock_db: MagicMock):
 
 
 def test_list_rooms(mock_db: MagicMock):
-    mock_db.query.return_value.filter.return_value.count.return_value = 1
-    mock_db.query.return_value.filter.return_value.offset.return_value.limit.return_value.count.return_value = 1
+    mock_db.scalar.return_value = 1
+    mock_db.execute.return_value.all.return_value = []
 
     def test_create_room(mock_db: MagicMock):
         room_data = {
@@ -44,7 +49,7 @@ def test_list_rooms(mock_db: MagicMock):
             location="1st Floor",
             capacity=10,
             creator_id=1,
-            created_at=date.today(),
+            created_at=datetime(2025, 2, 1, 9, 0, 0),
         )
 
         response = client.post("/rooms", json=room_data)
@@ -56,30 +61,25 @@ def test_list_rooms(mock_db: MagicMock):
             "location": "1st Floor",
             "capacity": 10,
             "creator_id": 1,
-            "created_at": str(date.today()),
+            "created_at": "2025-02-01T09:00:00",
         }
 
 
-def test_get_room_details(mock_db: MagicMock):
-    mock_db.query.return_value.filter.return_value.first.return_value = Rooms(
-        id=1,
-        name="Room A",
-        location="1st Floor",
-        capacity=10,
-        creator_id=1,
-        created_at=date.today(),
+def test_get_room_details(mock_db: MagicMock, as_rows):
+    mock_db.scalar.return_value = 1
+    mock_db.execute.return_value.all.return_value = as_rows(
+        rooms_fields,
+        [
+            Rooms(
+                id=1,
+                name="Room A",
+                location="1st Floor",
+                capacity=10,
+                creator_id=1,
+                created_at=datetime(2025, 2, 1, 9, 0, 0),
+            )
+        ],
     )
-    mock_db.query.return_value.filter.return_value.count.return_value = 1
-    mock_db.query.return_value.filter.return_value.offset.return_value.limit.return_value.all.return_value = [
-        Rooms(
-            id=1,
-            name="Room A",
-            location="1st Floor",
-            capacity=10,
-            creator_id=1,
-            created_at=date.today(),
-        )
-    ]
 
     response = client.get("/rooms?id=1")
 
@@ -89,6 +89,7 @@ def test_get_room_details(mock_db: MagicMock):
         "limit": 10,
         "total_items": 1,
         "total_pages": 1,
+        "total_exact": True,
         "rooms": [
             {
                 "id": 1,
@@ -96,7 +97,7 @@ def test_get_room_details(mock_db: MagicMock):
                 "location": "1st Floor",
                 "capacity": 10,
                 "creator_id": 1,
-                "created_at": str(date.today()),
+                "created_at": "2025-02-01T09:00:00",
             }
         ],
     }
@@ -114,24 +115,29 @@ def test_check_room_availability_invalid_times():
     }
 
 
-def test_check_room_reservations(mock_db: MagicMock):
-    mock_db.query.return_value.filter.return_value.first.return_value = Rooms(
-        id=1,
-        name="Room A",
-        location="1st Floor",
-        capacity=10,
-        creator_id=1,
-        created_at=date.today(),
-    )
-    mock_db.query.return_value.filter.return_value.count.return_value = 1
-    mock_db.query.return_value.filter.return_value.offset.return_value.limit.return_value.all.return_value = [
-        Reservations(
+def test_check_room_reservations(mock_db: MagicMock, as_rows):
+    mock_db.scalar.side_effect = [
+        Rooms(
             id=1,
-            room_id=1,
-            start_time=datetime(2025, 2, 10, 10, 0, 0),
-            end_time=datetime(2025, 2, 10, 11, 0, 0),
-        )
+            name="Room A",
+            location="1st Floor",
+            capacity=10,
+            creator_id=1,
+            created_at=datetime(2025, 2, 1, 9, 0, 0),
+        ),
+        1,
     ]
+    mock_db.execute.return_value.all.return_value = as_rows(
+        room_reservations_fields,
+        [
+            Reservations(
+                id=1,
+                room_id=1,
+                start_time=datetime(2025, 2, 10, 10, 0, 0),
+                end_time=datetime(2025, 2, 10, 11, 0, 0),
+            )
+        ],
+    )
 
     response = client.get("/rooms/1/reservations?page=1&limit=10")
 
@@ -141,12 +147,15 @@ def test_check_room_reservations(mock_db: MagicMock):
         "limit": 10,
         "total_items": 1,
         "total_pages": 1,
+        "total_exact": True,
         "reservations": [
             {
                 "id": 1,
                 "room_id": 1,
+                "user_id": None,
                 "start_time": "2025-02-10T10:00:00",
                 "end_time": "2025-02-10T11:00:00",
+                "created_at": None,
             }
         ],
     }
@@ -164,3 +173,141 @@ def test_create_room():
 
     assert response.status_code == 201
     assert "id" in response.json()
+
+
+def test_check_room_availability_uses_room_index(mock_db: MagicMock):
+    room_index.clear()
+    mock_db.scalar.return_value = 0
+    mock_db.execute.return_value = MagicMock()
+    mock_db.execute.return_value.tuples.return_value.all.return_value = [
+        (1, datetime(2025, 2, 10, 10, 0), datetime(2025, 2, 10, 11, 0))
+    ]
+
+    busy = client.get(
+        "/rooms/1/availability",
+        params={"start": "2025-02-10T10:30:00", "end": "2025-02-10T11:30:00"},
+    )
+    free = client.get(
+        "/rooms/1/availability",
+        params={"start": "2025-02-10T11:00:00", "end": "2025-02-10T12:00:00"},
+    )
+
+    assert busy.json() == {"room_id": 1, "availability": False}
+    assert free.json() == {"room_id": 1, "availability": True}
+    assert mock_db.execute.await_count == 1
+    room_index.clear()
+
+
+def test_check_room_availability_room_not_found(mock_db: MagicMock):
+    room_index.clear()
+    mock_db.scalar.return_value = None
+
+    response = client.get(
+        "/rooms/1/availability",
+        params={"start": "2025-02-10T10:00:00", "end": "2025-02-10T11:00:00"},
+    )
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Room with id 1 not found"}
+
+
+def test_check_rooms_availability_batch(mock_db: MagicMock):
+    room_index.clear()
+    rooms_result, reservations_result = MagicMock(), MagicMock()
+    rooms_result.tuples.return_value.all.return_value = [(1, 0), (2, 0)]
+    reservations_result.tuples.return_value = [
+        (1, 10, datetime(2025, 2, 10, 10, 0), datetime(2025, 2, 10, 11, 0))
+    ]
+    mock_db.execute.side_effect = [rooms_result, reservations_result]
+
+    response = client.post(
+        "/rooms/availability:batch",
+        json={
+            "room_ids": [1, 2, 3],
+            "windows": [
+                {"start": "2025-02-10T09:00:00", "end": "2025-02-10T10:00:00"},
+                {"start": "2025-02-10T10:30:00", "end": "2025-02-10T12:00:00"},
+            ],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "rooms": [
+            {"room_id": 1, "availability": [True, False]},
+            {"room_id": 2, "availability": [True, True]},
+        ],
+        "available_room_ids": [2],
+        "not_found": [3],
+    }
+    assert mock_db.execute.await_count == 2
+    room_index.clear()
+
+
+def test_check_rooms_availability_batch_reports_only_missing_rooms(
+    mock_db: MagicMock,
+):
+    rooms_result = MagicMock()
+    rooms_result.tuples.return_value.all.return_value = []
+    mock_db.execute.return_value = rooms_result
+    mock_db.scalars.return_value = [1]
+
+    response = client.post(
+        "/rooms/availability:batch",
+        json={
+            "room_ids": [1, 2],
+            "location": "Basement",
+            "windows": [{"start": "2025-02-10T09:00:00", "end": "2025-02-10T10:00:00"}],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json()["rooms"] == []
+    assert response.json()["not_found"] == [2]
+
+
+def test_check_rooms_availability_batch_invalid_window():
+    response = client.post(
+        "/rooms/availability:batch",
+        json={
+            "windows": [{"start": "2025-02-10T11:00:00", "end": "2025-02-10T10:00:00"}]
+        },
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "The start time must be earlier than the end time."
+    }
+
+
+def test_check_rooms_availability_batch_refuses_too_many_rooms(mock_db: MagicMock):
+    rooms_result = MagicMock()
+    rooms_result.tuples.return_value.all.return_value = [
+        (id, 0) for id in range(1, MAX_BATCH_ROOMS + 2)
+    ]
+    mock_db.execute.return_value = rooms_result
+
+    response = client.post(
+        "/rooms/availability:batch",
+        json={
+            "location": "Floor",
+            "windows": [{"start": "2025-02-10T09:00:00", "end": "2025-02-10T10:00:00"}],
+        },
+    )
+
+    assert response.status_code == 422
+    assert mock_db.execute.await_count == 1
+
+
+def test_find_free_slots_rejects_long_horizon():
+    response = client.get(
+        "/rooms/free-slots",
+        params={
+            "duration": 60,
+            "start": "2025-02-10T08:00:00",
+            "end": "2025-06-10T08:00:00",
+        },
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "The search horizon cannot exceed 90 days."}
@@ -0,0 +1,108 @@
+import pytest
+
+from database.models import Rooms
+from util.search import SearchIndex, room_search, user_search
+
+
+def index_of(*texts: str, **options) -> SearchIndex:
+    index = SearchIndex((Rooms.id, Rooms.name), **options)
+    index.load((id, text) for id, text in enumerate(texts, start=1))
+    return index
+
+
+@pytest.fixture(autouse=True)
+def clear_search_indexes():
+    room_search.clear()
+    user_search.clear()
+    yield
+    room_search.clear()
+    user_search.clear()
+
+
+def test_every_query_word_must_prefix_a_word():
+    index = index_of("Conference Room", "Board Room", "Conference Hall")
+
+    assert [id for id, _ in index.search("conf ro")] == [1]
+    assert {id for id, _ in index.search("r")} == {1, 2}
+    assert index.search("onference") == []
+
+
+def test_matching_ignores_case_and_accents():
+    index = index_of("Sala de Reunião", "Auditório")
+
+    assert [id for id, _ in index.search("REUNIAO")] == [1]
+    assert [id for id, _ in index.search("audit")] == [2]
+
+
+def test_fuzzy_search_tolerates_typos():
+    index = index_of("Conference Room", "Board Room")
+
+    assert index.search("confrence") == []
+    assert [id for id, _ in index.search("confrence", fuzzy=True)] == [1]
+
+
+def test_closer_matches_rank_first():
+    index = index_of("Sala A Anexo Norte", "Sala A", "Sala Azul")
+
+    assert [id for id, _ in index.search("sala a")] == [2, 3, 1]
+    assert [id for id, _ in index.search("sala azl", fuzzy=True)][0] == 3
+
+
+def test_common_prefixes_stop_at_max_candidates():
+    index = index_of(*(f"Room {n}" for n in range(100)), max_candidates=10)
+
+    assert len(index.search("room", limit=50)) == 10
+
+
+@pytest.mark.asyncio
+async def test_rows_are_only_added_once_the_table_was_loaded(session_factory):
+    index = SearchIndex((Rooms.id, Rooms.name))
+    index.add(2, "Room B")
+    assert len(index) == 0
+
+    async with session_factory() as db:
+        await index.sync(db)
+    index.add(1, "Room A")
+    index.add(2, "Room B")
+
+    assert len(index) == 2
+
+
+@pytest.mark.asyncio
+async def test_search_rooms_finds_created_rooms(api_client):
+    await api_client.get("/rooms/search", params={"q": "room"})
+    await api_client.post(
+        "/rooms", json={"name": "Auditorium", "location": "2nd Floor", "capacity": 50}
+    )
+
+    response = await api_client.get("/rooms/search", params={"q": "audi"})
+
+    assert response.status_code == 200
+    [result] = response.json()["results"]
+    assert result["score"] == 1.0
+    assert result["room"]["name"] == "Auditorium"
+
+
+@pytest.mark.asyncio
+async def test_search_users_returns_no_passwords(api_client):
+    response = await api_client.get(
+        "/users/search", params={"q": "testr", "fuzzy": True}
+    )
+
+    assert response.status_code == 200
+    [result] = response.json()["results"]
+    assert result["user"] == {"id": 1, "name": "tester", "email": "tester@test.com"}
+
+
+@pytest.mark.asyncio
+async def test_refresh_reads_rows_created_by_other_workers(session_factory):
+    index = SearchIndex((Rooms.id, Rooms.name), refresh_interval=0)
+    async with session_factory() as db:
+        await index.sync(db)
+        db.add(Rooms(id=2, name="Boardroom", location="3rd Floor", capacity=8))
+        await db.commit()
+
+        await index.sync(db)
+
+    assert [id for id, _ in index.search("board")] == [2]
+    assert len(index) == 2
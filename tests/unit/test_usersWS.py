@@ -2,9 +2,12 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock
 from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.database import get_db
 from util.utils import create_app
 from database.models import Users
+from util.pagination import count_cache
+from routes.UsersWS import users_fields
 
 app = create_app()
 client = TestClient(app)
@@ -12,8 +15,10 @@ client = TestClient(app)
 
 @pytest.fixture
 def mock_db():
-    mock = MagicMock()
-    mock.query.return_value.filter.return_value.first.return_value = None
+    mock = MagicMock(spec=AsyncSession)
+    mock.scalar.return_value = None
+    mock.scalars.return_value = MagicMock()
+    mock.execute.return_value = MagicMock()
     return mock
 
 
@@ -24,13 +29,13 @@ def override_dependency(mock_db: MagicMock):
     client = TestClient(app)
 
 
-def test_list_users_with_pagination(mock_db: MagicMock):
+def test_list_users_with_pagination(mock_db: MagicMock, as_rows):
     mock_users = [
         Users(id=1, name="User1", email="user1@test.com"),
         Users(id=2, name="User2", email="user2@test.com"),
     ]
-    mock_db.query.return_value.count.return_value = len(mock_users)
-    mock_db.query.return_value.offset.return_value.limit.return_value.all.return_value = mock_users
+    mock_db.scalar.return_value = len(mock_users)
+    mock_db.execute.return_value.all.return_value = as_rows(users_fields, mock_users)
 
     response = client.get("/users", params={"page": 1, "limit": 2})
 
@@ -40,6 +45,7 @@ def test_list_users_with_pagination(mock_db: MagicMock):
         "limit": 2,
         "total_items": 2,
         "total_pages": 1,
+        "total_exact": True,
         "users": [
             {"id": 1, "name": "User1", "email": "user1@test.com"},
             {"id": 2, "name": "User2", "email": "user2@test.com"},
@@ -48,7 +54,7 @@ def test_list_users_with_pagination(mock_db: MagicMock):
 
 
 def test_create_user_success(mock_db: MagicMock):
-    mock_db.query.return_value.filter.return_value.first.return_value = None
+    mock_db.scalar.return_value = None
     mock_db.add.return_value = None
     mock_db.commit.return_value = None
     mock_db.refresh.return_value = None
@@ -63,7 +69,7 @@ def test_create_user_success(mock_db: MagicMock):
 
 
 def test_create_user_conflict_name(mock_db: MagicMock):
-    mock_db.query.return_value.filter.return_value.first.return_value = Users(
+    mock_db.scalar.return_value = Users(
         id=1, name="ExistingUser", email="existing@test.com"
     )
 
@@ -78,7 +84,7 @@ def test_create_user_conflict_name(mock_db: MagicMock):
 def test_create_user_conflict_email(mock_db):
     user_request = {"name": "Tester", "email": "tester@gmail.com", "password": "password"}
 
-    mock_db.query.return_value.filter.return_value.first.side_effect = [
+    mock_db.scalar.side_effect = [
         None,
         True,
     ]
@@ -89,3 +95,31 @@ def test_create_user_conflict_email(mock_db):
     assert response.json() == {
         "detail": "Email 'tester@gmail.com' is already registered for another user."
     }
+
+
+def test_list_users_without_total(mock_db: MagicMock, as_rows):
+    mock_db.execute.return_value.all.return_value = as_rows(
+        users_fields, [Users(id=1, name="User1", email="user1@test.com")]
+    )
+
+    response = client.get("/users", params={"include_total": False})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["total_items"] is None
+    assert response.json()["total_pages"] is None
+    assert response.json()["total_exact"] is False
+    mock_db.scalar.assert_not_called()
+
+
+def test_list_users_with_cached_total(mock_db: MagicMock):
+    count_cache.clear()
+    mock_db.scalar.return_value = 42
+    mock_db.execute.return_value.all.return_value = []
+    params = {"name": "cached", "total_mode": "cached"}
+
+    first = client.get("/users", params=params)
+    second = client.get("/users", params=params)
+
+    assert (first.json()["total_items"], first.json()["total_exact"]) == (42, True)
+    assert (second.json()["total_items"], second.json()["total_exact"]) == (42, False)
+    assert mock_db.scalar.await_count == 1
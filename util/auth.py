@@ -1,13 +1,24 @@
+import hashlib
 import secrets
+import time
+from dataclasses import dataclass
 from fastapi.security import OAuth2PasswordBearer
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from configobj import ConfigObj
 from fastapi import Depends, HTTPException, status
 from database.database import db_dependency
 
 from jose import JWTError, jwt
+from sqlalchemy import select
 
 from database.models import Users
 from models.UsersMO import verify_password
+from util.cache import TTLCache
+from util.password_pool import password_pool
+
+config = ConfigObj("config.cfg")
+auth_config = config.get("AUTH", {})
 
 SECRET_KEY = secrets.token_hex(32)
 ALGORITHM = "HS256"
@@ -17,12 +28,30 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 480  # 8 hours
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
-def authenticate_user(db: db_dependency, username: str, password: str):
-    user = db.query(Users).filter(Users.name == username).first()
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """The authenticated user, without loading the ORM row."""
+
+    id: int
+    name: str
+
+
+principal_cache = TTLCache(
+    maxsize=int(auth_config.get("PRINCIPAL_CACHE_SIZE", 1024)),
+    ttl=float(auth_config.get("PRINCIPAL_CACHE_TTL", 60)),
+)
+token_cache = TTLCache(
+    maxsize=int(auth_config.get("TOKEN_CACHE_SIZE", 4096)),
+    ttl=float(auth_config.get("TOKEN_CACHE_TTL", 300)),
+)
+
+
+async def authenticate_user(db: db_dependency, username: str, password: str):
+    user = await db.scalar(select(Users).where(Users.name == username))
 
     if not user:
         return False
-    if not verify_password(password, user.password):
+    if not await password_pool.run(verify_password, password, user.password):
         return False
 
     return user
@@ -32,33 +61,91 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
 
     if expires_delta:
-        expire = datetime.now() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now() + timedelta(minutes=15)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=15)
 
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
+def decode_token(token: str) -> dict:
+    """
+    The verified claims of a token, cached by the digest of the token.
+
+    Only tokens that passed ``jwt.decode`` are cached, and an entry never
+    outlives the ``exp`` claim, so a cache hit is as good as verifying the
+    signature again. Raises ``JWTError`` like ``jwt.decode``.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    ttl = token_cache.ttl
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(digest, payload, ttl=ttl)
+
+    return payload
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def resolve_principal(
+    db: db_dependency, username: str, user_id: Optional[int] = None
+) -> Optional[Principal]:
+    """
+    The user a token belongs to, served from ``principal_cache`` when possible.
+
+    Tokens issued before the user id was added only carry the name, so those
+    are resolved through the ``Users.name`` index instead of the primary key.
+    """
+    cache_key = user_id if user_id is not None else ("name", username)
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return principal
+
+    query = select(Users.id, Users.name)
+    if user_id is not None:
+        query = query.where(Users.id == user_id)
+    else:
+        query = query.where(Users.name == username)
+
+    row = (await db.execute(query.limit(1))).first()
+    if row is None or row.name != username:
+        return None
 
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    principal = Principal(id=row.id, name=row.name)
+    principal_cache.set(cache_key, principal)
+    return principal
 
-        return username
+
+async def get_current_user(
+    db: db_dependency, token: str = Depends(oauth2_scheme)
+) -> Principal:
+    try:
+        payload = decode_token(token)
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise credentials_exception()
+
+    username: str = payload.get("sub")
+    if username is None:
+        raise credentials_exception()
+
+    principal = await resolve_principal(db, username, payload.get("uid"))
+    if principal is None:
+        raise credentials_exception()
+
+    return principal
 
 
 current_user_dependency = Depends(get_current_user)
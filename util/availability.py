@@ -0,0 +1,364 @@
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from configobj import ConfigObj
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Reservations, Rooms
+
+config = ConfigObj("config.cfg")
+availability_config = config.get("AVAILABILITY", {})
+
+Interval = tuple[int, datetime, datetime]
+
+
+def naive(value: datetime) -> datetime:
+    """Drop the timezone like the MySQL driver does when binding parameters."""
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+class RoomIntervals:
+    """
+    Reservations of one room as arrays sorted by start time.
+
+    ``max_ends[i]`` is the latest end among the first ``i + 1`` intervals, so
+    an overlap check is one bisect plus one comparison even if the stored
+    intervals overlap each other.
+    """
+
+    __slots__ = ("version", "checked_at", "ids", "starts", "ends", "max_ends")
+
+    def __init__(self, version: int, reservations: Iterable[Interval]):
+        self.version = version
+        self.checked_at = time.monotonic()
+        ordered = sorted(reservations, key=lambda interval: interval[1])
+        self.ids = [interval[0] for interval in ordered]
+        self.starts = [interval[1] for interval in ordered]
+        self.ends = [interval[2] for interval in ordered]
+        self.max_ends: list[datetime] = []
+        self._rebuild_max_ends(0)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _rebuild_max_ends(self, position: int):
+        del self.max_ends[position:]
+        latest = self.max_ends[-1] if self.max_ends else None
+        for end in self.ends[position:]:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+    def first_overlap(self, start: datetime, end: datetime) -> Optional[Interval]:
+        """A stored interval overlapping ``[start, end)``, or None if it is free."""
+        start, end = naive(start), naive(end)
+        candidates = bisect_left(self.starts, end)
+        if candidates == 0 or self.max_ends[candidates - 1] <= start:
+            return None
+
+        for position in range(candidates - 1, -1, -1):
+            if self.ends[position] > start:
+                return self.ids[position], self.starts[position], self.ends[position]
+
+    def free_gaps(
+        self, start: datetime, end: datetime, duration: timedelta
+    ) -> Iterator[tuple[datetime, datetime]]:
+        """
+        Free windows of at least ``duration`` inside ``[start, end)``, in order.
+
+        One sweep over the intervals that start inside the horizon, tracking
+        the latest end seen so far.
+        """
+        start, end = naive(start), naive(end)
+        position = bisect_right(self.starts, start)
+        free_from = start
+        if position and self.max_ends[position - 1] > free_from:
+            free_from = self.max_ends[position - 1]
+
+        for interval_start, interval_end in zip(
+            self.starts[position:], self.ends[position:]
+        ):
+            if interval_start >= end:
+                break
+            if interval_start - free_from >= duration:
+                yield free_from, interval_start
+            if interval_end > free_from:
+                free_from = interval_end
+
+        if end - free_from >= duration:
+            yield free_from, end
+
+    def add(self, id: int, start: datetime, end: datetime):
+        start, end = naive(start), naive(end)
+        position = bisect_right(self.starts, start)
+        self.ids.insert(position, id)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self._rebuild_max_ends(position)
+
+    def remove(self, id: int):
+        if id not in self.ids:
+            return
+
+        position = self.ids.index(id)
+        del self.ids[position], self.starts[position], self.ends[position]
+        self._rebuild_max_ends(position)
+
+    def intervals(self) -> Iterable[Interval]:
+        return zip(self.ids, self.starts, self.ends)
+
+
+class RoomIntervalIndex:
+    """
+    Process local cache of ``RoomIntervals`` keyed by room id.
+
+    Every create or delete of a reservation bumps ``Rooms.reservations_version``
+    in the same transaction, so an entry is valid while its version matches the
+    room row. Changes made by this worker are applied in place; changes made by
+    other workers are noticed on the next version check, which readers may
+    skip for ``version_ttl`` seconds.
+
+    Args:
+        max_rooms (int): Rooms kept in memory before the least recently used
+            one is dropped.
+        version_ttl (float): Seconds an entry is trusted without re-reading
+            the room version. Writers always check the version.
+    """
+
+    def __init__(self, max_rooms: int = 10000, version_ttl: float = 1.0):
+        self.max_rooms = max_rooms
+        self.version_ttl = version_ttl
+        self._rooms: OrderedDict[int, RoomIntervals] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def get(
+        self, room_id: int, version: Optional[int] = None
+    ) -> Optional[RoomIntervals]:
+        """
+        The cached intervals of a room.
+
+        With ``version`` the entry must match it exactly; without it the entry
+        must have been checked less than ``version_ttl`` seconds ago.
+        """
+        intervals = self._rooms.get(room_id)
+        if intervals is None:
+            return None
+
+        if version is None:
+            if time.monotonic() - intervals.checked_at >= self.version_ttl:
+                return None
+        elif intervals.version != version:
+            self.invalidate(room_id)
+            return None
+        else:
+            intervals.checked_at = time.monotonic()
+
+        self._rooms.move_to_end(room_id)
+        return intervals
+
+    def load(
+        self, room_id: int, version: int, reservations: Iterable[Interval]
+    ) -> RoomIntervals:
+        intervals = RoomIntervals(version, reservations)
+        self._rooms[room_id] = intervals
+        self._rooms.move_to_end(room_id)
+
+        while len(self._rooms) > self.max_rooms:
+            self._rooms.popitem(last=False)
+
+        return intervals
+
+    def _advance(self, room_id: int, version: int) -> Optional[RoomIntervals]:
+        intervals = self._rooms.get(room_id)
+        if intervals is None:
+            return None
+
+        if intervals.version != version - 1:
+            self.invalidate(room_id)
+            return None
+
+        intervals.version = version
+        intervals.checked_at = time.monotonic()
+        return intervals
+
+    def add(self, room_id: int, version: int, id: int, start: datetime, end: datetime):
+        """Record a reservation committed by this worker as room ``version``."""
+        self.add_many(room_id, version, [(id, start, end)])
+
+    def add_many(self, room_id: int, version: int, reservations: Iterable[Interval]):
+        """Record reservations committed in one transaction as room ``version``."""
+        intervals = self._advance(room_id, version)
+        if intervals is not None:
+            for id, start, end in reservations:
+                intervals.add(id, start, end)
+
+    def remove(self, room_id: int, version: int, id: int):
+        """Forget a reservation deleted by this worker as room ``version``."""
+        intervals = self._advance(room_id, version)
+        if intervals is not None:
+            intervals.remove(id)
+
+    def invalidate(self, room_id: int):
+        self._rooms.pop(room_id, None)
+
+    def clear(self):
+        self._rooms.clear()
+
+
+room_index = RoomIntervalIndex(
+    max_rooms=int(availability_config.get("MAX_ROOMS", 10000)),
+    version_ttl=float(availability_config.get("VERSION_TTL", 1.0)),
+)
+
+
+async def room_intervals(
+    db: AsyncSession, room_id: int, version: Optional[int] = None, lock: bool = False
+) -> Optional[RoomIntervals]:
+    """
+    Reservations of a room from the index, loading them when missing or stale.
+
+    Pass the ``version`` read from the room row to require an exact match.
+    Pass ``lock`` while holding ``lock_room``: the reload is then a locking
+    read, which on MySQL sees the rows other transactions committed instead
+    of the REPEATABLE READ snapshot fixed by the first plain read of this
+    transaction. Returns None when the room does not exist.
+    """
+    intervals = room_index.get(room_id, version)
+    if intervals is not None:
+        return intervals
+
+    if version is None:
+        version = await db.scalar(
+            select(Rooms.reservations_version).where(Rooms.id == room_id)
+        )
+        if version is None:
+            return None
+
+        intervals = room_index.get(room_id, version)
+        if intervals is not None:
+            return intervals
+
+    query = (
+        select(Reservations.id, Reservations.start_time, Reservations.end_time)
+        .where(Reservations.room_id == room_id)
+        .order_by(Reservations.start_time)
+    )
+    if lock:
+        query = query.with_for_update(read=True)
+
+    rows = await db.execute(query)
+    return room_index.load(room_id, version, rows.tuples().all())
+
+
+async def rooms_intervals(
+    db: AsyncSession, versions: dict[int, int]
+) -> dict[int, RoomIntervals]:
+    """
+    Reservations of many rooms, given as ``{room_id: version}``.
+
+    Rooms missing from the index or stale are loaded with one grouped query.
+    """
+    found: dict[int, RoomIntervals] = {}
+    stale: list[int] = []
+    for room_id, version in versions.items():
+        intervals = room_index.get(room_id, version)
+        if intervals is None:
+            stale.append(room_id)
+        else:
+            found[room_id] = intervals
+
+    if stale:
+        rows = await db.execute(
+            select(
+                Reservations.room_id,
+                Reservations.id,
+                Reservations.start_time,
+                Reservations.end_time,
+            )
+            .where(Reservations.room_id.in_(stale))
+            .order_by(Reservations.room_id, Reservations.start_time)
+        )
+        grouped: dict[int, list[Interval]] = {room_id: [] for room_id in stale}
+        for room_id, id, start_time, end_time in rows.tuples():
+            grouped[room_id].append((id, start_time, end_time))
+
+        for room_id, reservations in grouped.items():
+            found[room_id] = room_index.load(room_id, versions[room_id], reservations)
+
+    return found
+
+
+def earliest_free_slots(
+    intervals_by_room: dict[int, RoomIntervals],
+    start: datetime,
+    end: datetime,
+    duration: timedelta,
+    limit: int,
+) -> list[dict]:
+    """
+    The first ``limit`` free slots of ``duration`` across rooms, earliest first.
+
+    Each room yields its free gaps lazily, in order, and ``heapq.merge``
+    pulls only as many gaps as needed from each room.
+    """
+
+    def room_gaps(room_id: int, intervals: RoomIntervals):
+        for gap_start, gap_end in intervals.free_gaps(start, end, duration):
+            yield gap_start, room_id, gap_end
+
+    gaps_by_room = [
+        room_gaps(room_id, intervals)
+        for room_id, intervals in intervals_by_room.items()
+    ]
+
+    return [
+        {
+            "room_id": room_id,
+            "start": gap_start,
+            "end": gap_start + duration,
+            "free_until": gap_end,
+        }
+        for gap_start, room_id, gap_end in islice(heapq.merge(*gaps_by_room), limit)
+    ]
+
+
+async def lock_room(db: AsyncSession, room_id: int) -> Optional[int]:
+    """
+    Lock the room row until the transaction ends and return its version.
+
+    ``SELECT ... FOR UPDATE`` on the room serializes every reservation write
+    for that room across workers, so a conflict check made while holding the
+    lock stays valid until the insert commits. Returns None when the room
+    does not exist.
+    """
+    return await db.scalar(
+        select(Rooms.reservations_version).where(Rooms.id == room_id).with_for_update()
+    )
+
+
+async def bump_room_version(
+    db: AsyncSession, room_id: int, locked_version: Optional[int] = None
+) -> int:
+    """
+    Mark the reservations of a room as changed and return the new version.
+
+    Pass the version returned by ``lock_room`` to skip re-reading it.
+    """
+    await db.execute(
+        update(Rooms)
+        .where(Rooms.id == room_id)
+        .values(reservations_version=Rooms.reservations_version + 1)
+    )
+    if locked_version is not None:
+        return locked_version + 1
+
+    return await db.scalar(
+        select(Rooms.reservations_version).where(Rooms.id == room_id)
+    )
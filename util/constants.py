@@ -53,6 +53,89 @@ ws_responses: dict = {
             },
         },
     },
+    "rooms_post_availability_batch": {
+        200: {
+            "description": "Indicates that the request was successful.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "rooms": [
+                            {"room_id": 1, "availability": [True, False]},
+                            {"room_id": 2, "availability": [True, True]},
+                        ],
+                        "available_room_ids": [2],
+                        "not_found": [5],
+                    }
+                }
+            },
+        },
+        400: {
+            "description": "Indicates that there is an error with the request parameters.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "The start time must be earlier than the end time."
+                    }
+                }
+            },
+        },
+        422: {
+            "description": "Indicates that the filters match more rooms than one request checks.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "The filters match more than 500 rooms. Narrow them with location or min_capacity."
+                    }
+                }
+            },
+        },
+    },
+    "rooms_get_free_slots": {
+        200: {
+            "description": "Indicates that the request was successful.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "duration": 60,
+                        "slots": [
+                            {
+                                "room_id": 2,
+                                "start": "2025-02-10T08:00:00",
+                                "end": "2025-02-10T09:00:00",
+                                "free_until": "2025-02-10T10:30:00",
+                            },
+                            {
+                                "room_id": 1,
+                                "start": "2025-02-10T09:15:00",
+                                "end": "2025-02-10T10:15:00",
+                                "free_until": "2025-02-10T12:00:00",
+                            },
+                        ],
+                    }
+                }
+            },
+        },
+        400: {
+            "description": "Indicates that there is an error with the request parameters.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "The start time must be earlier than the end time."
+                    }
+                }
+            },
+        },
+        422: {
+            "description": "Indicates that the filters match more rooms than one request checks.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "The filters match more than 500 rooms. Narrow them with location or min_capacity."
+                    }
+                }
+            },
+        },
+    },
     "rooms_get_reservations": {
         200: {
             "description": "Indicates that the request was successful.",
@@ -82,6 +165,52 @@ ws_responses: dict = {
             },
         },
     },
+    "rooms_get_search": {
+        200: {
+            "description": "Indicates that the request was successful.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "query": "sala a",
+                        "fuzzy": False,
+                        "results": [
+                            {
+                                "score": 1.0,
+                                "room": {
+                                    "id": 1,
+                                    "name": "Sala A",
+                                    "capacity": 4,
+                                    "location": "Andar 1",
+                                    "creator_id": 1,
+                                    "created_at": "2025-02-06T19:32:42",
+                                },
+                            }
+                        ],
+                    }
+                }
+            },
+        },
+    },
+    "rooms_get_events": {
+        200: {
+            "description": "Server-Sent Events of the reservations created and deleted in the rooms, with a heartbeat comment while idle. A client that falls too far behind gets an overflow event and should reconnect.",
+            "content": {
+                "text/event-stream": {
+                    "example": "event: reservation.created\n"
+                    'data: {"id":1,"room_id":1,"user_id":1,'
+                    '"start_time":"2025-02-07T12:45:45","end_time":"2025-02-07T12:50:50"}\n\n'
+                }
+            },
+        },
+        400: {
+            "description": "Indicates that too many rooms were requested.",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Follow at most 100 rooms per stream."}
+                }
+            },
+        },
+    },
     "rooms_post": {
         201: {
             "description": "Indicates that the request was successful.",
@@ -122,6 +251,29 @@ ws_responses: dict = {
             },
         },
     },
+    "users_get_search": {
+        200: {
+            "description": "Indicates that the request was successful.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "query": "tes",
+                        "fuzzy": False,
+                        "results": [
+                            {
+                                "score": 1.0,
+                                "user": {
+                                    "id": 1,
+                                    "name": "test",
+                                    "email": "test@gmail.com",
+                                },
+                            }
+                        ],
+                    }
+                }
+            },
+        },
+    },
     "users_post": {
         201: {
             "description": "Indicates that the request was successful.",
@@ -169,6 +321,32 @@ ws_responses: dict = {
             },
         },
     },
+    "reservations_get_export": {
+        200: {
+            "description": "Streams every matching reservation, oldest first.",
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"id":1,"room_id":1,"user_id":1,'
+                    '"start_time":"2025-02-07T12:45:45","end_time":"2025-02-07T12:50:50",'
+                    '"created_at":"2025-02-07T09:16:17"}\n'
+                },
+                "text/csv": {
+                    "example": "id,room_id,user_id,start_time,end_time,created_at\n"
+                    "1,1,1,2025-02-07T12:45:45,2025-02-07T12:50:50,2025-02-07T09:16:17\n"
+                },
+            },
+        },
+        400: {
+            "description": "Indicates that a requested field does not exist.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Unknown fields: password. Choose from id, room_id, user_id, start_time, end_time, created_at."
+                    }
+                }
+            },
+        },
+    },
     "reservations_post": {
         201: {
             "description": "Indicates that the request was successful.",
@@ -196,6 +374,58 @@ ws_responses: dict = {
             },
         },
     },
+    "reservations_post_batch": {
+        201: {
+            "description": "Indicates that the request was successful.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "mode": "best_effort",
+                        "created": [
+                            {
+                                "id": 1,
+                                "room_id": 1,
+                                "user_id": 1,
+                                "start_time": "2025-03-03T09:00:00",
+                                "end_time": "2025-03-03T09:15:00",
+                                "created_at": "2025-02-06T19:32:42",
+                            }
+                        ],
+                        "conflicts": [
+                            {
+                                "start_time": "2025-03-10 09:00:00",
+                                "end_time": "2025-03-10 09:15:00",
+                                "conflicting_reservation": {
+                                    "id": 7,
+                                    "room_id": 1,
+                                    "start_time": "2025-03-10 08:30:00",
+                                    "end_time": "2025-03-10 09:30:00",
+                                },
+                            }
+                        ],
+                    }
+                }
+            },
+        },
+        400: {
+            "description": "Indicates that there is an error with the request parameters.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Occurrences cannot be longer than the recurrence interval."
+                    }
+                }
+            },
+        },
+        404: {
+            "description": "Indicates that the room does not exist.",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Room with ID 1 does not exist."}
+                }
+            },
+        },
+    },
     "reservations_delete": {
         204: {
             "description": "Indicates that the request was successful.",
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Iterable, Protocol
+
+import orjson
+from configobj import ConfigObj
+
+from util.logger import setup_logger
+from util.metrics import registry
+
+config = ConfigObj("config.cfg")
+events_config = config.get("EVENTS", {})
+logger: logging.Logger = setup_logger(__name__)
+
+EVENTS_HEARTBEAT = float(events_config.get("HEARTBEAT", 15))
+EVENTS_MAX_ROOMS = int(events_config.get("MAX_ROOMS", 100))
+
+OVERFLOW_EVENT = b'event: overflow\ndata: {"reconnect": true}\n\n'
+HEARTBEAT_EVENT = b": heartbeat\n\n"
+
+
+class Subscription:
+    """The rooms one client follows and its bounded queue of encoded events."""
+
+    def __init__(self, room_ids: frozenset[int], queue_size: int):
+        self.room_ids = room_ids
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+
+class EventHub:
+    """
+    Fans reservation events out to the subscriptions of their room.
+
+    An event is encoded once and the same bytes are queued for every
+    subscription of its room, so an idle subscription costs a queue and a
+    set entry per room rather than a task or a buffer. A subscription whose
+    queue is full is closed instead of buffering without bound for a slow
+    reader: its stream ends with an overflow event and the client
+    reconnects and refetches what it shows.
+
+    Args:
+        queue_size (int): Events a subscription buffers before it is closed.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.rooms: dict[int, set[Subscription]] = {}
+        self.subscriptions = 0
+        self.delivered = 0
+        self.overflowed = 0
+
+    def subscribe(self, room_ids: Iterable[int]) -> Subscription:
+        subscription = Subscription(frozenset(room_ids), self.queue_size)
+        for room_id in subscription.room_ids:
+            self.rooms.setdefault(room_id, set()).add(subscription)
+        self.subscriptions += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for room_id in subscription.room_ids:
+            subscribers = self.rooms.get(room_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.rooms[room_id]
+        self.subscriptions -= 1
+
+    def dispatch(self, room_id: int, event: bytes):
+        for subscription in self.rooms.get(room_id, ()):
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self.overflowed += 1
+
+    async def stream(
+        self, room_ids: Iterable[int], heartbeat: float
+    ) -> AsyncIterator[bytes]:
+        """
+        Server-Sent Events of ``room_ids`` until the subscription overflows
+        or the client leaves, with a comment every ``heartbeat`` seconds of
+        silence so that proxies keep the connection open. Subscribing here
+        rather than in the handler ties the subscription to the stream.
+        """
+        subscription = self.subscribe(room_ids)
+        try:
+            yield HEARTBEAT_EVENT
+            while not subscription.overflowed:
+                try:
+                    async with asyncio.timeout(heartbeat):
+                        event = await subscription.queue.get()
+                except TimeoutError:
+                    event = HEARTBEAT_EVENT
+                yield event
+
+            yield OVERFLOW_EVENT
+        finally:
+            self.unsubscribe(subscription)
+
+
+class Broker(Protocol):
+    """Carries events from the worker that made a change to the hubs."""
+
+    async def publish(self, room_id: int, event: bytes): ...
+
+    async def listen(self): ...
+
+
+class LocalBroker:
+    """Delivers to the hub of this process, which is enough with one worker."""
+
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+
+    async def publish(self, room_id: int, event: bytes):
+        self.hub.dispatch(room_id, event)
+
+    async def listen(self):
+        return
+
+
+class RedisBroker:
+    """
+    ``Broker`` on Redis pub/sub for several workers, which needs the
+    optional ``redis`` package. Every worker runs ``listen`` and dispatches
+    what any worker publishes to its own hub.
+    """
+
+    def __init__(self, url: str, hub: EventHub, channel: str):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(url)
+        self.hub = hub
+        self.channel = channel
+
+    async def publish(self, room_id: int, event: bytes):
+        await self.redis.publish(self.channel, b"%d\n%s" % (room_id, event))
+
+    async def listen(self):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            room_id, event = message["data"].split(b"\n", 1)
+                            self.hub.dispatch(int(room_id), event)
+            except Exception as error:
+                logger.warning(f"Lost the reservation event channel: {error}")
+                await asyncio.sleep(1)
+
+
+def encode_event(kind: str, reservation) -> bytes:
+    data = orjson.dumps(
+        {
+            "id": reservation.id,
+            "room_id": reservation.room_id,
+            "user_id": reservation.user_id,
+            "start_time": reservation.start_time,
+            "end_time": reservation.end_time,
+        }
+    )
+    return b"event: reservation.%s\ndata: %s\n\n" % (kind.encode(), data)
+
+
+async def publish_reservations(kind: str, reservations: Iterable):
+    """
+    Publish a ``created`` or ``deleted`` event per reservation once the
+    change is committed. Broker errors are logged: the change stands and
+    subscribers catch up when they refetch.
+    """
+    for reservation in reservations:
+        try:
+            await event_broker.publish(
+                reservation.room_id, encode_event(kind, reservation)
+            )
+        except Exception as error:
+            logger.warning(
+                f"Could not publish the {kind} event of reservation "
+                f"{reservation.id}: {error}"
+            )
+
+
+def broker(section, hub: EventHub) -> Broker:
+    name = section.get("BROKER", "local")
+    if name == "local":
+        return LocalBroker(hub)
+    if name == "redis":
+        return RedisBroker(
+            section["REDIS_URL"], hub, section.get("CHANNEL", "reservation_events")
+        )
+
+    raise ValueError(f"BROKER must be local or redis, not {name!r}.")
+
+
+event_hub = EventHub(queue_size=int(events_config.get("QUEUE_SIZE", 100)))
+event_broker: Broker = broker(events_config, event_hub)
+
+registry.gauge(
+    "reservation_event_subscriptions",
+    "Open reservation event streams.",
+    lambda: [((), event_hub.subscriptions)],
+)
+registry.gauge(
+    "reservation_events_total",
+    "Reservation events queued for subscribers, and subscriptions closed on overflow.",
+    lambda: [
+        (("delivered",), event_hub.delivered),
+        (("overflowed",), event_hub.overflowed),
+    ],
+    ("result",),
+    kind="counter",
+)
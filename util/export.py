@@ -0,0 +1,64 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterable, Literal, Sequence
+
+import orjson
+from configobj import ConfigObj
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+config = ConfigObj("config.cfg")
+export_config = config.get("EXPORT", {})
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_BATCH_SIZE = int(export_config.get("BATCH_SIZE", 1000))
+
+media_types: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def ndjson_lines(rows: Sequence, names: Sequence[str]) -> bytes:
+    return b"".join(
+        orjson.dumps(dict(zip(names, row)), option=orjson.OPT_APPEND_NEWLINE)
+        for row in rows
+    )
+
+
+def csv_lines(rows: Iterable[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def stream_rows(
+    sessions: Callable[[], AsyncSession],
+    query: Select,
+    names: Sequence[str],
+    format: ExportFormat,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Encode every row of ``query`` as NDJSON lines or CSV records.
+
+    The rows come from a server-side cursor ``batch_size`` at a time and
+    each batch is sent as one chunk, so memory stays flat however many rows
+    match. The session is opened here because the body is sent after the
+    handler returns; it closes when the stream ends or the client leaves.
+    """
+    async with sessions() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        if format == "csv":
+            yield csv_lines([names])
+
+        async for rows in result.partitions():
+            if format == "csv":
+                yield csv_lines(rows)
+            else:
+                yield ndjson_lines(rows, names)
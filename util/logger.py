@@ -1,19 +1,151 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
 
 from configobj import ConfigObj
 
+from util.metrics import registry
 
 config = ConfigObj("config.cfg")
 
 
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler over a bounded queue that never blocks the caller.
+
+    When the queue is full the record is dropped and counted. With the
+    "drop_new" policy the incoming record is discarded; with "drop_oldest"
+    the oldest queued record makes room for it.
+
+    Args:
+        log_queue (queue.Queue): Bounded queue read by the writer thread.
+        drop_policy (str): "drop_new" or "drop_oldest".
+    """
+
+    def __init__(self, log_queue, drop_policy="drop_new"):
+        super().__init__(log_queue)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        # Runs under the handler lock, so the counter needs no lock of its own.
+        self.dropped += 1
+        if self.drop_policy == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+
+
+class LogPipeline:
+    """
+    Console and rotating file handlers fed from a bounded queue.
+
+    Loggers only put records on the queue; a ``QueueListener`` thread does
+    the formatting, the writes and the rollovers, so disk latency never
+    blocks the event loop.
+
+    Args:
+        log_file (str): Log file name, inside the logs directory.
+        max_bytes (int): Max log file length before rotational.
+        backup_count (int): Old backup logs number.
+        queue_size (int): Records waiting to be written before drops start.
+        drop_policy (str): "drop_new" or "drop_oldest".
+    """
+
+    def __init__(self, log_file, max_bytes, backup_count, queue_size, drop_policy):
+        formatter = logging.Formatter(
+            "%(asctime)s [%(levelname)s] [%(name)s:%(funcName)s:%(lineno)d] %(message)s"
+        )
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+
+        os.makedirs("logs", exist_ok=True)
+
+        file_handler = RotatingFileHandler(
+            f"logs/{log_file}", maxBytes=max_bytes, backupCount=backup_count
+        )
+        file_handler.setFormatter(formatter)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue, drop_policy)
+        self.listener = QueueListener(
+            self.queue, console_handler, file_handler, respect_handler_level=True
+        )
+        self.listener.start()
+        self.running = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Write out the queued records and stop the writer thread."""
+        if self.running:
+            self.running = False
+            self.listener.stop()
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "dropped": self.handler.dropped,
+        }
+
+
+_pipelines = {}
+
+registry.gauge(
+    "log_queue_depth",
+    "Log records waiting for the writer thread.",
+    lambda: [((key[0],), pipe.queue.qsize()) for key, pipe in _pipelines.items()],
+    ("file",),
+)
+registry.gauge(
+    "log_records_dropped_total",
+    "Log records dropped because the queue was full.",
+    lambda: [((key[0],), pipe.handler.dropped) for key, pipe in _pipelines.items()],
+    ("file",),
+    kind="counter",
+)
+
+
+def get_pipeline(
+    log_file=config["LOGS"]["FILE_NAME"],
+    max_bytes=10 * 1024 * 1024,  # 10 MB or 10.485.760 bytes
+    backup_count=int(config["LOGS"]["BACKUP_COUNT"]),
+    queue_size=int(config["LOGS"].get("QUEUE_SIZE", 10000)),
+    drop_policy=config["LOGS"].get("DROP_POLICY", "drop_new"),
+):
+    """
+    The log pipeline writing to ``log_file``, started on first use.
+
+    Loggers sharing a file share one pipeline, so the file has a single
+    writer and rollovers do not race each other.
+    """
+
+    key = (log_file, max_bytes, backup_count)
+    if key not in _pipelines:
+        _pipelines[key] = LogPipeline(
+            log_file, max_bytes, backup_count, queue_size, drop_policy
+        )
+
+    return _pipelines[key]
+
+
 def setup_logger(
     name=__name__,
     log_file=config["LOGS"]["FILE_NAME"],
     level=logging.DEBUG,
     max_bytes=10 * 1024 * 1024,  # 10 MB or 10.485.760 bytes
-    backup_count=config["LOGS"]["BACKUP_COUNT"],
+    backup_count=int(config["LOGS"]["BACKUP_COUNT"]),
 ):
     """
     Configure a reusable logger.
@@ -33,21 +165,9 @@ def setup_logger(
     logger.setLevel(level)
     logger.propagate = False
 
-    formatter = logging.Formatter(
-        "%(asctime)s [%(levelname)s] [%(name)s:%(funcName)s:%(lineno)d] %(message)s"
-    )
-
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-
-    os.makedirs("logs", exist_ok=True)
-
-    file_handler = RotatingFileHandler(
-        f"logs/{log_file}", maxBytes=max_bytes, backupCount=backup_count
-    )
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    pipeline = get_pipeline(log_file, max_bytes, backup_count)
+    if pipeline.handler not in logger.handlers:
+        logger.addHandler(pipeline.handler)
 
     return logger
 
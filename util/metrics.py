@@ -0,0 +1,178 @@
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+# Seconds, from a fast cache hit to a slow bcrypt round.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+GaugeCallback = Callable[[], Iterable[tuple[LabelValues, float]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    """
+    Observations counted into fixed buckets per label set.
+
+    ``observe`` is one bisect and three additions; the cumulative bucket
+    counts the exposition format wants are only computed when rendering.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return 0 if series is None else series[2]
+
+    def total(self, *labels: str) -> float:
+        series = self._series.get(labels)
+        return 0.0 if series is None else series[1]
+
+    def render(self) -> Iterable[str]:
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_format_labels(names, labels + (bound,))} {cumulative}"
+                )
+
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {total}"
+            yield f"{self.name}_count{label_text} {count}"
+
+
+class Gauge:
+    """
+    A value read from ``callback`` when the metrics are scraped.
+
+    Pass ``kind="counter"`` for totals kept by another component.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: GaugeCallback,
+        labelnames: tuple[str, ...] = (),
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.callback = callback
+        self.kind = kind
+
+    def render(self) -> Iterable[str]:
+        for labels, value in self.callback():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Registry:
+    """
+    Metrics rendered in the Prometheus text exposition format.
+
+    Counters and histograms are plain dicts updated without locks: requests
+    and SQLAlchemy events of the async engine all run on the event loop
+    thread. Values owned by other components are read through gauge
+    callbacks at scrape time instead of being pushed on every change.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram | Gauge] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, help, tuple(labelnames)))
+
+    def histogram(
+        self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help, tuple(labelnames), buckets))
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        callback: GaugeCallback,
+        labelnames=(),
+        kind: str = "gauge",
+    ) -> Gauge:
+        return self.register(Gauge(name, help, callback, tuple(labelnames), kind))
+
+    def get(self, name: str) -> Optional[Counter | Histogram | Gauge]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template; _count is the request count.",
+    ("method", "route", "status"),
+)
@@ -1,5 +1,85 @@
-from fastapi import Request, FastAPI
-from typing import Any
+import logging
+import random
+import time
+from collections.abc import Mapping
+from urllib.parse import parse_qsl, urlencode
+from fastapi import FastAPI
+from typing import Any, Iterable, Iterator, Optional
+from configobj import ConfigObj
+from starlette.datastructures import URL
+from starlette.requests import cookie_parser
+from starlette.routing import compile_path
+from database.database import READ_YOUR_WRITES_SECONDS
+from database.replicas import Consistency, current_consistency, read_from_primary
+from database.instrumentation import (
+    QueryStats,
+    current_query_stats,
+    db_queries_per_request,
+    db_repeated_statements,
+    db_slow_queries,
+    statement_operation,
+)
+from util.logger import setup_logger
+from util.metrics import http_request_duration
+from util.response_cache import CachedResponse, ResponseCache, response_cache
+
+config = ConfigObj("config.cfg")
+request_logs_config = config.get("REQUEST_LOGS", {})
+query_inspector_config = config.get("QUERY_INSPECTOR", {})
+logger: logging.Logger = setup_logger(__name__)
+
+
+def _as_list(value: Any) -> list[str]:
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _route_path(scope: dict) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+
+    # Set by ResponseCacheMiddleware when it answers before the router runs.
+    return scope.get("cached_route", "unmatched")
+
+
+def _int_or(value: Optional[str], default: int) -> int:
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+class LazyPagination(Mapping):
+    """
+    The page, limit and offset of a request, parsed on first access.
+
+    Values that are missing or not integers fall back to page 1 and limit
+    10; the routes validate the real parameters themselves.
+    """
+
+    __slots__ = ("_query_string", "_values")
+
+    def __init__(self, query_string: bytes):
+        self._query_string = query_string
+        self._values: Optional[dict] = None
+
+    def _parse(self) -> dict:
+        if self._values is None:
+            params = dict(parse_qsl(self._query_string.decode("latin-1")))
+            page = _int_or(params.get("page"), 1)
+            limit = _int_or(params.get("limit"), 10)
+            self._values = {"page": page, "limit": limit, "offset": (page - 1) * limit}
+
+        return self._values
+
+    def __getitem__(self, key: str) -> int:
+        return self._parse()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._parse())
+
+    def __len__(self) -> int:
+        return 3
 
 
 class PaginationMiddleware:
@@ -7,14 +87,402 @@ class PaginationMiddleware:
         self.app = app
 
     async def __call__(self, scope: dict, receive: Any, send: Any):
-        request = Request(scope, receive)
+        if scope["type"] == "http" and scope["method"] == "GET":
+            scope["pagination"] = LazyPagination(scope["query_string"])
 
-        if request.method == "GET":
-            query_params = request.query_params
-            page = int(query_params.get("page", 1))
-            limit = int(query_params.get("limit", 10))
-            offset = (page - 1) * limit
+        await self.app(scope, receive, send)
 
-            scope["pagination"] = {"page": page, "limit": limit, "offset": offset}
 
-        await self.app(scope, receive, send)
+class RequestLoggingMiddleware:
+    """
+    Log the request line, a sample of request bodies and the response status.
+
+    The body is captured while the application reads it: up to
+    ``max_body_bytes`` of it is copied as it streams through and the rest is
+    only counted, so requests are never buffered by the middleware. Bodies
+    are skipped for ``skip_content_types`` and ``skip_paths`` and logged for
+    a ``sample_rate`` fraction of the remaining requests.
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        sample_rate: float = float(request_logs_config.get("BODY_SAMPLE_RATE", 1.0)),
+        max_body_bytes: int = int(request_logs_config.get("BODY_MAX_BYTES", 2048)),
+        skip_content_types: Iterable[str] = _as_list(
+            request_logs_config.get(
+                "SKIP_CONTENT_TYPES",
+                [
+                    "multipart/form-data",
+                    "application/octet-stream",
+                    "application/x-www-form-urlencoded",
+                ],
+            )
+        ),
+        skip_paths: Iterable[str] = _as_list(
+            request_logs_config.get("SKIP_PATHS", ["/auth/token"])
+        ),
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+        self.skip_content_types = tuple(
+            content_type.encode() for content_type in skip_content_types
+        )
+        self.skip_paths = frozenset(skip_paths)
+
+    def should_log_body(self, scope: dict) -> bool:
+        if scope["path"] in self.skip_paths:
+            return False
+
+        for name, value in scope["headers"]:
+            if name == b"content-type" and value.startswith(self.skip_content_types):
+                return False
+
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def logging_receive(self, receive: Any) -> Any:
+        captured = bytearray()
+        received = 0
+        done = False
+
+        async def receive_and_capture() -> dict:
+            nonlocal received, done
+            message = await receive()
+            if done or message["type"] != "http.request":
+                return message
+
+            body = message.get("body", b"")
+            received += len(body)
+            captured.extend(body[: self.max_body_bytes - len(captured)])
+
+            if received > self.max_body_bytes:
+                done = True
+                logger.info(
+                    f"Request body (first {len(captured)} bytes): {bytes(captured)}."
+                )
+            elif not message.get("more_body", False):
+                done = True
+                if captured:
+                    logger.info(f"Request body: {bytes(captured)}.")
+
+            return message
+
+        return receive_and_capture
+
+    async def __call__(self, scope: dict, receive: Any, send: Any):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        logger.info(f"Receiving request: {scope['method']} {URL(scope=scope)}.")
+
+        if self.should_log_body(scope):
+            receive = self.logging_receive(receive)
+
+        async def send_and_log_status(message: dict):
+            if message["type"] == "http.response.start":
+                logger.info(f"Response status code: {message['status']}.")
+            await send(message)
+
+        await self.app(scope, receive, send_and_log_status)
+
+
+class MetricsMiddleware:
+    """
+    Record the latency of every HTTP request by method, route and status.
+
+    The route label is the path template FastAPI matched, such as
+    ``/rooms/{id}/availability``, so ids never become label values.
+    Requests that match no route are labelled "unmatched". Server-Sent
+    Events streams are left out: they last as long as the client stays
+    connected, which is not a latency.
+    """
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        event_stream = False
+
+        async def send_and_record_status(message: dict):
+            nonlocal status_code, event_stream
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                event_stream = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record_status)
+        finally:
+            if not event_stream:
+                http_request_duration.observe(
+                    time.perf_counter() - started,
+                    scope["method"],
+                    _route_path(scope),
+                    str(status_code),
+                )
+
+
+class QueryInspectorMiddleware:
+    """
+    Track the statements of every request and report slow and repeated ones.
+
+    Statements slower than ``slow_query_ms`` and statements run at least
+    ``repeat_threshold`` times in one request are logged and counted in the
+    metrics. With ``header`` the totals of each request are also sent in an
+    ``X-Query-Stats`` response header, which is meant for debug mode.
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        slow_query_ms: float = float(query_inspector_config.get("SLOW_QUERY_MS", 100)),
+        repeat_threshold: int = int(query_inspector_config.get("REPEAT_THRESHOLD", 5)),
+        header: bool = config["SERVICE"].get("MODE", "production") != "production",
+    ):
+        self.app = app
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.repeat_threshold = repeat_threshold
+        self.header = header
+
+    def summary(self, query_stats: QueryStats) -> str:
+        repeated = query_stats.repeated(self.repeat_threshold)
+        return (
+            f"count={query_stats.count}; "
+            f"time_ms={query_stats.seconds * 1000:.2f}; "
+            f"slow={len(query_stats.slow)}; "
+            f"repeated={len(repeated)}"
+        )
+
+    def report(self, scope: dict, query_stats: QueryStats):
+        route = _route_path(scope)
+        db_queries_per_request.observe(query_stats.count, route)
+
+        for slow_query in query_stats.slow:
+            db_slow_queries.inc(route, statement_operation(slow_query["statement"]))
+            logger.warning(
+                f"Slow query in {scope['method']} {route} took {slow_query['ms']} ms: "
+                f"{slow_query['statement'][:500]} with {slow_query['parameters']}."
+            )
+
+        for statement, count in query_stats.repeated(self.repeat_threshold):
+            db_repeated_statements.inc(route)
+            logger.warning(
+                f"Statement ran {count} times in {scope['method']} {route}: "
+                f"{statement[:500]}."
+            )
+
+    async def __call__(self, scope: dict, receive: Any, send: Any):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        query_stats = QueryStats(self.slow_query_seconds)
+        token = current_query_stats.set(query_stats)
+
+        async def send_with_query_stats(message: dict):
+            if self.header and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-stats", self.summary(query_stats).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_query_stats)
+        finally:
+            current_query_stats.reset(token)
+            self.report(scope, query_stats)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keep reads of clients that just wrote on the primary.
+
+    When a request commits a write, the response sets a short lived
+    ``primary_until`` cookie. While it is valid, ``get_read_db`` hands that
+    client's requests the primary session instead of a replica, so a client
+    never reads data older than its own writes because of replication lag.
+    """
+
+    cookie_name = "primary_until"
+
+    def __init__(self, app: FastAPI, sticky_seconds: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    def pinned(self, scope: dict) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                primary_until = cookie_parser(value.decode("latin-1")).get(
+                    self.cookie_name
+                )
+                try:
+                    return (
+                        primary_until is not None and float(primary_until) > time.time()
+                    )
+                except ValueError:
+                    return False
+
+        return False
+
+    async def __call__(self, scope: dict, receive: Any, send: Any):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        consistency = Consistency(pinned=self.pinned(scope))
+        token = current_consistency.set(consistency)
+
+        async def send_with_cookie(message: dict):
+            if message["type"] == "http.response.start" and consistency.wrote:
+                primary_until = time.time() + self.sticky_seconds
+                cookie = (
+                    f"{self.cookie_name}={primary_until:.3f}; "
+                    f"Max-Age={int(self.sticky_seconds) or 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            current_consistency.reset(token)
+
+
+class ResponseCacheMiddleware:
+    """
+    Serve cached GET responses and answer conditional GETs with 304.
+
+    ``routes`` maps the path templates to cache, such as ``/rooms/{id}``, to
+    the tables their responses are built from. Entries are looked up by the
+    path, the normalized query and the current versions of those tables, so
+    a cached body is served until a handler bumps one of the tables. The
+    ETag is a hash of the body, and ``If-None-Match`` is answered with 304
+    when it matches the cached or the freshly rendered body. Clients pinned
+    to the primary after a write bypass the cache entirely, so they never
+    get or store a replica's older copy.
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        routes: dict[str, tuple[str, ...]],
+        cache: ResponseCache = response_cache,
+    ):
+        self.app = app
+        self.cache = cache
+        self.routes = [
+            (compile_path(path)[0], path, tables) for path, tables in routes.items()
+        ]
+
+    def match(self, path: str) -> Optional[tuple[str, tuple[str, ...]]]:
+        """The path template ``path`` matches and the tables it reads."""
+        for regex, template, tables in self.routes:
+            if regex.match(path):
+                return template, tables
+
+        return None
+
+    @staticmethod
+    def cache_key(scope: dict) -> str:
+        query = sorted(
+            parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+        )
+        return f"{scope['path']}?{urlencode(query)}"
+
+    @staticmethod
+    def if_none_match(scope: dict) -> set[str]:
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                return {
+                    tag.strip().removeprefix("W/")
+                    for tag in value.decode("latin-1").split(",")
+                }
+
+        return set()
+
+    @staticmethod
+    async def send_cached(
+        send: Any, scope: dict, response: CachedResponse, x_cache: bytes
+    ):
+        headers = [
+            (b"etag", response.etag.encode()),
+            (b"cache-control", b"no-cache"),
+            (b"x-cache", x_cache),
+        ]
+        if_none_match = ResponseCacheMiddleware.if_none_match(scope)
+        if "*" in if_none_match or response.etag in if_none_match:
+            await send(
+                {"type": "http.response.start", "status": 304, "headers": headers}
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", response.content_type),
+                    (b"content-length", str(len(response.body)).encode()),
+                    *headers,
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": response.body})
+
+    async def __call__(self, scope: dict, receive: Any, send: Any):
+        matched = None
+        if scope["type"] == "http" and scope["method"] == "GET":
+            matched = self.match(scope["path"])
+        if matched is None or read_from_primary():
+            await self.app(scope, receive, send)
+            return
+
+        template, tables = matched
+        entry_key = await self.cache.entry_key(self.cache_key(scope), tables)
+        cached = await self.cache.get(entry_key)
+        if cached is not None:
+            scope["cached_route"] = template
+            await self.send_cached(send, scope, cached, b"HIT")
+            return
+
+        settled = await self.cache.settled(tables)
+        start: Optional[dict] = None
+        body = bytearray()
+
+        async def send_and_store(message: dict):
+            nonlocal start
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+
+            body.extend(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            response = CachedResponse(
+                self.cache.etag(bytes(body)),
+                dict(start.get("headers", [])).get(b"content-type", b""),
+                bytes(body),
+            )
+            if settled:
+                await self.cache.set(entry_key, response)
+            await self.send_cached(send, scope, response, b"MISS")
+
+        await self.app(scope, receive, send_and_store)
@@ -0,0 +1,220 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Literal, Optional, Sequence
+
+from configobj import ConfigObj
+from fastapi import HTTPException, status
+from sqlalchemy import ColumnElement, Select, and_, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from util.cache import TTLCache
+
+config = ConfigObj("config.cfg")
+pagination_config = config.get("PAGINATION", {})
+
+TotalMode = Literal["exact", "cached", "estimated"]
+
+count_cache = TTLCache(
+    maxsize=int(pagination_config.get("COUNT_CACHE_SIZE", 1024)),
+    ttl=float(pagination_config.get("COUNT_CACHE_TTL", 30)),
+)
+
+
+class Keyset:
+    """
+    Stable sort key used for keyset (cursor) pagination.
+
+    The last column must be unique (usually the primary key) so that every
+    row has a distinct position. Cursors are the sort key values of the last
+    row of a page, JSON encoded and base64url wrapped so clients treat them
+    as opaque strings.
+    """
+
+    def __init__(self, *columns: InstrumentedAttribute):
+        self.columns = columns
+
+    def order(self, query: Select) -> Select:
+        return query.order_by(*self.columns)
+
+    def encode(self, item: Any) -> str:
+        values = []
+        for column in self.columns:
+            value = getattr(item, column.key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+
+        payload = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> list:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError(cursor)
+
+            return [
+                self._parse(column, value)
+                for column, value in zip(self.columns, values)
+            ]
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor.",
+            )
+
+    @staticmethod
+    def _parse(column: InstrumentedAttribute, value: Any) -> Any:
+        python_type = column.type.python_type
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if not isinstance(value, python_type) or isinstance(value, bool):
+            raise TypeError(value)
+        return value
+
+    def after(self, values: Sequence) -> ColumnElement[bool]:
+        """
+        Rows strictly after ``values`` in sort order.
+
+        Expanded to ``a >= x AND (a > x OR (a = x AND b > y))`` rather than a
+        row value comparison: the redundant ``a >= x`` bound is what lets both
+        MySQL and SQLite start an index range scan at the cursor.
+        """
+        clauses = []
+        for position, column in enumerate(self.columns):
+            equal = [self.columns[i] == values[i] for i in range(position)]
+            clauses.append(and_(*equal, column > values[position]))
+
+        if len(clauses) == 1:
+            return clauses[0]
+
+        return and_(self.columns[0] >= values[0], or_(*clauses))
+
+
+class Fieldset:
+    """
+    Columns a list endpoint returns, narrowed with a ``fields`` parameter.
+
+    Lists select these columns as plain rows instead of loading ORM
+    entities, which skips the identity map and attribute instrumentation
+    and leaves ``jsonable_encoder`` only dicts of plain values to walk.
+    """
+
+    def __init__(self, *columns: InstrumentedAttribute):
+        self.columns = {column.key: column for column in columns}
+
+    def parse(self, fields: Optional[str]) -> list[str]:
+        """The requested field names, in order, or every field by default."""
+        if not fields:
+            return list(self.columns)
+
+        names = list(
+            dict.fromkeys(filter(None, (name.strip() for name in fields.split(","))))
+        )
+        unknown = [name for name in names if name not in self.columns]
+        if unknown or not names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown) or fields!r}. "
+                f"Choose from {', '.join(self.columns)}.",
+            )
+
+        return names
+
+    def select(self, names: Sequence[str], keyset: Keyset) -> Select:
+        """
+        Select ``names`` followed by the keyset columns that are missing,
+        which ``keyset_page`` needs to build the next cursor.
+        """
+        extra = [column for column in keyset.columns if column.key not in names]
+        return select(*(self.columns[name] for name in names), *extra)
+
+    @staticmethod
+    def items(rows: Sequence, names: Sequence[str]) -> list[dict]:
+        return [dict(zip(names, row)) for row in rows]
+
+
+async def keyset_page(
+    db: AsyncSession, query: Select, keyset: Keyset, cursor: str, limit: int
+) -> tuple[Sequence, Optional[str]]:
+    """
+    Fetch one page after ``cursor`` (an empty cursor starts at the first row).
+
+    Returns the page items and the cursor of the next page, or None when
+    this is the last page.
+    """
+    if cursor:
+        query = query.where(keyset.after(keyset.decode(cursor)))
+
+    items = (await db.execute(keyset.order(query).limit(limit + 1))).all()
+
+    if len(items) <= limit or not limit:
+        return items[:limit], None
+
+    items = items[:limit]
+    return items, keyset.encode(items[-1])
+
+
+async def _estimated_rows(db: AsyncSession, query: Select) -> Optional[int]:
+    if db.bind.dialect.name != "mysql":
+        return None
+
+    table_name = query.get_final_froms()[0].name
+    return await db.scalar(
+        text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+        ),
+        {"table_name": table_name},
+    )
+
+
+async def count_items(
+    db: AsyncSession,
+    query: Select,
+    include_total: bool = True,
+    total_mode: TotalMode = "exact",
+) -> tuple[Optional[int], bool]:
+    """
+    Count the rows matched by ``query`` and tell whether the count is exact.
+
+    Modes:
+        exact: a COUNT(*) on every call.
+        cached: a COUNT(*) whose result is reused for COUNT_CACHE_TTL seconds
+            by calls with the same filters. Reused values are not exact.
+        estimated: the table statistics row estimate when the query has no
+            filters (MySQL only), otherwise the same as cached.
+
+    Returns (None, False) when ``include_total`` is false.
+    """
+    if not include_total:
+        return None, False
+
+    if total_mode == "estimated" and query.whereclause is None:
+        estimate = await _estimated_rows(db, query)
+        if estimate is not None:
+            return estimate, False
+
+    count_query = select(func.count()).select_from(query.subquery())
+
+    if total_mode == "exact":
+        return await db.scalar(count_query), True
+
+    compiled = count_query.compile()
+    key = (str(compiled), tuple(sorted(compiled.params.items())))
+
+    total_items = count_cache.get(key)
+    if total_items is not None:
+        return total_items, False
+
+    total_items = await db.scalar(count_query)
+    count_cache.set(key, total_items)
+
+    return total_items, True
+
+
+def total_pages(total_items: Optional[int], limit: int) -> Optional[int]:
+    if total_items is None:
+        return None
+    return (total_items + limit - 1) // limit
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from configobj import ConfigObj
+from fastapi import HTTPException, status
+
+from util.metrics import registry
+
+config = ConfigObj("config.cfg")
+pool_config = config.get("PASSWORD_POOL", {})
+
+
+def _timed_call(submitted_at: float, fn: Callable, *args) -> tuple[float, Any]:
+    # Wall clock on purpose: the call may run in another process.
+    waited = time.time() - submitted_at
+    return waited, fn(*args)
+
+
+class PasswordPool:
+    """
+    Bounded worker pool for CPU heavy password hashing and verification.
+
+    Args:
+        executor (str): "thread" or "process".
+        max_workers (int): Number of workers running bcrypt concurrently.
+        max_queue (int): Jobs allowed to wait for a free worker. When the
+            queue is full new jobs are rejected with 503 and Retry-After.
+        retry_after (int): Seconds sent in the Retry-After header.
+    """
+
+    def __init__(
+        self,
+        executor: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 32,
+        retry_after: int = 1,
+    ):
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+
+        self._executor: Executor | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @classmethod
+    def from_config(cls, section: dict) -> "PasswordPool":
+        return cls(
+            executor=section.get("EXECUTOR", "thread"),
+            max_workers=int(section.get("MAX_WORKERS", 4)),
+            max_queue=int(section.get("MAX_QUEUE", 32)),
+            retry_after=int(section.get("RETRY_AFTER", 1)),
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self.in_flight - self.max_workers, 0)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn(*args)`` on the pool, rejecting with 503 when it is saturated."""
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password operations in progress. Try again later.",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        self.in_flight += 1
+        try:
+            waited, result = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), _timed_call, time.time(), fn, *args
+            )
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool.from_config(pool_config)
+
+registry.gauge(
+    "password_pool_jobs",
+    "Password hashing jobs running or waiting for a worker.",
+    lambda: [
+        (("in_flight",), password_pool.in_flight),
+        (("queued",), password_pool.queue_depth),
+    ],
+    ("state",),
+)
+registry.gauge(
+    "password_pool_jobs_total",
+    "Password hashing jobs by outcome.",
+    lambda: [
+        (("completed",), password_pool.completed),
+        (("rejected",), password_pool.rejected),
+    ],
+    ("outcome",),
+    kind="counter",
+)
+registry.gauge(
+    "password_pool_wait_seconds_total",
+    "Time jobs spent waiting for a worker.",
+    lambda: [((), password_pool.wait_seconds_total)],
+    kind="counter",
+)
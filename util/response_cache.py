@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import secrets
+import time
+from typing import Iterable, NamedTuple, Optional, Protocol
+
+from configobj import ConfigObj
+
+from database.database import READ_YOUR_WRITES_SECONDS, replicas
+from util.cache import TTLCache
+from util.logger import setup_logger
+from util.metrics import registry
+
+config = ConfigObj("config.cfg")
+response_cache_config = config.get("RESPONSE_CACHE", {})
+logger: logging.Logger = setup_logger(__name__)
+
+response_cache_lookups = registry.counter(
+    "http_response_cache_lookups_total",
+    "Response cache lookups by result.",
+    ("result",),
+)
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    content_type: bytes
+    body: bytes
+
+    def dump(self) -> bytes:
+        return b"\n".join((self.etag.encode(), self.content_type, self.body))
+
+    @classmethod
+    def load(cls, value: bytes) -> "CachedResponse":
+        etag, content_type, body = value.split(b"\n", 2)
+        return cls(etag.decode(), content_type, body)
+
+
+class SharedBackend(Protocol):
+    """Store shared by every worker, such as Redis."""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes, ttl: float): ...
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]: ...
+
+    async def incr(self, key: str) -> int: ...
+
+
+class RedisBackend:
+    """``SharedBackend`` on Redis, which needs the optional ``redis`` package."""
+
+    def __init__(self, url: str):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.redis.set(key, value, ex=max(int(ttl), 1))
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return await self.redis.mget(keys)
+
+    async def incr(self, key: str) -> int:
+        return await self.redis.incr(key)
+
+
+class ResponseCache:
+    """
+    Rendered GET responses keyed by route, normalized query and table versions.
+
+    Handlers call ``bump`` with the tables they changed after committing, so
+    every entry built from an older version stops being looked up and ages
+    out of the LRU. Entries live in an in-process LRU and, when a ``shared``
+    backend is given, also there so that workers share entries and versions.
+    Errors of the shared backend are logged and the local cache is used.
+
+    Versions only pick the entry to look up: they are counters that restart
+    at 0, so local ones are salted with a random ``epoch`` per process. The
+    ETag of an entry is a hash of its body and never claims more than the
+    bytes it was computed from. After a bump, responses are not stored for
+    ``settle_seconds`` so that a lagging replica's copy is not cached under
+    the new version.
+
+    Args:
+        maxsize (int): Max number of responses kept in process.
+        ttl (float): Lifetime of an entry in seconds.
+        shared (Optional[SharedBackend]): Store shared between workers.
+        settle_seconds (float): How long after a bump reads may still be stale.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 60.0,
+        shared: Optional[SharedBackend] = None,
+        settle_seconds: float = 0.0,
+    ):
+        self.ttl = ttl
+        self.shared = shared
+        self.settle_seconds = settle_seconds
+        self.epoch = secrets.token_hex(8)
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.local_versions: dict[str, int] = {}
+        self.bumped_at: dict[str, float] = {}
+
+    async def versions(self, tables: Iterable[str]) -> tuple:
+        tables = tuple(tables)
+        if self.shared is not None:
+            try:
+                values = await self.shared.get_many(
+                    [f"version:{table}" for table in tables]
+                )
+                return tuple(int(value or 0) for value in values)
+            except Exception as error:
+                logger.warning(f"Shared response cache unavailable: {error}")
+
+        return (self.epoch, *(self.local_versions.get(table, 0) for table in tables))
+
+    async def entry_key(self, key: str, tables: Iterable[str]) -> str:
+        versions = await self.versions(tables)
+        digest = hashlib.blake2b(f"{key}|{versions}".encode(), digest_size=12)
+        return digest.hexdigest()
+
+    async def bump(self, *tables: str):
+        for table in tables:
+            self.local_versions[table] = self.local_versions.get(table, 0) + 1
+            self.bumped_at[table] = time.monotonic()
+            if self.shared is not None:
+                try:
+                    await self.shared.incr(f"version:{table}")
+                    if self.settle_seconds:
+                        await self.shared.set(
+                            f"settling:{table}", b"1", self.settle_seconds
+                        )
+                except Exception as error:
+                    logger.warning(
+                        f"Could not bump the shared version of {table}: {error}"
+                    )
+
+    async def settled(self, tables: Iterable[str]) -> bool:
+        """Whether no table was bumped within ``settle_seconds``."""
+        if not self.settle_seconds:
+            return True
+
+        tables = tuple(tables)
+        since = time.monotonic() - self.settle_seconds
+        if any(self.bumped_at.get(table, since) > since for table in tables):
+            return False
+
+        if self.shared is not None:
+            try:
+                values = await self.shared.get_many(
+                    [f"settling:{table}" for table in tables]
+                )
+                return not any(values)
+            except Exception as error:
+                logger.warning(f"Shared response cache unavailable: {error}")
+                return False
+
+        return True
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+    async def get(self, entry_key: str) -> Optional[CachedResponse]:
+        response = self.entries.get(entry_key)
+        if response is None and self.shared is not None:
+            try:
+                value = await self.shared.get(f"response:{entry_key}")
+            except Exception as error:
+                logger.warning(f"Shared response cache unavailable: {error}")
+                value = None
+
+            if value is not None:
+                response = CachedResponse.load(value)
+                self.entries.set(entry_key, response)
+
+        response_cache_lookups.inc("hit" if response is not None else "miss")
+        return response
+
+    async def set(self, entry_key: str, response: CachedResponse):
+        self.entries.set(entry_key, response)
+        if self.shared is not None:
+            try:
+                await self.shared.set(
+                    f"response:{entry_key}", response.dump(), self.ttl
+                )
+            except Exception as error:
+                logger.warning(f"Shared response cache unavailable: {error}")
+
+    def clear(self):
+        self.entries.clear()
+        self.local_versions.clear()
+        self.bumped_at.clear()
+
+
+def shared_backend(section) -> Optional[SharedBackend]:
+    backend = section.get("BACKEND", "local")
+    if backend == "local":
+        return None
+    if backend == "redis":
+        return RedisBackend(section["REDIS_URL"])
+
+    raise ValueError(f"BACKEND must be local or redis, not {backend!r}.")
+
+
+response_cache = ResponseCache(
+    maxsize=int(response_cache_config.get("SIZE", 1024)),
+    ttl=float(response_cache_config.get("TTL", 60)),
+    shared=shared_backend(response_cache_config),
+    settle_seconds=READ_YOUR_WRITES_SECONDS if len(replicas) else 0.0,
+)
@@ -0,0 +1,249 @@
+import heapq
+import math
+import re
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from configobj import ConfigObj
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Rooms, Users
+
+config = ConfigObj("config.cfg")
+search_config = config.get("SEARCH", {})
+
+WORD = re.compile(r"\w+")
+
+
+def words(text: str) -> list[str]:
+    """Lowercased words of ``text`` with accents removed."""
+    text = text.casefold()
+    if not text.isascii():
+        text = "".join(
+            char
+            for char in unicodedata.normalize("NFKD", text)
+            if not unicodedata.combining(char)
+        )
+    return WORD.findall(text)
+
+
+def document_grams(text: str) -> set[str]:
+    """Trigrams of every word padded like ``"  word "``."""
+    text_words = words(text)
+    # One pass over "  word   word " also yields "d  " and "   " where words
+    # meet, which are not trigrams of any padded word.
+    padded = f"  {'   '.join(text_words)} "
+    grams = {padded[i : i + 3] for i in range(len(padded) - 2)}
+    grams.discard("   ")
+    grams.difference_update(f"{word[-1]}  " for word in text_words)
+    return grams
+
+
+def query_grams(query_words: Iterable[str]) -> set[str]:
+    """
+    Trigrams of query words padded like ``"  word"``.
+
+    Without the trailing space the grams of a word are a subset of the grams
+    of every word it is a prefix of, so "con" matches "Conference".
+    """
+    grams = set()
+    for word in query_words:
+        padded = f"  {word}"
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _unique(postings: list[array]) -> Iterator[int]:
+    if len(postings) == 1:
+        yield from postings[0]
+        return
+
+    seen: set[int] = set()
+    for posting in postings:
+        for doc in posting:
+            if doc not in seen:
+                seen.add(doc)
+                yield doc
+
+
+class SearchIndex:
+    """
+    In-process trigram index over the text columns of a table.
+
+    Documents are numbered in the order they are added, so every posting
+    list is a sorted ``array`` of document numbers and membership is a
+    bisect. The first search loads the table; later ones read only rows
+    above the highest id seen, at most every ``refresh_interval`` seconds,
+    and the handlers add the rows they create right away. Rows are never
+    updated or deleted by the API, so that keeps the index complete. Ids
+    committed out of order are caught by re-reading the last ``lookback``
+    ids. Searches running while the first load is in progress see the rows
+    loaded so far.
+
+    Args:
+        columns (tuple): The id column followed by the text columns.
+        refresh_interval (float): Seconds between reads of new rows.
+        max_candidates (int): Rows examined per search, rarest trigrams
+            first, so a query of very common words is answered from the
+            first rows holding them instead of ranking the whole table.
+        fuzzy_threshold (float): Share of the query trigrams a fuzzy match
+            must contain.
+        lookback (int): Ids below the highest one re-read on refresh.
+    """
+
+    def __init__(
+        self,
+        columns: tuple,
+        refresh_interval: float = 5.0,
+        max_candidates: int = 2000,
+        fuzzy_threshold: float = 0.5,
+        lookback: int = 1000,
+    ):
+        self.columns = columns
+        self.refresh_interval = refresh_interval
+        self.max_candidates = max_candidates
+        self.fuzzy_threshold = fuzzy_threshold
+        self.lookback = lookback
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def clear(self):
+        self.ids = array("q")
+        self.texts: list[str] = []
+        self.gram_counts = array("H")
+        self.postings: dict[str, array] = {}
+        # Ids a refresh may read again, to skip them.
+        self.recent_ids: set[int] = set()
+        self.watermark = 0
+        self.synced_at: Optional[float] = None
+
+    def _add(self, id: int, fields: Iterable[Optional[str]]):
+        if id in self.recent_ids:
+            return
+
+        text = " ".join(field for field in fields if field)
+        grams = document_grams(text)
+        doc = len(self.ids)
+        self.recent_ids.add(id)
+        self.ids.append(id)
+        self.texts.append(text)
+        self.gram_counts.append(min(len(grams), 65535))
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array("I")
+            posting.append(doc)
+
+    def add(self, id: int, *fields: Optional[str]):
+        """Index a row created by this worker, once the table was loaded."""
+        if self.synced_at is not None:
+            self._add(id, fields)
+
+    def load(self, rows: Iterable[tuple]):
+        for id, *fields in rows:
+            self._add(id, fields)
+            self.watermark = max(self.watermark, id)
+
+        oldest = self.watermark - self.lookback
+        self.recent_ids = {id for id in self.recent_ids if id > oldest}
+
+    async def sync(self, db: AsyncSession):
+        """Load the table on first use, then read the rows added since."""
+        synced_at = self.synced_at
+        if (
+            synced_at is not None
+            and time.monotonic() - synced_at < self.refresh_interval
+        ):
+            return
+
+        self.synced_at = time.monotonic()
+        id_column = self.columns[0]
+        query = select(*self.columns).order_by(id_column)
+        if synced_at is not None:
+            query = query.where(id_column > self.watermark - self.lookback)
+
+        try:
+            result = await db.stream(query.execution_options(yield_per=2000))
+            async for rows in result.partitions():
+                self.load(rows)
+        except Exception:
+            self.synced_at = synced_at
+            raise
+
+    def _has_prefixes(self, doc: int, query_words: list[str]) -> bool:
+        # Trigrams can come from different words, so check the words.
+        doc_words = words(self.texts[doc])
+        return all(
+            any(doc_word.startswith(word) for doc_word in doc_words)
+            for word in query_words
+        )
+
+    def search(
+        self, query: str, limit: int = 10, fuzzy: bool = False
+    ) -> list[tuple[int, float]]:
+        """
+        Ids of the best matches for ``query`` with their score, best first.
+
+        By default every query word must be a prefix of a word of the row.
+        With ``fuzzy`` a row must contain ``fuzzy_threshold`` of the query
+        trigrams instead, which tolerates typos. The score is the share of
+        query trigrams found; ties go to the shorter rows.
+        """
+        query_words = words(query)
+        grams = query_grams(query_words)
+        if not grams:
+            return []
+
+        postings = sorted(
+            (self.postings.get(gram, array("I")) for gram in grams), key=len
+        )
+        required = (
+            max(1, math.ceil(self.fuzzy_threshold * len(grams)))
+            if fuzzy
+            else len(grams)
+        )
+        # A row sharing ``required`` trigrams is in one of these lists.
+        probes = postings[: len(postings) - required + 1]
+        allowed_misses = len(postings) - required
+
+        matches = []
+        for doc in islice(_unique(probes), self.max_candidates):
+            overlap = misses = 0
+            for posting in postings:
+                position = bisect_left(posting, doc)
+                if position < len(posting) and posting[position] == doc:
+                    overlap += 1
+                else:
+                    misses += 1
+                    if misses > allowed_misses:
+                        break
+            else:
+                if fuzzy or self._has_prefixes(doc, query_words):
+                    matches.append(
+                        (overlap / len(grams), overlap / self.gram_counts[doc], -doc)
+                    )
+
+        return [
+            (self.ids[-negative_doc], round(score, 3))
+            for score, _, negative_doc in heapq.nlargest(limit, matches)
+        ]
+
+
+def _search_index(columns: tuple) -> SearchIndex:
+    return SearchIndex(
+        columns,
+        refresh_interval=float(search_config.get("REFRESH_INTERVAL", 5)),
+        max_candidates=int(search_config.get("MAX_CANDIDATES", 2000)),
+        fuzzy_threshold=float(search_config.get("FUZZY_THRESHOLD", 0.5)),
+    )
+
+
+room_search = _search_index((Rooms.id, Rooms.name, Rooms.location))
+user_search = _search_index((Users.id, Users.name, Users.email))
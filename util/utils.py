@@ -1,37 +1,43 @@
-from logging import Logger
-from fastapi import FastAPI, Request
+from configobj import ConfigObj
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from database.database import replicas
 from routes.AuthWS import auth_router
+from routes.MetricsWS import metrics_router
 from routes.RootWS import root_router
-from routes.RoomsWS import rooms_router
+from routes.RoomsWS import rooms_cached_routes, rooms_router
 from routes.UsersWS import users_router
 from routes.ReservationsWS import reservations_router
-from util.logger import setup_logger
-from util.middlewares import PaginationMiddleware
+from util.middlewares import (
+    MetricsMiddleware,
+    PaginationMiddleware,
+    QueryInspectorMiddleware,
+    ReadYourWritesMiddleware,
+    RequestLoggingMiddleware,
+    ResponseCacheMiddleware,
+)
 
+config = ConfigObj("config.cfg")
 
-def create_app():
-    app = FastAPI()
 
-    @app.middleware("http")
-    async def log_requests(request: Request, call_next):
-        logger.info(f"Receiving request: {request.method} {request.url}.")
-        if request_body := await request.body():
-            logger.info(f"Request body: {request_body}.")
-
-        response = await call_next(request)
-
-        logger.info(f"Response status code: {response.status_code}.")
-
-        return response
+def create_app(lifespan=None):
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
     app.include_router(root_router, tags=["Root"])
     app.include_router(auth_router, tags=["Auth"])
     app.include_router(rooms_router, tags=["Rooms"])
     app.include_router(users_router, tags=["Users"])
     app.include_router(reservations_router, tags=["Reservations"])
+    app.include_router(metrics_router, tags=["Metrics"])
 
+    if config.get("RESPONSE_CACHE", {}).get("ENABLED", "false").lower() == "true":
+        app.add_middleware(ResponseCacheMiddleware, routes=rooms_cached_routes)
+    if len(replicas):
+        app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(RequestLoggingMiddleware)
     app.add_middleware(PaginationMiddleware)
-
-    logger: Logger = setup_logger(__name__)
+    if config.get("QUERY_INSPECTOR", {}).get("ENABLED", "false").lower() == "true":
+        app.add_middleware(QueryInspectorMiddleware)
+    app.add_middleware(MetricsMiddleware)
 
     return app